@@ -44,11 +44,17 @@ export const getDecisions = async () => {
 
 /**
  * Analyze decision with retry
+ *
+ * All attempts share one Idempotency-Key, so a retried POST whose first
+ * attempt did reach the server returns that analysis instead of a new one.
  */
 export const analyzeDecision = async (payload) => {
+    const idempotencyKey = crypto.randomUUID();
     return retryWithBackoff(
         async () => {
-            const response = await api.post('/analysis/analyze', payload);
+            const response = await api.post('/analysis/analyze', payload, {
+                headers: { 'Idempotency-Key': idempotencyKey }
+            });
             return response.data;
         },
         {
@@ -68,6 +74,50 @@ export const pollAnalysisStatus = async (decisionId) => {
     return response.data;
 };
 
+/**
+ * Follow analysis progress over server-sent events.
+ * Uses fetch (not EventSource) so the X-User-ID header can be sent.
+ *
+ * @param {string} decisionId
+ * @param {Function} onEvent - Called with (event, data) for each event
+ * @returns {Function} Call to stop streaming
+ */
+export const streamAnalysis = (decisionId, onEvent) => {
+    const controller = new AbortController();
+
+    (async () => {
+        const response = await fetch(`${api.defaults.baseURL}/analysis/${decisionId}/stream`, {
+            headers: { 'X-User-ID': getUserId() },
+            signal: controller.signal,
+        });
+        if (!response.ok || !response.body) return;
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // Events are separated by a blank line
+            const messages = buffer.split('\n\n');
+            buffer = messages.pop();
+            for (const message of messages) {
+                const event = message.match(/^event: (.*)$/m)?.[1];
+                const data = message.match(/^data: (.*)$/m)?.[1];
+                if (event && data) onEvent(event, JSON.parse(data));
+            }
+        }
+    })().catch(err => {
+        // Streaming is best-effort; polling remains the source of truth
+        if (err.name !== 'AbortError') console.warn('Analysis stream error:', err);
+    });
+
+    return () => controller.abort();
+};
+
 /**
  * Update outcome with retry
  */
@@ -2,7 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { PlusCircle, Trash2, Sparkles, AlertCircle, CheckCircle2, ChevronRight } from 'lucide-react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { cn } from '../utils/cn';
-import { analyzeDecision, pollAnalysisStatus } from '../api';
+import { analyzeDecision, pollAnalysisStatus, streamAnalysis } from '../api';
 
 const POLL_INTERVAL = 3000; // 3 seconds
 const MAX_POLL_ATTEMPTS = 60; // 3 minutes max
@@ -15,17 +15,33 @@ const NewDecision = () => {
     const [error, setError] = useState('');
     const [result, setResult] = useState(null);
     const [analysisStatus, setAnalysisStatus] = useState('');
+    const [partial, setPartial] = useState({});
     const pollIntervalRef = useRef(null);
     const pollAttemptsRef = useRef(0);
+    const stopStreamRef = useRef(null);
 
     useEffect(() => {
         return () => {
             if (pollIntervalRef.current) {
                 clearInterval(pollIntervalRef.current);
             }
+            if (stopStreamRef.current) {
+                stopStreamRef.current();
+            }
         };
     }, []);
 
+    const startStreaming = (decisionId) => {
+        setPartial({});
+        stopStreamRef.current = streamAnalysis(decisionId, (event, data) => {
+            if (event !== 'partial') return;
+            const [field, entry] = data.path;
+            setPartial(prev => entry === undefined
+                ? { ...prev, [field]: data.value }
+                : { ...prev, [field]: { ...(prev[field] || {}), [entry]: data.value } });
+        });
+    };
+
     const addVariant = () => {
         const newIdx = variants.length;
         setVariants([...variants, { title: `Path ${String.fromCharCode(65 + newIdx)}`, essay: '' }]);
@@ -94,9 +110,9 @@ const NewDecision = () => {
                 console.error('Polling error:', err);
                 clearInterval(pollIntervalRef.current);
 
-                // Handle Rollback (404 = Decision deleted)
+                // 404 = Decision deleted
                 if (err.response && err.response.status === 404) {
-                    setError('Analysis failed and was automatically rolled back. Please try again.');
+                    setError('This decision no longer exists. Please submit it again.');
                 } else {
                     setError('Failed to check analysis status. Please refresh and check History.');
                 }
@@ -141,6 +157,7 @@ const NewDecision = () => {
 
             if (response.decision_id) {
                 setAnalysisStatus('analyzing');
+                startStreaming(response.decision_id);
                 startPolling(response.decision_id);
             } else {
                 setError('Failed to start analysis. Invalid response from server.');
@@ -302,6 +319,31 @@ const NewDecision = () => {
                 </section>
             </div>
 
+            {/* Partial Results (streamed while the LLM is still generating) */}
+            <AnimatePresence>
+                {loading && (partial.final_note || partial.argument_quality_comparison) && (
+                    <motion.div
+                        initial={{ opacity: 0, y: 20 }}
+                        animate={{ opacity: 1, y: 0 }}
+                        exit={{ opacity: 0 }}
+                        className="space-y-6 pt-16 border-t border-white/5"
+                    >
+                        <h3 className="text-xs font-bold uppercase tracking-widest text-zinc-500">Early Insights</h3>
+                        {partial.final_note && (
+                            <p className="text-zinc-300 leading-relaxed">{partial.final_note}</p>
+                        )}
+                        {partial.argument_quality_comparison && Object.entries(partial.argument_quality_comparison).map(([variant, details]) => (
+                            <div key={variant} className="p-6 bg-white/[0.02] border border-white/5 rounded-2xl space-y-2">
+                                <span className="text-sm font-semibold text-zinc-300">{variant}</span>
+                                {(details.weaknesses || []).map((weakness, idx) => (
+                                    <p key={idx} className="text-sm text-zinc-400">{weakness}</p>
+                                ))}
+                            </div>
+                        ))}
+                    </motion.div>
+                )}
+            </AnimatePresence>
+
             {/* Results Section */}
             <AnimatePresence>
                 {result && (
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the full vs compact LLM output schema.
+
+Runs the same fixed decisions through LLMService.analyze_decision with
+LLM_COMPACT_OUTPUT off ("before") and on ("after"), and reports completion
+tokens and latency per mode. The response cache is disabled. Uses the
+backends configured in .env (OPENAI_API_KEY / LLM_BACKENDS):
+    python scripts/bench_llm_output.py --runs 3
+"""
+
+import argparse
+import statistics
+import time
+
+from server.core.config import config
+from server.core.metrics import percentile
+from server.schemas.decision import DecisionCreate
+
+DECISIONS = [
+    {
+        "context": "Should I invest my savings in index funds or buy a small apartment to rent out in my city?",
+        "variants": ["Index Funds", "Apartment"],
+        "arguments": [
+            {"variant_name": "Index Funds", "type": "pro", "text": "Index funds are diversified and I can sell them anytime without paying agent fees"},
+            {"variant_name": "Index Funds", "type": "con", "text": "The market can drop thirty percent in a bad year and I might panic and sell"},
+            {"variant_name": "Apartment", "type": "pro", "text": "Rent gives steady monthly income and property prices in my city have grown for ten years"},
+            {"variant_name": "Apartment", "type": "con", "text": "Tenants can damage the flat and I would need to handle repairs myself on weekends"},
+        ],
+    },
+    {
+        "context": "I received a job offer abroad with a higher salary but I would have to leave my family and friends behind.",
+        "variants": ["Move Abroad", "Stay Home", "Negotiate Remote"],
+        "arguments": [
+            {"variant_name": "Move Abroad", "type": "pro", "text": "The salary is almost double and the company is a leader in my field of machine learning"},
+            {"variant_name": "Move Abroad", "type": "con", "text": "I do not speak the local language and making new friends at thirty is hard"},
+            {"variant_name": "Stay Home", "type": "pro", "text": "My parents are getting older and I want to be close to help them every week"},
+            {"variant_name": "Stay Home", "type": "con", "text": "My current job has no growth and I have been promised a promotion for three years"},
+            {"variant_name": "Negotiate Remote", "type": "pro", "text": "Many colleagues on the team already work remotely from other countries without problems"},
+        ],
+    },
+    {
+        "context": "Our startup has six months of runway left and we must decide whether to raise a bridge round or cut costs.",
+        "variants": ["Bridge Round", "Cut Costs"],
+        "arguments": [
+            {"variant_name": "Bridge Round", "type": "pro", "text": "Two existing investors told us informally that they would support a small bridge round"},
+            {"variant_name": "Bridge Round", "type": "con", "text": "Raising on worse terms signals weakness and dilutes the founders before the real Series A"},
+            {"variant_name": "Cut Costs", "type": "pro", "text": "Cutting the paid marketing budget would extend runway by four months with little revenue impact"},
+            {"variant_name": "Cut Costs", "type": "con", "text": "Layoffs would hurt morale and we could lose the two senior engineers who know the system"},
+        ],
+    },
+]
+
+
+def run_mode(service, decisions, compact: bool, max_tokens: int, runs: int):
+    from server.services.llm_backends import backend_tokens
+    from server.services.llm_service import build_ml_input
+
+    config.LLM_COMPACT_OUTPUT = compact
+    config.LLM_MAX_OUTPUT_TOKENS = max_tokens
+    latencies, tokens, failures = [], [], 0
+    for _ in range(runs):
+        for decision in decisions:
+            ml_input = build_ml_input(decision)
+            before = sum(backend_tokens.snapshot().values())
+            start = time.perf_counter()
+            try:
+                service.analyze_decision(decision, {}, {}, ml_input)
+            except Exception as e:
+                failures += 1
+                print(f"  {'compact' if compact else 'full'}: failed: {e!r}")
+                continue
+            latencies.append(time.perf_counter() - start)
+            tokens.append(sum(backend_tokens.snapshot().values()) - before)
+    return latencies, tokens, failures
+
+
+def report(name, latencies, tokens, failures):
+    if not latencies:
+        print(f"{name:8s} all {failures} requests failed")
+        return
+    print(
+        f"{name:8s} n={len(latencies):3d}  failures={failures}  "
+        f"tokens mean={statistics.mean(tokens):7.1f}  "
+        f"latency p50={percentile(latencies, 50):6.2f}s  p95={percentile(latencies, 95):6.2f}s  "
+        f"mean={statistics.mean(latencies):6.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Passes over the fixed decision set per mode")
+    parser.add_argument("--max-tokens", type=int, default=config.LLM_MAX_OUTPUT_TOKENS, help="Completion budget (compact)")
+    parser.add_argument("--baseline-max-tokens", type=int, default=4096, help="Completion budget (full schema)")
+    args = parser.parse_args()
+
+    config.LLM_CACHE_ENABLED = False
+    config.LLM_MAX_ATTEMPTS = 1
+    from server.services.llm_service import get_llm_service
+    service = get_llm_service()
+    decisions = [DecisionCreate(**d) for d in DECISIONS]
+
+    print(f"Model: {config.LLM_MODEL}, {len(decisions)} decisions x {args.runs} runs per mode")
+    full = run_mode(service, decisions, compact=False, max_tokens=args.baseline_max_tokens, runs=args.runs)
+    compact = run_mode(service, decisions, compact=True, max_tokens=args.max_tokens, runs=args.runs)
+    report("full", *full)
+    report("compact", *compact)
+    if full[1] and compact[1]:
+        saved = 1 - statistics.mean(compact[1]) / statistics.mean(full[1])
+        speedup = statistics.mean(full[0]) / statistics.mean(compact[0])
+        print(f"Output tokens -{saved:.0%}, mean latency x{speedup:.2f} faster")
+
+
+if __name__ == "__main__":
+    main()
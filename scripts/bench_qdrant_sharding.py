@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for sharded Qdrant collections.
+
+Fills a scratch collection with random 1024-d vectors owned by synthetic
+users, then runs concurrent user-scoped queries (same shape as the
+engine's retrieval) and reports throughput and latency percentiles.
+
+Compare 1 node vs the 3-node cluster from docker-compose.qdrant-cluster.yml:
+    python scripts/bench_qdrant_sharding.py --port 6333 --shards 1
+    python scripts/bench_qdrant_sharding.py --port 7333 --shards 3
+    python scripts/bench_qdrant_sharding.py --port 7333 --sharding custom --shards 1 --buckets 3
+"""
+
+import argparse
+import random
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+COLLECTION = "bench_sharding"
+DIM = 1024
+
+
+def shard_key(user_id: str, buckets: int) -> str:
+    # Same mapping as DecisionEngine._shard_key
+    return f"users-{zlib.crc32(user_id.encode('utf-8')) % buckets}"
+
+
+def setup(client: QdrantClient, args, users):
+    if client.collection_exists(COLLECTION):
+        client.delete_collection(COLLECTION)
+
+    custom = args.sharding == "custom"
+    client.create_collection(
+        collection_name=COLLECTION,
+        vectors_config={"dense": models.VectorParams(size=DIM, distance=models.Distance.COSINE)},
+        sharding_method=models.ShardingMethod.CUSTOM if custom else models.ShardingMethod.AUTO,
+        shard_number=None if custom else args.shards,
+        replication_factor=args.replication,
+    )
+    if custom:
+        for bucket in range(args.buckets):
+            client.create_shard_key(COLLECTION, f"users-{bucket}", shards_number=args.shards)
+    client.create_payload_index(COLLECTION, "user_id", models.PayloadSchemaType.KEYWORD)
+
+    print(f"Loading {args.points} points for {len(users)} users...")
+    rng = np.random.default_rng(0)
+    batch = []
+    for i in range(args.points):
+        user_id = users[i % len(users)]
+        batch.append((user_id, models.PointStruct(
+            id=str(uuid.uuid4()),
+            vector={"dense": rng.normal(size=DIM).astype(np.float32).tolist()},
+            payload={"user_id": user_id, "canonical_text": f"decision {i}"},
+        )))
+        if len(batch) == 256 or i == args.points - 1:
+            if custom:
+                # Custom sharding requires one upsert per shard key
+                by_key = {}
+                for uid, point in batch:
+                    by_key.setdefault(shard_key(uid, args.buckets), []).append(point)
+                for key, points in by_key.items():
+                    client.upsert(COLLECTION, points=points, shard_key_selector=key)
+            else:
+                client.upsert(COLLECTION, points=[p for _, p in batch])
+            batch = []
+
+
+def run_query(client: QdrantClient, args, user_id: str) -> float:
+    vector = np.random.default_rng().normal(size=DIM).astype(np.float32).tolist()
+    start = time.perf_counter()
+    client.query_points(
+        COLLECTION,
+        query=vector,
+        using="dense",
+        query_filter=models.Filter(must=[
+            models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))
+        ]),
+        limit=3,
+        shard_key_selector=shard_key(user_id, args.buckets) if args.sharding == "custom" else None,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--sharding", choices=["auto", "custom"], default="auto")
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--replication", type=int, default=1)
+    parser.add_argument("--buckets", type=int, default=3)
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    args = parser.parse_args()
+
+    client = QdrantClient(host=args.host, port=args.port, timeout=60)
+    users = [str(uuid.uuid4()) for _ in range(args.users)]
+    setup(client, args, users)
+
+    print(f"Querying for {args.duration:.0f}s with concurrency {args.concurrency}...")
+    latencies = []
+    deadline = time.perf_counter() + args.duration
+
+    def worker():
+        local = []
+        while time.perf_counter() < deadline:
+            local.append(run_query(client, args, random.choice(users)))
+        return local
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for result in pool.map(lambda _: worker(), range(args.concurrency)):
+            latencies.extend(result)
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    print("=" * 60)
+    print(f"sharding={args.sharding} shards={args.shards} replication={args.replication} port={args.port}")
+    print(f"Queries:    {len(latencies)}")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} q/s")
+    print(f"Latency:    p50={np.percentile(latencies_ms, 50):.1f}ms "
+          f"p95={np.percentile(latencies_ms, 95):.1f}ms p99={np.percentile(latencies_ms, 99):.1f}ms")
+
+    client.delete_collection(COLLECTION)
+
+
+if __name__ == "__main__":
+    main()
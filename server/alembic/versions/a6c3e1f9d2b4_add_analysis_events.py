@@ -0,0 +1,42 @@
+"""add_analysis_events
+
+Revision ID: a6c3e1f9d2b4
+Revises: f2b8d6a4c1e7
+Create Date: 2026-10-19 22:03:51.207315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c3e1f9d2b4'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d6a4c1e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'analysis_events',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('decision_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('event', sa.String(), nullable=False),
+        sa.Column('data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['decision_id'], ['decisions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_events_decision_id'), 'analysis_events', ['decision_id'], unique=False)
+    op.create_index(op.f('ix_analysis_events_created_at'), 'analysis_events', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_analysis_events_created_at'), table_name='analysis_events')
+    op.drop_index(op.f('ix_analysis_events_decision_id'), table_name='analysis_events')
+    op.drop_table('analysis_events')
@@ -0,0 +1,28 @@
+"""add_stage_checkpoints_to_decisions
+
+Revision ID: b8e3d5a2c6f4
+Revises: f2b9c4d7e1a5
+Create Date: 2026-10-19 16:05:41.208377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e3d5a2c6f4'
+down_revision: Union[str, Sequence[str], None] = 'f2b9c4d7e1a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('decisions', sa.Column('stage_checkpoints', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('decisions', 'stage_checkpoints')
@@ -0,0 +1,28 @@
+"""add_stage_timeline_to_decisions
+
+Revision ID: c5d2e8f1a9b3
+Revises: a3f1c9d2e7b4
+Create Date: 2026-10-19 12:40:05.532190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8f1a9b3'
+down_revision: Union[str, Sequence[str], None] = 'a3f1c9d2e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('decisions', sa.Column('stage_timeline', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('decisions', 'stage_timeline')
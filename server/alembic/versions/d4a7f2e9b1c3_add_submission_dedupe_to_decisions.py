@@ -0,0 +1,34 @@
+"""add_submission_dedupe_to_decisions
+
+Revision ID: d4a7f2e9b1c3
+Revises: b8e3d5a2c6f4
+Create Date: 2026-10-19 17:21:54.930164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7f2e9b1c3'
+down_revision: Union[str, Sequence[str], None] = 'b8e3d5a2c6f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('decisions', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('decisions', sa.Column('idempotency_key', sa.String(length=255), nullable=True))
+    op.create_index('ix_decisions_user_content_hash', 'decisions', ['user_id', 'content_hash'], unique=False)
+    op.create_index('ux_decisions_user_idempotency_key', 'decisions', ['user_id', 'idempotency_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ux_decisions_user_idempotency_key', table_name='decisions')
+    op.drop_index('ix_decisions_user_content_hash', table_name='decisions')
+    op.drop_column('decisions', 'idempotency_key')
+    op.drop_column('decisions', 'content_hash')
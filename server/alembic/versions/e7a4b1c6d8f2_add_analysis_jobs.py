@@ -0,0 +1,52 @@
+"""add_analysis_jobs
+
+Revision ID: e7a4b1c6d8f2
+Revises: c5d2e8f1a9b3
+Create Date: 2026-10-19 14:05:47.118903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a4b1c6d8f2'
+down_revision: Union[str, Sequence[str], None] = 'c5d2e8f1a9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'analysis_jobs',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('decision_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False, server_default='queued'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('max_attempts', sa.Integer(), nullable=False, server_default='3'),
+        sa.Column('run_after', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('leased_by', sa.String(), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['decision_id'], ['decisions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_analysis_jobs_decision_id'), 'analysis_jobs', ['decision_id'], unique=False)
+    op.create_index(op.f('ix_analysis_jobs_user_id'), 'analysis_jobs', ['user_id'], unique=False)
+    op.create_index('ix_analysis_jobs_claim', 'analysis_jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_jobs_claim', table_name='analysis_jobs')
+    op.drop_index(op.f('ix_analysis_jobs_user_id'), table_name='analysis_jobs')
+    op.drop_index(op.f('ix_analysis_jobs_decision_id'), table_name='analysis_jobs')
+    op.drop_table('analysis_jobs')
@@ -0,0 +1,35 @@
+"""add_batch_id_to_decisions_and_jobs
+
+Revision ID: e9c3a7f5b2d8
+Revises: d4a7f2e9b1c3
+Create Date: 2026-10-19 19:02:37.418256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9c3a7f5b2d8'
+down_revision: Union[str, Sequence[str], None] = 'd4a7f2e9b1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('decisions', sa.Column('batch_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_index('ix_decisions_batch_id', 'decisions', ['batch_id'], unique=False)
+    op.add_column('analysis_jobs', sa.Column('batch_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_index('ix_analysis_jobs_batch_claim', 'analysis_jobs', ['batch_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_jobs_batch_claim', table_name='analysis_jobs')
+    op.drop_column('analysis_jobs', 'batch_id')
+    op.drop_index('ix_decisions_batch_id', table_name='decisions')
+    op.drop_column('decisions', 'batch_id')
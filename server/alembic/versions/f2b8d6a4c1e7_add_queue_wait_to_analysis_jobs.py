@@ -0,0 +1,30 @@
+"""add_queue_wait_to_analysis_jobs
+
+Revision ID: f2b8d6a4c1e7
+Revises: e9c3a7f5b2d8
+Create Date: 2026-10-19 21:14:08.531902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d6a4c1e7'
+down_revision: Union[str, Sequence[str], None] = 'e9c3a7f5b2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_jobs', sa.Column('queue_wait_seconds', sa.Float(), nullable=True))
+    op.create_index('ix_analysis_jobs_updated_at', 'analysis_jobs', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_jobs_updated_at', table_name='analysis_jobs')
+    op.drop_column('analysis_jobs', 'queue_wait_seconds')
@@ -0,0 +1,38 @@
+"""add_fair_queuing_to_analysis_jobs
+
+Revision ID: f2b9c4d7e1a5
+Revises: e7a4b1c6d8f2
+Create Date: 2026-10-19 15:32:10.674512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b9c4d7e1a5'
+down_revision: Union[str, Sequence[str], None] = 'e7a4b1c6d8f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('analysis_jobs', sa.Column('priority', sa.String(), nullable=False, server_default='interactive'))
+    op.add_column('analysis_jobs', sa.Column('cost', sa.Float(), nullable=False, server_default='1.0'))
+    op.add_column('analysis_jobs', sa.Column('virtual_start', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('analysis_jobs', sa.Column('virtual_finish', sa.Float(), nullable=False, server_default='0'))
+    op.drop_index('ix_analysis_jobs_claim', table_name='analysis_jobs')
+    op.create_index('ix_analysis_jobs_claim', 'analysis_jobs', ['status', 'virtual_finish'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_analysis_jobs_claim', table_name='analysis_jobs')
+    op.create_index('ix_analysis_jobs_claim', 'analysis_jobs', ['status', 'run_after'], unique=False)
+    op.drop_column('analysis_jobs', 'virtual_finish')
+    op.drop_column('analysis_jobs', 'virtual_start')
+    op.drop_column('analysis_jobs', 'cost')
+    op.drop_column('analysis_jobs', 'priority')
@@ -1,14 +1,29 @@
-from fastapi import APIRouter, HTTPException, status, BackgroundTasks, Depends, Request
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
+from typing import Dict, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import json
 import logging
+import uuid
 
-from server.db.database import get_db
-from server.schemas.decision import DecisionCreate, AnalysisResponse
+from server.core.config import config
+from server.db.database import SessionLocal, get_db
+from server.schemas.decision import ArgumentChanges, BatchAnalysisCreate, DecisionCreate, AnalysisResponse
 from server.services.orchestrator import get_orchestrator
 from server.repositories.decision_repository import DecisionRepository
+from server.repositories.job_repository import JobRepository
 from server.services.decision_service import get_decision_service
 from server.core.auth import get_current_user
+from server.services.analysis_events import TERMINAL_EVENTS, analysis_events
+from server.services.job_scheduler import estimate_cost, estimate_edit_cost
+from server.services.admission import AdmissionRejected, check_admission, estimated_capacity, shared_job_timing
+from server.services.llm_batch import decision_from_model
+from server.services.idempotency import MAX_KEY_LENGTH, content_hash, dedupe_checks
+from server.services.argument_edits import apply_changes, carry_over_checkpoints, diff_arguments
+from server.services.llm_service import build_ml_input
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -17,29 +32,54 @@ logger = logging.getLogger(__name__)
 @router.post("/analyze", status_code=status.HTTP_202_ACCEPTED)
 async def analyze_decision(
     request: Request,
+    response: Response,
     decision: DecisionCreate,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    user_id: UUID = Depends(get_current_user)
+    user_id: UUID = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH)
 ):
     """
     Start decision analysis in background.
     Returns the decision_id immediately.
 
+    The analysis is a durable job (survives restarts), run by whichever
+    worker claims it first (API-process threads or `python -m server.worker`).
+    When the user has too many analyses in progress (429) or the queue is
+    overloaded (503), nothing is stored and Retry-After says when to retry.
+
+    Resubmissions (same Idempotency-Key header, or the same content within
+    IDEMPOTENCY_WINDOW_SECONDS) return the existing decision and its status
+    with `Idempotent-Replayed: true`; nothing new is stored or queued.
+
     Requires authentication (MVP: hardcoded user, Future: JWT from auth-api)
     """
+    repo = DecisionRepository(db)
+    digest = content_hash(decision)
+    repo.lock_submissions(user_id)  # Held until the decision is committed
+    existing = find_duplicate(repo, user_id, idempotency_key, digest)
+    if existing is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return {
+            "decision_id": existing.id,
+            "status": existing.analysis_status,
+            "message": "Duplicate submission, returning the existing analysis"
+        }
+    
+    jobs = JobRepository(db)
+    admit(jobs, user_id)
+    
     try:
-        # 1. Create decision in DB with user_id
+        # 1. Create decision in DB with user_id (not committed yet)
         service = get_decision_service(db)
-        db_decision = service.create_new_decision(decision, user_id)
+        db_decision = service.create_new_decision(
+            decision, user_id, content_hash=digest, idempotency_key=idempotency_key, commit=False
+        )
         
-        # 2. Start background orchestration
-        orchestrator = get_orchestrator()
-        background_tasks.add_task(
-            orchestrator.run_background_analysis, 
-            db, 
-            db_decision.id, 
-            decision
+        # 2. Queue the analysis job, committing it together with the decision
+        #    (a decision is never left pending without a job)
+        jobs.enqueue(
+            db_decision.id, user_id, decision.dict(), config.QUEUE_MAX_ATTEMPTS,
+            priority="interactive", cost=estimate_cost(decision)
         )
         
         return {
@@ -48,6 +88,7 @@ async def analyze_decision(
             "message": "Analysis started in background"
         }
     except Exception as e:
+        db.rollback()
         logger.error(f"Failed to start analysis: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -55,6 +96,301 @@ async def analyze_decision(
         )
 
 
+@router.post("/batch", status_code=status.HTTP_202_ACCEPTED)
+async def analyze_batch(
+    batch: BatchAnalysisCreate,
+    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user)
+):
+    """
+    Start analyses of many decisions as one batch.
+    Returns the batch_id and the decision IDs (in input order) immediately.
+
+    All decisions are inserted at once and queued as low-priority batch
+    jobs. Workers claim them in groups (BATCH_CLAIM_SIZE): ML scoring runs
+    as one cross-encoder pass and retrieval as one embedding call and one
+    Qdrant round trip for the whole group, then the LLM analyses run
+    BATCH_LLM_CONCURRENCY at a time. Progress: GET /analysis/batch/{batch_id}.
+
+    Submissions are not deduplicated. Admission counts the whole batch
+    against the user's batch jobs only (ADMISSION_MAX_BATCH_JOBS_PER_USER),
+    so a running batch does not block interactive analyses. Its summed cost
+    is added to the estimated queue wait, so a batch that would push the
+    wait past the limit is rejected (503).
+    """
+    if len(batch.decisions) > config.BATCH_MAX_DECISIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {config.BATCH_MAX_DECISIONS} decisions per batch"
+        )
+
+    jobs = JobRepository(db)
+    costs = [estimate_cost(decision) for decision in batch.decisions]
+    admit(jobs, user_id, "batch", incoming=(len(costs), sum(costs)))
+
+    batch_id = uuid.uuid4()
+    try:
+        decision_ids = DecisionRepository(db).create_many(
+            batch.decisions, user_id, batch_id, [content_hash(decision) for decision in batch.decisions]
+        )
+        jobs.enqueue_many(
+            [
+                (decision_id, decision.dict(), cost)
+                for decision_id, decision, cost in zip(decision_ids, batch.decisions, costs)
+            ],
+            user_id, config.QUEUE_MAX_ATTEMPTS, priority="batch", batch_id=batch_id
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to start batch analysis: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start batch analysis: {str(e)}"
+        )
+
+    return {
+        "batch_id": batch_id,
+        "decision_ids": decision_ids,
+        "total": len(decision_ids),
+        "status": "pending",
+        "message": "Batch analysis started in background"
+    }
+
+
+@router.get("/batch/{batch_id}")
+async def get_batch_status(
+    batch_id: UUID,
+    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user)
+):
+    """
+    Aggregate progress of a bulk submission.
+
+    `progress` is the share of decisions whose analysis finished
+    (completed or failed); per-decision statuses are listed as well.
+    """
+    statuses = DecisionRepository(db).batch_statuses(user_id, batch_id)
+    if not statuses:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    counts: Dict[str, int] = {}
+    for _, analysis_status in statuses:
+        counts[analysis_status] = counts.get(analysis_status, 0) + 1
+    finished = counts.get("completed", 0) + counts.get("failed", 0)
+    return {
+        "batch_id": batch_id,
+        "total": len(statuses),
+        "counts": counts,
+        "progress": round(finished / len(statuses), 4),
+        "status": "completed" if finished == len(statuses) else "processing",
+        "decisions": [
+            {"decision_id": decision_id, "status": analysis_status}
+            for decision_id, analysis_status in statuses
+        ]
+    }
+
+
+@router.post("/{decision_id}/retry", status_code=status.HTTP_202_ACCEPTED)
+async def retry_analysis(
+    decision_id: UUID,
+    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user)
+):
+    """
+    Retry a failed analysis.
+    
+    The new job resumes after the stages the failed one finished (their
+    outputs are checkpointed on the decision), so e.g. a failed LLM call
+    does not repeat ML scoring or retrieval. Decisions rejected for
+    insufficient arguments are not retried (409): the same input fails again.
+    """
+    repo = DecisionRepository(db)
+    repo.lock_submissions(user_id)  # Concurrent retries of one decision cannot both queue a job
+    db_decision = repo.get_by_id(decision_id)
+    
+    if not db_decision:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    if db_decision.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if db_decision.analysis_status != "failed":
+        raise HTTPException(status_code=409, detail=f"Analysis is {db_decision.analysis_status}, only failed analyses can be retried")
+    if (db_decision.llm_analysis or {}).get("error") == "INSUFFICIENT_DATA":
+        raise HTTPException(status_code=409, detail="Arguments failed validation, retrying would fail again")
+    
+    jobs = JobRepository(db)
+    admit(jobs, user_id)
+    
+    decision = decision_from_model(db_decision)
+    resumed_stages = sorted(db_decision.stage_checkpoints or {})
+    try:
+        # Committed together with the job, so a retry is never left pending without one
+        repo.update_analysis(decision_id, status="pending", commit=False)
+        analysis_events.reset(decision_id)
+        jobs.enqueue(
+            decision_id, user_id, decision.dict(), config.QUEUE_MAX_ATTEMPTS,
+            priority="interactive", cost=estimate_cost(decision)
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to start analysis retry: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start analysis retry: {str(e)}"
+        )
+    return {
+        "decision_id": decision_id,
+        "status": "pending",
+        "resumed_stages": resumed_stages,
+        "message": "Analysis retry started in background"
+    }
+
+
+@router.patch("/{decision_id}/arguments", status_code=status.HTTP_202_ACCEPTED)
+async def edit_arguments(
+    decision_id: UUID,
+    changes: ArgumentChanges,
+    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user)
+):
+    """
+    Add, edit or remove arguments of a decision and re-analyze it.
+    
+    The re-analysis only redoes what the edit touched: pairs with new
+    arguments, retrieval for changed variants and the LLM sections of
+    changed variants, given the previous analysis and the changes (see
+    argument_edits.py). Analyses in progress cannot be edited (409); an
+    edit leaving invalid arguments is rejected as a whole (422).
+    """
+    repo = DecisionRepository(db)
+    repo.lock_submissions(user_id)  # Concurrent edits of one decision cannot both queue a job
+    db_decision = repo.get_by_id(decision_id)
+    
+    if not db_decision:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    if db_decision.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    if db_decision.analysis_status not in ["completed", "failed"]:
+        raise HTTPException(status_code=409, detail=f"Analysis is {db_decision.analysis_status}, edit it once it finished")
+    
+    current = decision_from_model(db_decision)
+    rows = [
+        {"id": a.id, "variant_name": a.variant_name, "type": a.type, "text": a.text}
+        for a in db_decision.arguments
+    ]
+    try:
+        arguments = apply_changes(rows, changes)
+        decision = DecisionCreate(
+            context=current.context,
+            variants=current.variants,
+            selected_variant=db_decision.selected_variant,
+            arguments=[{k: arg[k] for k in ("variant_name", "type", "text")} for arg in arguments]
+        )
+    except ValueError as e:  # Includes pydantic validation errors
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    analyzed, edited = build_ml_input(current), build_ml_input(decision)
+    diff = diff_arguments(analyzed, edited)
+    if not diff["variants"]:
+        return {
+            "decision_id": decision_id,
+            "status": db_decision.analysis_status,
+            "changed_variants": [],
+            "message": "Arguments unchanged, nothing to re-analyze"
+        }
+    
+    jobs = JobRepository(db)
+    admit(jobs, user_id)
+    
+    # Diff base of the re-analysis: the last completed analysis (kept across failed re-analyses)
+    checkpoints = db_decision.stage_checkpoints or {}
+    edit = checkpoints.get("edit")
+    if db_decision.analysis_status == "completed":
+        edit = {"analysis": db_decision.llm_analysis, "arguments": analyzed}
+    try:
+        # Committed together with the job, so an edit is never left pending without one
+        repo.update_arguments(
+            db_decision, arguments, content_hash(decision),
+            carry_over_checkpoints(checkpoints, edited, diff["variants"], edit), commit=False
+        )
+        analysis_events.reset(decision_id)
+        jobs.enqueue(
+            decision_id, user_id, decision.dict(), config.QUEUE_MAX_ATTEMPTS,
+            priority="interactive", cost=estimate_edit_cost(decision, diff)
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to start re-analysis: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start re-analysis: {str(e)}"
+        )
+    return {
+        "decision_id": decision_id,
+        "status": "pending",
+        "changed_variants": diff["variants"],
+        "message": "Re-analysis started in background"
+    }
+
+
+def find_duplicate(
+    repo: DecisionRepository,
+    user_id: UUID,
+    idempotency_key: Optional[str],
+    digest: str
+):
+    """Decision created by an earlier submission of the same request, if any."""
+    if idempotency_key:
+        existing = repo.get_by_idempotency_key(user_id, idempotency_key)
+        if existing is not None:
+            if existing.content_hash != digest:
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used for a different decision"
+                )
+            dedupe_checks.inc(outcome="key_hit")
+            return existing
+    if config.IDEMPOTENCY_WINDOW_SECONDS > 0:
+        since = datetime.utcnow() - timedelta(seconds=config.IDEMPOTENCY_WINDOW_SECONDS)
+        existing = repo.find_recent_duplicate(user_id, digest, since)
+        if existing is not None:
+            dedupe_checks.inc(outcome="content_hit")
+            return existing
+    dedupe_checks.inc(outcome="miss")
+    return None
+
+
+def admit(
+    jobs: JobRepository,
+    user_id: UUID,
+    priority: str = "interactive",
+    incoming: Tuple[int, float] = (1, 0.0)
+):
+    """
+    Admission check for new analysis jobs (429/503 with Retry-After when
+    rejected). The per-user limit counts the user's jobs of the same
+    priority class, so a bulk submission does not block interactive ones;
+    batch jobs have their own, larger limit.
+    """
+    if not config.ADMISSION_ENABLED:
+        return
+    max_user_jobs = config.ADMISSION_MAX_BATCH_JOBS_PER_USER if priority == "batch" else None
+    # Stages run in the workers, so their durations come from the database, not this process
+    medians, unit_seconds = shared_job_timing(
+        lambda: DecisionRepository(jobs.db).recent_job_timings(config.ADMISSION_TIMELINE_SAMPLE)
+    )
+    try:
+        check_admission(
+            jobs.backlog(), jobs.backlog(user_id, priority), capacity=estimated_capacity(medians),
+            incoming=incoming, max_user_jobs=max_user_jobs, unit_seconds=unit_seconds
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
 @router.get("/{decision_id}/status")
 async def get_analysis_status(
     decision_id: UUID, 
@@ -83,10 +419,81 @@ async def get_analysis_status(
             "ml_scores": db_decision.ml_scores,
             "llm_analysis": db_decision.llm_analysis,
             "retrieved_context": db_decision.retrieved_context
-        } if db_decision.analysis_status in ["completed", "failed"] else None
+        } if db_decision.analysis_status in ["completed", "failed"] else None,
+        "timeline": db_decision.stage_timeline
     }
 
 
+@router.get("/{decision_id}/stream")
+async def stream_analysis(
+    decision_id: UUID,
+    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user)
+):
+    """
+    Server-sent events with analysis progress.
+    
+    Events: `status`, `partial` ({path, value} for each completed LLM field),
+    then `completed` (full results) or `failed`.
+    
+    The analysis usually runs in a worker process: its events are then read
+    from the database (QUEUE_SHARED_EVENTS). Without stored events only the
+    final `completed` / `failed` event is sent, from the decision itself.
+    """
+    repo = DecisionRepository(db)
+    db_decision = repo.get_by_id(decision_id)
+    
+    if not db_decision:
+        raise HTTPException(status_code=404, detail="Decision not found")
+    if db_decision.user_id != user_id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    def load_decision():
+        session = SessionLocal()
+        try:
+            return DecisionRepository(session).get_by_id(decision_id)
+        finally:
+            session.close()
+    
+    def format_event(event: str, data) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    
+    async def event_stream():
+        # Jobs run on any worker: follow in-process events if this instance runs it,
+        # otherwise the events other processes stored, until the analysis finishes
+        decision = db_decision
+        last_id = 0
+        while True:
+            if last_id == 0 and analysis_events.has_stream(decision_id):
+                async for event, data in analysis_events.subscribe(decision_id):
+                    yield format_event(event, data)
+                return
+            stored = await asyncio.to_thread(analysis_events.fetch_shared, decision_id, last_id)
+            for last_id, event, data in stored:
+                yield format_event(event, data)
+                if event in TERMINAL_EVENTS:
+                    return
+            if decision is None:
+                yield format_event("failed", {"error": "ANALYSIS_FAILED", "message": "Decision was deleted"})
+                return
+            # Finished before anyone subscribed, or its events were not stored: send final state
+            if not stored and decision.analysis_status in ["completed", "failed"]:
+                yield format_event(decision.analysis_status, {
+                    "ml_scores": decision.ml_scores,
+                    "llm_analysis": decision.llm_analysis,
+                    "retrieved_context": decision.retrieved_context
+                })
+                return
+            await asyncio.sleep(config.QUEUE_POLL_SECONDS)
+            decision = await asyncio.to_thread(load_decision)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/health")
 async def health_check():
     """Check if analysis service is ready."""
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
+from datetime import datetime
 
 from server.db.database import get_db
 from server.schemas.decision import DecisionResponse, DecisionUpdateOutcome
 from server.services.decision_service import DecisionService, get_decision_service
 from server.core.auth import get_current_user
+from server.services.orchestrator import get_orchestrator
 
 router = APIRouter()
 
@@ -35,3 +37,13 @@ def update_outcome(
     if decision is None:
         raise HTTPException(status_code=404, detail="Decision not found")
     return decision
+
+@router.delete("/")
+def purge_history(
+    before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    user_id: UUID = Depends(get_current_user)
+):
+    """Delete user's whole archive, or only decisions older than `before`."""
+    deleted = get_orchestrator().purge_decisions(db, user_id, before=before)
+    return {"deleted": deleted}
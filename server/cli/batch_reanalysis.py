@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Re-analyze stored decisions through the OpenAI Batch API.
+
+Usage:
+    python -m server.cli.batch_reanalysis submit [--user-id UUID] [--before 2026-01-01] [--limit N]
+    python -m server.cli.batch_reanalysis status --batch-id batch_abc
+    python -m server.cli.batch_reanalysis collect --batch-id batch_abc [--wait]
+    python -m server.cli.batch_reanalysis run [--user-id UUID] [--before ...] [--limit N]
+"""
+
+import argparse
+import logging
+from datetime import datetime
+from uuid import UUID
+
+from server.core.config import config
+from server.db.database import SessionLocal
+from server.repositories.decision_repository import DecisionRepository
+from server.services.llm_batch import BatchReanalysis, OpenAIBatchClient, TERMINAL_STATUSES, wait_for_batch
+from server.services.llm_service import get_llm_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("submit", "Write requests and create a batch"), ("run", "Submit, wait and collect")):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument("--user-id", type=UUID, help="Only this user's decisions")
+        command.add_argument("--before", type=datetime.fromisoformat, help="Only decisions older than this")
+        command.add_argument("--limit", type=int, default=50000, help="Max decisions (Batch API limit: 50000)")
+
+    status = subparsers.add_parser("status", help="Show batch status")
+    status.add_argument("--batch-id", required=True)
+
+    collect = subparsers.add_parser("collect", help="Write results of a finished batch to the database")
+    collect.add_argument("--batch-id", required=True)
+    collect.add_argument("--wait", action="store_true", help="Poll until the batch finishes")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    client = OpenAIBatchClient()
+    if args.command == "status":
+        batch = client.retrieve(args.batch_id)
+        print(f"{batch['id']}: {batch['status']} {batch.get('request_counts')}")
+        return
+
+    db = SessionLocal()
+    try:
+        pipeline = BatchReanalysis(DecisionRepository(db), get_llm_service(), client)
+        if args.command in ("submit", "run"):
+            batch = pipeline.submit(user_id=args.user_id, before=args.before, limit=args.limit)
+            if not batch:
+                print("Nothing to re-analyze")
+                return
+            print(f"✅ Batch submitted: {batch['id']}")
+            if args.command == "submit":
+                return
+            batch = wait_for_batch(client, batch["id"], poll_seconds=config.LLM_BATCH_POLL_SECONDS)
+        else:
+            batch = client.retrieve(args.batch_id)
+            if args.wait:
+                batch = wait_for_batch(client, args.batch_id, poll_seconds=config.LLM_BATCH_POLL_SECONDS)
+
+        if batch["status"] not in TERMINAL_STATUSES:
+            print(f"Batch {batch['id']} is still {batch['status']}, collect later")
+            return
+        stats = pipeline.collect(batch)
+        print(f"✅ Batch {batch['id']} ({batch['status']}): {stats['updated']} updated, {stats['failed']} failed")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
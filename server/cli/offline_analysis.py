@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Run the analysis pipeline over a JSONL file of decisions (no API, no database).
+
+Usage:
+    python -m server.cli.offline_analysis --input decisions.jsonl --output results.jsonl [--workers 8]
+    python -m server.cli.offline_analysis --input decisions.jsonl --output results.jsonl --resume
+    python -m server.cli.offline_analysis --input decisions.jsonl --output shard0.jsonl --shard 0/4
+    python -m server.cli.offline_analysis --input decisions.jsonl --output bench.jsonl --stub llm,rag
+
+Each input line is a DecisionCreate object with optional "id" and "user_id"
+(scopes retrieval to that user's archive). Lines without a user_id get no
+retrieved context unless --cross-user-retrieval searches the whole archive.
+Use --input - to read stdin.
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Dict, List
+
+from server.core.config import config
+from server.core.metrics import percentile
+from server.services.offline_runner import (
+    STUBBABLE_STAGES, OfflineRunner, finished_ids, open_output, parse_shard, read_records, select_records
+)
+
+
+def shard_arg(value: str):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def stubs_arg(value: str) -> List[str]:
+    stubs = [stage.strip() for stage in value.split(",") if stage.strip()]
+    unknown = sorted(set(stubs) - set(STUBBABLE_STAGES))
+    if unknown:
+        raise argparse.ArgumentTypeError(f"Unknown stages {unknown}, choose from {', '.join(STUBBABLE_STAGES)}")
+    return stubs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", required=True, help="JSONL file of decisions ('-' for stdin)")
+    parser.add_argument("--output", required=True, help="JSONL file of results")
+    parser.add_argument("--workers", type=int, default=4, help="Decisions in flight at once")
+    parser.add_argument("--resume", action="store_true", help="Append to --output, skipping decisions it already has")
+    parser.add_argument("--shard", type=shard_arg, help="Only shard i of N (i/N, by decision ID)")
+    parser.add_argument(
+        "--cross-user-retrieval", action="store_true",
+        help="Retrieve context from all users' decisions for lines without a user_id"
+    )
+    parser.add_argument("--stub", type=stubs_arg, default=[], help=f"Stages to fake: {','.join(STUBBABLE_STAGES)}")
+    parser.add_argument("--cross-encoder-concurrency", type=int, help="Override STAGE_CROSS_ENCODER_CONCURRENCY")
+    parser.add_argument("--embedding-concurrency", type=int, help="Override STAGE_EMBEDDING_CONCURRENCY")
+    parser.add_argument("--llm-concurrency", type=int, help="Override STAGE_LLM_CONCURRENCY")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    # Stage slots are created on first use, so overrides apply to the whole run
+    for option, setting in (
+        ("cross_encoder_concurrency", "STAGE_CROSS_ENCODER_CONCURRENCY"),
+        ("embedding_concurrency", "STAGE_EMBEDDING_CONCURRENCY"),
+        ("llm_concurrency", "STAGE_LLM_CONCURRENCY"),
+    ):
+        if getattr(args, option) is not None:
+            setattr(config, setting, getattr(args, option))
+
+    skipped: Dict[str, int] = {}
+    counts: Dict[str, int] = {}
+    durations: Dict[str, List[float]] = {}
+    done = finished_ids(args.output) if args.resume else set()
+    runner = OfflineRunner(stubs=args.stub, cross_user_retrieval=args.cross_user_retrieval)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        with open_output(args.output, append=args.resume) as out:
+            records = select_records(read_records(source), shard=args.shard, skip=done, stats=skipped)
+            for result in runner.run(records, workers=args.workers):
+                out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                out.flush()
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                for entry in result.get("timeline", []):
+                    if entry.get("status") == "ok":
+                        durations.setdefault(entry["stage"], []).append(entry["duration_ms"])
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(counts.values())
+    print(
+        f"✅ {total} decisions in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.2f}/s): "
+        + ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        + (f"; skipped {skipped}" if skipped else "")
+    )
+    for stage, values in durations.items():
+        stubbed = " (stub)" if stage in args.stub else ""
+        print(
+            f"  {stage}{stubbed}: p50 {percentile(values, 50):.1f}ms, "
+            f"p95 {percentile(values, 95):.1f}ms over {len(values)} runs"
+        )
+
+
+if __name__ == "__main__":
+    main()
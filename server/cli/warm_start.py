@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Create or restore warm-start bundles (Qdrant snapshot + local caches).
+
+Usage:
+    python -m server.cli.warm_start create --out ./bundles/2026-10-19
+    python -m server.cli.warm_start restore --bundle ./bundles/2026-10-19
+"""
+
+import argparse
+import logging
+
+from qdrant_client import QdrantClient
+
+from server.core.config import config
+from server.services import warm_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    create = subparsers.add_parser("create", help="Snapshot collection and caches into a bundle")
+    create.add_argument("--out", required=True, help="Bundle directory")
+
+    restore = subparsers.add_parser("restore", help="Restore collection and caches from a bundle")
+    restore.add_argument("--bundle", required=True, help="Bundle directory")
+    restore.add_argument("--skip-collection", action="store_true", help="Only restore local caches")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    qdrant = QdrantClient(host=config.QDRANT_HOST, port=config.QDRANT_PORT)
+
+    if args.command == "create":
+        manifest = warm_start.create_bundle(qdrant, args.out)
+        print(f"✅ Bundle created: {args.out} ({manifest['points_count']} points)")
+    else:
+        if not args.skip_collection:
+            warm_start.restore_collection(qdrant, args.bundle)
+        warm_start.restore_caches(args.bundle)
+        print(f"✅ Bundle restored from {args.bundle}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,15 +11,109 @@ class Settings(BaseSettings):
     QDRANT_HOST: str = "localhost"
     QDRANT_PORT: int = 6333
     QDRANT_COLLECTION: str = "decisions"
+    QDRANT_SHARD_NUMBER: int = 1  # Shards per collection ("auto") or per shard key ("custom")
+    QDRANT_REPLICATION_FACTOR: int = 1
+    QDRANT_WRITE_CONSISTENCY_FACTOR: int = 1
+    QDRANT_SHARDING_METHOD: str = "auto"  # "auto" or "custom" (shard key derived from user_id)
+    QDRANT_SHARD_KEY_BUCKETS: int = 3  # Number of user shard keys in "custom" mode
     
     # Model Configs
     EMBEDDING_MODEL: str = "BAAI/bge-m3"
     RERANKER_MODEL: str = "BAAI/bge-reranker-base"
     CROSS_ENCODER_MODEL: str = "./models/aqm/best_model_v2"
     
+    # Local Caches & Warm Start
+    CACHE_DIR: str = "./.cache"
+    EMBEDDING_CACHE_SIZE: int = 50000
+    PAIR_SCORE_CACHE_SIZE: int = 200000
+    WARM_START_BUNDLE: str = ""  # Directory created by `python -m server.cli.warm_start create`
+    
     # LLM Configs
     OPENAI_API_KEY: str = ""
     LLM_MODEL: str = "gpt-4o-mini"
+    LLM_STREAMING: bool = True  # Stream partial results to /analysis/{id}/stream
+    LLM_FANOUT_ENABLED: bool = False  # One concurrent call per variant + one cross-variant call
+    LLM_CACHE_ENABLED: bool = True  # Exact-match response cache keyed by prompt
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_SIZE: int = 5000
+    LLM_PROMPT_MAX_TOKENS: int = 6000  # Ceiling for the user prompt
+    LLM_ARCHIVE_MAX_TOKENS: int = 2500  # Budget for retrieved archive entries
+    LLM_ARCHIVE_ENTRY_MAX_TOKENS: int = 400  # Longer entries are shortened first
+    LLM_COMPACT_OUTPUT: bool = True  # Short-key wire schema, expanded server-side
+    LLM_MAX_OUTPUT_TOKENS: int = 1500  # Completion budget per LLM call
+    
+    # LLM Backends (OpenAI-compatible endpoints, routed by latency / errors)
+    # JSON list of {"name", "model", "base_url", "api_key", "timeout"}; empty = OpenAI with LLM_MODEL
+    LLM_BACKENDS: str = ""
+    LLM_BACKEND_TIMEOUT_SECONDS: float = 60.0  # Default per-request timeout of a backend
+    LLM_BACKEND_EWMA_ALPHA: float = 0.3  # Weight of the newest latency / error sample
+    LLM_BACKEND_FAILURE_THRESHOLD: int = 3  # Consecutive failures before cooldown
+    LLM_BACKEND_COOLDOWN_SECONDS: float = 30.0
+    
+    # User Value Profile (verbatim value / goal statements sent instead of raw archive history)
+    LLM_PROFILE_ENABLED: bool = True
+    LLM_PROFILE_MAX_ENTRIES: int = 20  # Least mentioned / oldest entries are dropped beyond this
+    LLM_PROFILE_MAX_TOKENS: int = 800  # Prompt budget of the profile section
+    LLM_PROFILE_STATEMENTS_PER_DECISION: int = 3
+    
+    # LLM Batch Re-analysis (OpenAI Batch API)
+    LLM_BATCH_COMPLETION_WINDOW: str = "24h"
+    LLM_BATCH_POLL_SECONDS: float = 60.0
+    
+    # LLM resilience
+    LLM_ATTEMPT_TIMEOUT_SECONDS: float = 90.0  # Per attempt incl. backend failover (whole stream when streaming)
+    LLM_MAX_ATTEMPTS: int = 3  # Retries only on timeouts, connection errors, 429 and 5xx
+    LLM_RETRY_BACKOFF_SECONDS: float = 1.0  # Base of jittered exponential backoff
+    LLM_RETRY_BACKOFF_MAX_SECONDS: float = 10.0
+    LLM_HEDGING_ENABLED: bool = False  # Duplicate slow non-streaming requests, first response wins
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 2.0  # Hedge after max(this, observed p95 latency)
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Latency samples needed before hedging starts
+    
+    # Near-duplicate Reuse (skip LLM for resubmitted decisions)
+    REUSE_ENABLED: bool = True
+    REUSE_SIMILARITY_THRESHOLD: float = 0.97  # Cosine similarity of decision embeddings
+    REUSE_ARGUMENT_MATCH_RATIO: float = 0.9  # Per-argument text similarity after normalization
+    
+    # Analysis Job Queue (durable, Postgres-backed; separate workers: python -m server.worker)
+    QUEUE_INLINE_WORKERS: int = 1  # Worker threads inside each API process (0 = separate workers only)
+    QUEUE_LEASE_SECONDS: float = 120.0  # Job is claimable again if not heartbeated for this long
+    QUEUE_HEARTBEAT_SECONDS: float = 30.0
+    QUEUE_POLL_SECONDS: float = 1.0  # Idle workers look for new jobs this often
+    QUEUE_MAX_ATTEMPTS: int = 3
+    QUEUE_RETRY_BACKOFF_SECONDS: float = 10.0  # Base of jittered exponential backoff between attempts
+    QUEUE_RETRY_BACKOFF_MAX_SECONDS: float = 600.0
+    QUEUE_WAIT_WINDOW_SECONDS: float = 3600.0  # Claimed jobs whose queue wait /metrics reports
+    QUEUE_SHARED_EVENTS: bool = True  # Progress events also go to the database, so any API instance can stream them
+    # Weighted fair queuing per user; class weights = relative share of worker time when all classes wait
+    QUEUE_WEIGHT_INTERACTIVE: float = 8.0
+    QUEUE_WEIGHT_BATCH: float = 1.0
+    
+    # Bulk Analysis (POST /analysis/batch; stages run across the decisions a worker claims together)
+    BATCH_MAX_DECISIONS: int = 100  # Decisions per request
+    BATCH_CLAIM_SIZE: int = 16  # Jobs of one batch claimed together (one scoring pass, one retrieval round trip)
+    BATCH_LLM_CONCURRENCY: int = 4  # Decisions of a claimed group analyzed at once
+    
+    # Admission Control & Backpressure (429 / 503 with Retry-After instead of minutes-late analyses)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_ACTIVE_JOBS: int = 1000  # Queued + running jobs of all users (503 above)
+    ADMISSION_MAX_ACTIVE_JOBS_PER_USER: int = 20  # (429 above)
+    ADMISSION_MAX_BATCH_JOBS_PER_USER: int = 200  # Batch jobs of one user, incl. the new batch (429 above)
+    ADMISSION_MAX_WAIT_SECONDS: float = 300.0  # Estimated queue wait before rejecting (503)
+    ADMISSION_WORKER_SLOTS: int = 1  # Worker threads across all worker processes
+    ADMISSION_TIMELINE_SAMPLE: int = 200  # Recent analyses whose stage durations and costs estimate capacity
+    ADMISSION_TIMELINE_TTL_SECONDS: float = 30.0  # How long the API reuses those durations
+    # Per-process concurrency slots for in-flight stage work
+    STAGE_CROSS_ENCODER_CONCURRENCY: int = 2
+    STAGE_EMBEDDING_CONCURRENCY: int = 2
+    STAGE_LLM_CONCURRENCY: int = 8
+    
+    # Submission Deduplication (Idempotency-Key header, or same content from the same user)
+    IDEMPOTENCY_WINDOW_SECONDS: float = 600.0  # Same content within this window = same submission (0 = key only)
+    
+    # Analysis Deadline (latency SLO of one attempt; stages get a share, in-flight calls are cancelled)
+    ANALYSIS_DEADLINE_SECONDS: float = 120.0  # 0 = no deadline
+    # JSON {stage: share of the deadline}; time set aside for required stages, cap for optional ones
+    ANALYSIS_STAGE_BUDGETS: str = '{"validate": 0.05, "ml_scoring": 0.2, "rag": 0.1, "llm": 0.55, "index": 0.1}'
     
     # Auth Config (for future auth-api integration)
     JWT_SECRET_KEY: str = "dev-secret-key-change-in-production"  # TODO: Use same key as auth-api
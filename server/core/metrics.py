@@ -0,0 +1,137 @@
+"""
+In-process metrics (counters and histograms), exposed at GET /metrics.
+"""
+
+from typing import Dict, List, Optional, Tuple
+from collections import deque
+import threading
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey) -> str:
+    return ",".join(f"{k}={v}" for k, v in key) or "_"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0-100) of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class Counter:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {_format_labels(k): v for k, v in self._values.items()}
+
+
+class Histogram:
+    """
+    Observations with optional fixed buckets.
+
+    Percentiles are computed over a sliding window of the most recent
+    observations per label set.
+    """
+    WINDOW = 2000
+
+    def __init__(self, name: str, description: str, buckets: Optional[List[float]] = None):
+        self.name = name
+        self.description = description
+        self.buckets = sorted(buckets) if buckets else None
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, Dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {
+                    "count": 0,
+                    "sum": 0.0,
+                    "window": deque(maxlen=self.WINDOW),
+                    "buckets": [0] * (len(self.buckets) + 1) if self.buckets else None
+                }
+                self._series[key] = series
+            series["count"] += 1
+            series["sum"] += value
+            series["window"].append(value)
+            if self.buckets:
+                index = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+                series["buckets"][index] += 1
+
+    def percentiles(self, *qs: float, **labels) -> Dict[str, float]:
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            window = list(series["window"]) if series else []
+        if not window:
+            return {}
+        return {f"p{int(q)}": percentile(window, q) for q in qs}
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            result = {}
+            for key, series in self._series.items():
+                window = list(series["window"])
+                entry = {
+                    "count": series["count"],
+                    "sum": round(series["sum"], 6),
+                    "p50": percentile(window, 50),
+                    "p95": percentile(window, 95),
+                    "p99": percentile(window, 99),
+                }
+                if self.buckets:
+                    labels = [f"le_{b}" for b in self.buckets] + ["le_inf"]
+                    entry["buckets"] = dict(zip(labels, series["buckets"]))
+                result[_format_labels(key)] = entry
+            return result
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, description)
+            return self._metrics[name]
+
+    def histogram(self, name: str, description: str = "", buckets: Optional[List[float]] = None) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, description, buckets)
+            return self._metrics[name]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            m.name: {"description": m.description, "values": m.snapshot()}
+            for m in metrics
+        }
+
+
+# Singleton
+metrics = MetricsRegistry()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON, Integer, Index, Float
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -7,6 +7,11 @@ from .database import Base
 
 class DecisionModel(Base):
     __tablename__ = "decisions"
+    __table_args__ = (
+        Index("ix_decisions_user_content_hash", "user_id", "content_hash"),
+        Index("ux_decisions_user_idempotency_key", "user_id", "idempotency_key", unique=True),
+        Index("ix_decisions_batch_id", "batch_id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), nullable=False, index=True)  # Owner of this decision
@@ -21,6 +26,13 @@ class DecisionModel(Base):
     ml_scores = Column(JSON, nullable=True)
     llm_analysis = Column(JSON, nullable=True)
     retrieved_context = Column(JSON, nullable=True)
+    stage_timeline = Column(JSON, nullable=True)  # [{stage, status, start_ms, duration_ms[, error]}]
+    stage_checkpoints = Column(JSON, nullable=True)  # {stage: output} of finished stages, for resuming
+
+    # Submission deduplication (see services/idempotency.py)
+    content_hash = Column(String(64), nullable=True)  # Canonical DecisionCreate hash
+    idempotency_key = Column(String(255), nullable=True)  # Client-supplied Idempotency-Key header
+    batch_id = Column(UUID(as_uuid=True), nullable=True)  # Bulk submission (POST /analysis/batch)
 
     # Relationships
     variants = relationship("VariantModel", back_populates="decision", cascade="all, delete-orphan")
@@ -45,3 +57,49 @@ class ArgumentModel(Base):
     type = Column(String, nullable=False) # "pro" or "con"
 
     decision = relationship("DecisionModel", back_populates="arguments")
+
+class AnalysisEventModel(Base):
+    __tablename__ = "analysis_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Order of events of one decision
+    decision_id = Column(UUID(as_uuid=True), ForeignKey("decisions.id", ondelete="CASCADE"), nullable=False, index=True)
+    event = Column(String, nullable=False)  # status, partial, completed, failed
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # Old events are purged
+
+class UserProfileModel(Base):
+    __tablename__ = "user_value_profiles"
+
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    # [{kind, quote, decision_id, timestamp, mentions}], capped at LLM_PROFILE_MAX_ENTRIES
+    entries = Column(JSON, nullable=False, default=list)
+    decision_count = Column(Integer, nullable=False, default=0)  # Decisions folded into the digest
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class AnalysisJobModel(Base):
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        Index("ix_analysis_jobs_claim", "status", "virtual_finish"),
+        Index("ix_analysis_jobs_batch_claim", "batch_id", "status"),
+        Index("ix_analysis_jobs_updated_at", "updated_at"),  # Recent queue waits (/metrics)
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    decision_id = Column(UUID(as_uuid=True), ForeignKey("decisions.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    payload = Column(JSON, nullable=False)  # DecisionCreate input of the analysis
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    priority = Column(String, nullable=False, default="interactive")  # interactive, batch
+    batch_id = Column(UUID(as_uuid=True), nullable=True)  # Jobs of one bulk submission are claimed together
+    cost = Column(Float, nullable=False, default=1.0)  # Estimated from arguments, pairs and prompt size
+    virtual_start = Column(Float, nullable=False, default=0.0)  # Fair-queuing tags (lowest finish runs first)
+    virtual_finish = Column(Float, nullable=False, default=0.0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)  # Not claimed before (retry backoff)
+    queue_wait_seconds = Column(Float, nullable=True)  # Runnable -> claimed, of the last claim (None: reclaimed lease)
+    leased_by = Column(String, nullable=True)  # Worker ID holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)  # Extended by heartbeats; expired = claimable again
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
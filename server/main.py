@@ -5,12 +5,15 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import logging
 import json
+import threading
 import time
 from datetime import datetime
 
 from server.db.database import engine
 from server.db import models
 from server.api.routes import decisions, analysis
+from server.core.config import config
+from server.core.metrics import metrics
 
 # Configure structured logging
 logging.basicConfig(
@@ -50,6 +53,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Analysis workers inside the API process (QUEUE_INLINE_WORKERS=0: only `python -m server.worker` runs jobs)
+worker_stop = threading.Event()
+
+
+@app.on_event("startup")
+def start_inline_workers():
+    if config.QUEUE_INLINE_WORKERS > 0:
+        from server.worker import start_workers
+        start_workers(config.QUEUE_INLINE_WORKERS, worker_stop)
+        logger.info(f"✅ {config.QUEUE_INLINE_WORKERS} inline analysis worker(s) started")
+
+
+@app.on_event("shutdown")
+def stop_inline_workers():
+    worker_stop.set()
+
+
 # Routers
 app.include_router(decisions.router, prefix="/decisions", tags=["decisions"])
 app.include_router(analysis.router, prefix="/analysis", tags=["analysis"])
@@ -99,13 +119,56 @@ def detailed_health_check():
         health_status["services"]["ml_scoring"] = "ready"
         health_status["services"]["llm_service"] = "ready"
         health_status["services"]["rag_engine"] = "ready"
+        health_status["llm_backends"] = orchestrator.llm_service.backends.snapshot()
     except Exception as e:
         health_status["services"]["ai_services"] = f"unhealthy: {str(e)}"
         health_status["status"] = "degraded"
     
+    # Latency SLO (analysis deadline) and observed attempt latencies
+    from server.services.deadline import slo_status
+    health_status["analysis_slo"] = slo_status()
+    
+    # Share of analysis submissions deduplicated (double clicks, client retries)
+    from server.services.idempotency import hit_rate
+    health_status["submission_dedupe_hit_rate"] = hit_rate()
+    
+    # Job queue depth
+    try:
+        from server.db.database import SessionLocal
+        from server.repositories.job_repository import JobRepository
+        db = SessionLocal()
+        health_status["analysis_jobs"] = JobRepository(db).counts()
+        db.close()
+    except Exception as e:
+        health_status["services"]["job_queue"] = f"unhealthy: {str(e)}"
+        health_status["status"] = "degraded"
+    
     return health_status
 
 
+@app.get("/metrics")
+def get_metrics():
+    """
+    In-process counters and histograms (per API instance), plus the queue
+    wait of all workers read from the job table (worker histograms are
+    not visible here when workers run as separate processes).
+    """
+    snapshot = metrics.snapshot()
+    try:
+        from server.db.database import SessionLocal
+        from server.repositories.job_repository import JobRepository
+        from server.worker import queue_wait_summary
+        db = SessionLocal()
+        try:
+            samples = JobRepository(db).queue_wait_samples(config.QUEUE_WAIT_WINDOW_SECONDS)
+        finally:
+            db.close()
+        snapshot["analysis_queue_wait_seconds_all_workers"] = queue_wait_summary(*samples)
+    except Exception as e:
+        logger.warning(f"Reading queue wait from the job table failed: {str(e)}")
+    return snapshot
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all requests with structured logging."""
@@ -1,21 +1,42 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, insert, select, text, update
+from sqlalchemy.orm import Session, selectinload
 from uuid import UUID
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+import uuid
 
-from server.db.models import DecisionModel, VariantModel, ArgumentModel
+from server.db.models import AnalysisEventModel, AnalysisJobModel, DecisionModel, VariantModel, ArgumentModel
 from server.schemas.decision import DecisionCreate, DecisionUpdateOutcome
+from server.services.idempotency import submission_lock_id
 
 class DecisionRepository:
+    PURGE_CHUNK_SIZE = 500  # Rows per DELETE statement during bulk purges
+    BULK_UPDATE_CHUNK_SIZE = 500  # Rows per UPDATE statement during bulk re-analysis
+
     def __init__(self, db: Session):
         self.db = db
 
-    def create(self, decision: DecisionCreate, user_id: UUID) -> DecisionModel:
-        """Create decision for user."""
+    def create(
+        self,
+        decision: DecisionCreate,
+        user_id: UUID,
+        content_hash: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        commit: bool = True
+    ) -> DecisionModel:
+        """
+        Create decision for user.
+
+        With commit=False the rows are only flushed, so the caller can commit
+        them together with the analysis job (JobRepository.enqueue).
+        """
         # 1. Create Decision Root
         db_decision = DecisionModel(
             user_id=user_id,
             context=decision.context,
-            selected_variant=decision.selected_variant
+            selected_variant=decision.selected_variant,
+            content_hash=content_hash,
+            idempotency_key=idempotency_key
         )
         self.db.add(db_decision)
         self.db.flush() # Generate ID
@@ -35,10 +56,95 @@ class DecisionRepository:
             )
             self.db.add(db_arg)
         
+        if not commit:
+            self.db.flush()
+            return db_decision
         self.db.commit()
         self.db.refresh(db_decision)
         return db_decision
 
+    def create_many(
+        self,
+        decisions: List[DecisionCreate],
+        user_id: UUID,
+        batch_id: UUID,
+        content_hashes: List[str]
+    ) -> List[UUID]:
+        """
+        Bulk insert decisions with their variants and arguments (one
+        executemany INSERT per table).
+
+        Not committed: the caller commits together with the analysis jobs
+        (JobRepository.enqueue_many), so no decision is left without one.
+
+        Returns:
+            Decision IDs in input order
+        """
+        now = datetime.utcnow()
+        decision_rows, variant_rows, argument_rows = [], [], []
+        for decision, digest in zip(decisions, content_hashes):
+            decision_id = uuid.uuid4()
+            decision_rows.append({
+                "id": decision_id,
+                "user_id": user_id,
+                "context": decision.context,
+                "selected_variant": decision.selected_variant,
+                "timestamp": now,
+                "analysis_status": "pending",
+                "content_hash": digest,
+                "batch_id": batch_id
+            })
+            variant_rows += [
+                {"id": uuid.uuid4(), "decision_id": decision_id, "name": name}
+                for name in decision.variants
+            ]
+            argument_rows += [
+                {"id": uuid.uuid4(), "decision_id": decision_id, "variant_name": arg.variant_name, "text": arg.text, "type": arg.type}
+                for arg in decision.arguments
+            ]
+        self.db.execute(insert(DecisionModel), decision_rows)
+        self.db.execute(insert(VariantModel), variant_rows)
+        self.db.execute(insert(ArgumentModel), argument_rows)
+        return [row["id"] for row in decision_rows]
+
+    def batch_statuses(self, user_id: UUID, batch_id: UUID) -> List[Tuple[UUID, str]]:
+        """(decision ID, analysis status) of the user's decisions in a bulk submission."""
+        return (
+            self.db.query(DecisionModel.id, DecisionModel.analysis_status)
+            .filter(DecisionModel.user_id == user_id, DecisionModel.batch_id == batch_id)
+            .all()
+        )
+
+    def lock_submissions(self, user_id: UUID):
+        """
+        Serialize the user's submissions until commit / rollback, so
+        concurrent duplicates cannot both miss the duplicate check
+        (Postgres advisory lock; no-op on other databases).
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": submission_lock_id(user_id)})
+
+    def get_by_idempotency_key(self, user_id: UUID, idempotency_key: str) -> Optional[DecisionModel]:
+        return (
+            self.db.query(DecisionModel)
+            .filter(DecisionModel.user_id == user_id, DecisionModel.idempotency_key == idempotency_key)
+            .first()
+        )
+
+    def find_recent_duplicate(self, user_id: UUID, content_hash: str, since: datetime) -> Optional[DecisionModel]:
+        """Newest decision of the user with the same content since the cutoff (failed ones excluded)."""
+        return (
+            self.db.query(DecisionModel)
+            .filter(
+                DecisionModel.user_id == user_id,
+                DecisionModel.content_hash == content_hash,
+                DecisionModel.timestamp >= since,
+                DecisionModel.analysis_status != "failed"
+            )
+            .order_by(DecisionModel.timestamp.desc())
+            .first()
+        )
+
     def get_all(self, skip: int = 0, limit: int = 100, user_id: UUID = None) -> List[DecisionModel]:
         """Get all decisions, optionally filtered by user_id."""
         query = self.db.query(DecisionModel)
@@ -51,6 +157,31 @@ class DecisionRepository:
             .all()
         )
 
+    def recent_job_timings(self, limit: int) -> List[Tuple[List[Dict[str, Any]], float]]:
+        """
+        (stage timeline, estimated job cost) of the most recent completed
+        analyses (all users), the cost taken from the decision's last
+        completed job.
+        """
+        rows = (
+            self.db.query(DecisionModel.id, DecisionModel.stage_timeline, AnalysisJobModel.cost)
+            .join(AnalysisJobModel, AnalysisJobModel.decision_id == DecisionModel.id)
+            .filter(
+                DecisionModel.analysis_status == "completed",
+                DecisionModel.stage_timeline.isnot(None),
+                AnalysisJobModel.status == "completed"
+            )
+            .order_by(AnalysisJobModel.updated_at.desc())
+            .limit(limit)
+            .all()
+        )
+        timings, seen = [], set()
+        for decision_id, timeline, cost in rows:
+            if decision_id not in seen:  # Edited decisions have one job per analysis
+                seen.add(decision_id)
+                timings.append((timeline, cost))
+        return timings
+
     def get_by_id(self, decision_id: UUID) -> Optional[DecisionModel]:
         return self.db.query(DecisionModel).filter(DecisionModel.id == decision_id).first()
 
@@ -69,8 +200,11 @@ class DecisionRepository:
         status: str,
         ml_scores: Optional[dict] = None,
         llm_analysis: Optional[dict] = None,
-        retrieved_context: Optional[list] = None
+        retrieved_context: Optional[list] = None,
+        stage_timeline: Optional[list] = None,
+        commit: bool = True
     ) -> Optional[DecisionModel]:
+        """Set the analysis status and results (commit=False: flushed only, committed with a job)."""
         db_decision = self.get_by_id(decision_id)
         if db_decision:
             db_decision.analysis_status = status
@@ -80,15 +214,172 @@ class DecisionRepository:
                 db_decision.llm_analysis = llm_analysis
             if retrieved_context is not None:
                 db_decision.retrieved_context = retrieved_context
+            if stage_timeline is not None:
+                db_decision.stage_timeline = stage_timeline
+            if not commit:
+                self.db.flush()
+                return db_decision
             self.db.commit()
             self.db.refresh(db_decision)
         return db_decision
 
+    def save_checkpoint(self, decision_id: UUID, stage: str, output: Any):
+        """Store a finished stage's output so a retry can resume after it."""
+        db_decision = self.get_by_id(decision_id)
+        if db_decision:
+            db_decision.stage_checkpoints = dict(db_decision.stage_checkpoints or {}, **{stage: output})
+            self.db.commit()
+
+    def clear_checkpoint(self, decision_id: UUID, stage: str):
+        """Drop a stage's checkpoint (e.g. the edit state once its re-analysis completed)."""
+        db_decision = self.get_by_id(decision_id)
+        if db_decision and stage in (db_decision.stage_checkpoints or {}):
+            checkpoints = dict(db_decision.stage_checkpoints)
+            checkpoints.pop(stage)
+            db_decision.stage_checkpoints = checkpoints
+            self.db.commit()
+
+    def update_arguments(
+        self,
+        db_decision: DecisionModel,
+        arguments: List[Dict[str, Any]],
+        content_hash: str,
+        stage_checkpoints: Dict[str, Any],
+        commit: bool = True
+    ) -> DecisionModel:
+        """
+        Store edited arguments and reset the decision for re-analysis.
+
+        Rows listed by ID are updated in place, rows not listed are deleted
+        and arguments with id None are added. With commit=False the changes
+        are only flushed, to be committed with the re-analysis job.
+        """
+        rows = {str(row.id): row for row in db_decision.arguments}
+        kept = {str(arg["id"]) for arg in arguments if arg["id"]}
+        for row_id, row in rows.items():
+            if row_id not in kept:
+                db_decision.arguments.remove(row)
+        for arg in arguments:
+            row = rows[str(arg["id"])] if arg["id"] else ArgumentModel(decision_id=db_decision.id)
+            row.variant_name = arg["variant_name"]
+            row.text = arg["text"]
+            row.type = arg["type"]
+            if not arg["id"]:
+                db_decision.arguments.append(row)
+        db_decision.content_hash = content_hash
+        db_decision.stage_checkpoints = stage_checkpoints
+        db_decision.analysis_status = "pending"
+        if not commit:
+            self.db.flush()
+            return db_decision
+        self.db.commit()
+        self.db.refresh(db_decision)
+        return db_decision
+
     def delete(self, decision_id: UUID) -> bool:
-        """Delete decision and cascade delete variants/arguments."""
+        """Delete decision and cascade delete variants/arguments (and its queued jobs and progress events)."""
         db_decision = self.get_by_id(decision_id)
         if db_decision:
+            for model in (AnalysisJobModel, AnalysisEventModel):
+                self.db.query(model).filter(model.decision_id == decision_id).delete(synchronize_session=False)
             self.db.delete(db_decision)
             self.db.commit()
             return True
         return False
+
+    def get_ids(
+        self,
+        user_id: UUID,
+        before: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[UUID]:
+        """Get decision IDs for user (optionally older than cutoff) without loading ORM objects."""
+        query = select(DecisionModel.id).where(DecisionModel.user_id == user_id)
+        if before:
+            query = query.where(DecisionModel.timestamp < before)
+        query = query.order_by(DecisionModel.timestamp)
+        if limit:
+            query = query.limit(limit)
+        return list(self.db.execute(query).scalars())
+
+    def delete_many(self, decision_ids: List[UUID]) -> int:
+        """
+        Bulk delete decisions with chunked DELETE statements.
+        
+        Children are deleted explicitly per chunk instead of loading each
+        decision and cascading through relationships. Each chunk commits
+        separately so locks are held only briefly.
+        
+        Returns:
+            Number of deleted decisions
+        """
+        deleted = 0
+        for start in range(0, len(decision_ids), self.PURGE_CHUNK_SIZE):
+            chunk = decision_ids[start:start + self.PURGE_CHUNK_SIZE]
+            self.db.execute(
+                delete(ArgumentModel).where(ArgumentModel.decision_id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.execute(
+                delete(VariantModel).where(VariantModel.decision_id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.execute(
+                delete(AnalysisJobModel).where(AnalysisJobModel.decision_id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.execute(
+                delete(AnalysisEventModel).where(AnalysisEventModel.decision_id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            result = self.db.execute(
+                delete(DecisionModel).where(DecisionModel.id.in_(chunk))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            deleted += result.rowcount
+        return deleted
+
+    def iter_for_reanalysis(
+        self,
+        user_id: Optional[UUID] = None,
+        before: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[DecisionModel]:
+        """
+        Stream completed decisions (with variants and arguments) oldest first.
+        
+        Rows are fetched in chunks instead of loading the whole table.
+        """
+        query = (
+            select(DecisionModel)
+            .where(DecisionModel.analysis_status == "completed")
+            .options(selectinload(DecisionModel.variants), selectinload(DecisionModel.arguments))
+            .order_by(DecisionModel.timestamp)
+            .execution_options(yield_per=self.BULK_UPDATE_CHUNK_SIZE)
+        )
+        if user_id:
+            query = query.where(DecisionModel.user_id == user_id)
+        if before:
+            query = query.where(DecisionModel.timestamp < before)
+        if limit:
+            query = query.limit(limit)
+        yield from self.db.execute(query).scalars()
+
+    def update_analyses_bulk(self, analyses: List[Tuple[UUID, Dict[str, Any]]]) -> int:
+        """
+        Set llm_analysis for many decisions with chunked executemany UPDATEs.
+        
+        Returns:
+            Number of updated decisions
+        """
+        updated = 0
+        for start in range(0, len(analyses), self.BULK_UPDATE_CHUNK_SIZE):
+            chunk = analyses[start:start + self.BULK_UPDATE_CHUNK_SIZE]
+            self.db.execute(
+                update(DecisionModel),
+                [{"id": decision_id, "llm_analysis": analysis} for decision_id, analysis in chunk]
+            )
+            self.db.commit()
+            updated += len(chunk)
+        return updated
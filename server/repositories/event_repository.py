@@ -0,0 +1,36 @@
+from sqlalchemy.orm import Session
+from uuid import UUID
+from typing import Any, List, Tuple
+from datetime import datetime
+
+from server.db.models import AnalysisEventModel
+
+
+class EventRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def append(self, decision_id: UUID, event: str, data: Any):
+        self.db.add(AnalysisEventModel(decision_id=decision_id, event=event, data=data))
+        self.db.commit()
+
+    def since(self, decision_id: UUID, after_id: int) -> List[Tuple[int, str, Any]]:
+        """(id, event, data) of the decision's events after after_id, oldest first."""
+        rows = (
+            self.db.query(AnalysisEventModel.id, AnalysisEventModel.event, AnalysisEventModel.data)
+            .filter(AnalysisEventModel.decision_id == decision_id, AnalysisEventModel.id > after_id)
+            .order_by(AnalysisEventModel.id)
+            .all()
+        )
+        return [(row.id, row.event, row.data) for row in rows]
+
+    def delete(self, decision_id: UUID) -> int:
+        deleted = self.db.query(AnalysisEventModel).filter(AnalysisEventModel.decision_id == decision_id).delete()
+        self.db.commit()
+        return deleted
+
+    def purge(self, before: datetime) -> int:
+        """Delete events older than before (finished streams nobody follows any more)."""
+        deleted = self.db.query(AnalysisEventModel).filter(AnalysisEventModel.created_at < before).delete()
+        self.db.commit()
+        return deleted
@@ -0,0 +1,289 @@
+from sqlalchemy import and_, func, insert, or_
+from sqlalchemy.orm import Session
+from uuid import UUID
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from server.db.models import AnalysisJobModel
+from server.services.job_scheduler import class_weight, virtual_tags
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobRepository:
+    """
+    Durable analysis job queue.
+
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers never block on or double-claim the same row. A claimed job
+    holds a lease that the worker extends with heartbeats; a job whose
+    lease expired (worker crashed or hung) is claimable again. State
+    changes after the claim only apply while the worker still holds the
+    lease.
+
+    Runnable jobs are claimed by smallest fair-queuing finish tag (see
+    job_scheduler), not in arrival order.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enqueue(
+        self,
+        decision_id: UUID,
+        user_id: UUID,
+        payload: Dict[str, Any],
+        max_attempts: int,
+        priority: str = "interactive",
+        cost: float = 1.0
+    ) -> AnalysisJobModel:
+        start, finish = virtual_tags(
+            self.virtual_time(), self._user_tail(user_id, priority), cost, class_weight(priority)
+        )
+        job = AnalysisJobModel(
+            decision_id=decision_id,
+            user_id=user_id,
+            payload=payload,
+            status="queued",
+            priority=priority,
+            cost=cost,
+            virtual_start=start,
+            virtual_finish=finish,
+            attempts=0,
+            max_attempts=max_attempts,
+            run_after=datetime.utcnow()
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def enqueue_many(
+        self,
+        items: List[Tuple[UUID, Dict[str, Any], float]],
+        user_id: UUID,
+        max_attempts: int,
+        priority: str = "batch",
+        batch_id: Optional[UUID] = None
+    ) -> int:
+        """
+        Queue (decision_id, payload, cost) jobs of one user with one bulk
+        INSERT and commit. Fair-queuing tags are the same as for jobs
+        enqueued one by one.
+        """
+        virtual_time = self.virtual_time()
+        tail = self._user_tail(user_id, priority)
+        weight = class_weight(priority)
+        now = datetime.utcnow()
+        rows = []
+        for decision_id, payload, cost in items:
+            start, finish = virtual_tags(virtual_time, tail, cost, weight)
+            tail = finish
+            rows.append({
+                "decision_id": decision_id,
+                "user_id": user_id,
+                "payload": payload,
+                "status": "queued",
+                "priority": priority,
+                "batch_id": batch_id,
+                "cost": cost,
+                "virtual_start": start,
+                "virtual_finish": finish,
+                "attempts": 0,
+                "max_attempts": max_attempts,
+                "run_after": now,
+                "created_at": now,
+                "updated_at": now
+            })
+        self.db.execute(insert(AnalysisJobModel), rows)
+        self.db.commit()
+        return len(rows)
+
+    def virtual_time(self) -> float:
+        """
+        Current position of the queue: smallest start tag among active jobs,
+        or the largest finish tag so far when idle (no credit or penalty
+        carries over from before).
+        """
+        current = (
+            self.db.query(func.min(AnalysisJobModel.virtual_start))
+            .filter(AnalysisJobModel.status.in_(ACTIVE_STATUSES))
+            .scalar()
+        )
+        if current is None:
+            current = self.db.query(func.max(AnalysisJobModel.virtual_finish)).scalar()
+        return current or 0.0
+
+    def _user_tail(self, user_id: UUID, priority: str) -> Optional[float]:
+        """Finish tag of the user's last active job in this class."""
+        return (
+            self.db.query(func.max(AnalysisJobModel.virtual_finish))
+            .filter(
+                AnalysisJobModel.user_id == user_id,
+                AnalysisJobModel.priority == priority,
+                AnalysisJobModel.status.in_(ACTIVE_STATUSES)
+            )
+            .scalar()
+        )
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[AnalysisJobModel]:
+        """
+        Lease the next runnable job (queued and due, or with an expired lease).
+
+        The job's queue_wait_seconds is set to the time since it became
+        runnable (None for a reclaimed lease).
+        """
+        now = datetime.utcnow()
+        job = (
+            self.db.query(AnalysisJobModel)
+            .filter(or_(
+                and_(AnalysisJobModel.status == "queued", AnalysisJobModel.run_after <= now),
+                and_(AnalysisJobModel.status == "running", AnalysisJobModel.lease_expires_at < now)
+            ))
+            .order_by(AnalysisJobModel.virtual_finish, AnalysisJobModel.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            self.db.rollback()  # End the transaction, nothing to lock
+            return None
+        job.queue_wait_seconds = (now - job.run_after).total_seconds() if job.status == "queued" else None
+        job.status = "running"
+        job.attempts += 1
+        job.leased_by = worker_id
+        job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def claim_batch(
+        self,
+        worker_id: str,
+        lease_seconds: float,
+        batch_id: UUID,
+        limit: int
+    ) -> List[AnalysisJobModel]:
+        """
+        Lease up to limit more queued, due jobs of the same bulk submission
+        (claimed alongside a job of that batch, so its stages can be batched).
+        """
+        now = datetime.utcnow()
+        jobs = (
+            self.db.query(AnalysisJobModel)
+            .filter(
+                AnalysisJobModel.batch_id == batch_id,
+                AnalysisJobModel.status == "queued",
+                AnalysisJobModel.run_after <= now
+            )
+            .order_by(AnalysisJobModel.virtual_finish, AnalysisJobModel.created_at)
+            .with_for_update(skip_locked=True)
+            .limit(limit)
+            .all()
+        )
+        if not jobs:
+            self.db.rollback()
+            return []
+        for job in jobs:
+            job.queue_wait_seconds = (now - job.run_after).total_seconds()
+            job.status = "running"
+            job.attempts += 1
+            job.leased_by = worker_id
+            job.lease_expires_at = now + timedelta(seconds=lease_seconds)
+        self.db.commit()
+        for job in jobs:
+            self.db.refresh(job)
+        return jobs
+
+    def _update_leased(self, job_id: UUID, worker_id: str, **values) -> bool:
+        updated = (
+            self.db.query(AnalysisJobModel)
+            .filter(
+                AnalysisJobModel.id == job_id,
+                AnalysisJobModel.leased_by == worker_id,
+                AnalysisJobModel.status == "running"
+            )
+            .update(dict(values, updated_at=datetime.utcnow()), synchronize_session=False)
+        )
+        self.db.commit()
+        return bool(updated)
+
+    def heartbeat(self, job_id: UUID, worker_id: str, lease_seconds: float) -> bool:
+        """Extend the lease. False = lease lost (job reclaimed, finished or deleted)."""
+        return self._update_leased(
+            job_id, worker_id, lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds)
+        )
+
+    def complete(self, job_id: UUID, worker_id: str) -> bool:
+        return self._update_leased(job_id, worker_id, status="completed", leased_by=None, lease_expires_at=None)
+
+    def retry(self, job_id: UUID, worker_id: str, error: str, delay_seconds: float) -> bool:
+        """Put the job back in the queue, claimable after delay_seconds."""
+        return self._update_leased(
+            job_id, worker_id,
+            status="queued", leased_by=None, lease_expires_at=None, last_error=error,
+            run_after=datetime.utcnow() + timedelta(seconds=delay_seconds)
+        )
+
+    def fail(self, job_id: UUID, worker_id: str, error: str) -> bool:
+        return self._update_leased(
+            job_id, worker_id, status="failed", leased_by=None, lease_expires_at=None, last_error=error
+        )
+
+    def backlog(self, user_id: Optional[UUID] = None, priority: Optional[str] = None) -> Tuple[int, float]:
+        """(number, total cost) of active jobs, optionally of one user and / or priority class."""
+        query = (
+            self.db.query(func.count(AnalysisJobModel.id), func.coalesce(func.sum(AnalysisJobModel.cost), 0.0))
+            .filter(AnalysisJobModel.status.in_(ACTIVE_STATUSES))
+        )
+        if user_id is not None:
+            query = query.filter(AnalysisJobModel.user_id == user_id)
+        if priority is not None:
+            query = query.filter(AnalysisJobModel.priority == priority)
+        count, cost = query.one()
+        return count, float(cost)
+
+    def queue_wait_samples(
+        self,
+        window_seconds: float,
+        limit: int = 5000
+    ) -> Tuple[Dict[str, List[float]], Dict[str, float]]:
+        """
+        Queue waits of all workers, per priority class.
+
+        Returns:
+            (queue_wait_seconds of up to limit jobs claimed in the window,
+            seconds the oldest runnable job still queued has been waiting)
+        """
+        now = datetime.utcnow()
+        rows = (
+            self.db.query(AnalysisJobModel.priority, AnalysisJobModel.queue_wait_seconds)
+            .filter(
+                AnalysisJobModel.queue_wait_seconds.isnot(None),
+                AnalysisJobModel.updated_at >= now - timedelta(seconds=window_seconds)
+            )
+            .order_by(AnalysisJobModel.updated_at.desc())
+            .limit(limit)
+            .all()
+        )
+        waits: Dict[str, List[float]] = {}
+        for priority, wait in rows:
+            waits.setdefault(priority, []).append(wait)
+        oldest = (
+            self.db.query(AnalysisJobModel.priority, func.min(AnalysisJobModel.run_after))
+            .filter(AnalysisJobModel.status == "queued", AnalysisJobModel.run_after <= now)
+            .group_by(AnalysisJobModel.priority)
+            .all()
+        )
+        return waits, {priority: (now - run_after).total_seconds() for priority, run_after in oldest}
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of jobs per priority class and status."""
+        rows = (
+            self.db.query(AnalysisJobModel.priority, AnalysisJobModel.status, func.count(AnalysisJobModel.id))
+            .group_by(AnalysisJobModel.priority, AnalysisJobModel.status)
+            .all()
+        )
+        counts: Dict[str, Dict[str, int]] = {}
+        for priority, status, count in rows:
+            counts.setdefault(priority, {})[status] = count
+        return counts
@@ -0,0 +1,50 @@
+from sqlalchemy.orm import Session
+from uuid import UUID
+from typing import Dict, List, Optional
+
+from server.db.models import UserProfileModel
+
+
+class ProfileRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, user_id: UUID) -> Optional[UserProfileModel]:
+        return self.db.query(UserProfileModel).filter(UserProfileModel.user_id == user_id).first()
+
+    def get_entries(self, user_id: UUID) -> List[Dict]:
+        profile = self.get(user_id)
+        return list(profile.entries) if profile else []
+
+    def get_for_update(self, user_id: UUID) -> UserProfileModel:
+        """Get (or create) the user's profile row, locked until commit."""
+        profile = (
+            self.db.query(UserProfileModel)
+            .filter(UserProfileModel.user_id == user_id)
+            .with_for_update()
+            .first()
+        )
+        if profile is None:
+            profile = UserProfileModel(user_id=user_id, entries=[], decision_count=0)
+            self.db.add(profile)
+        return profile
+
+    def save(self, profile: UserProfileModel, entries: List[Dict], decisions_added: int = 1) -> UserProfileModel:
+        profile.entries = entries
+        profile.decision_count = (profile.decision_count or 0) + decisions_added
+        self.db.commit()
+        self.db.refresh(profile)
+        return profile
+
+    def remove_decisions(self, user_id: UUID, decision_ids: List[UUID]) -> int:
+        """Drop entries quoted from deleted decisions. Returns number of removed entries."""
+        profile = self.get(user_id)
+        if profile is None:
+            return 0
+        removed_ids = {str(d) for d in decision_ids}
+        kept = [e for e in profile.entries if e.get("decision_id") not in removed_ids]
+        removed = len(profile.entries) - len(kept)
+        if removed:
+            profile.entries = kept
+            self.db.commit()
+        return removed
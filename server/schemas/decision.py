@@ -98,6 +98,21 @@ class DecisionCreate(BaseModel):
         
         return v
 
+class ArgumentEdit(BaseModel):
+    id: UUID
+    text: Optional[str] = None
+    type: Optional[str] = None
+
+class ArgumentChanges(BaseModel):
+    """Argument edits of an existing decision (IDs are ArgumentModel row IDs)."""
+    add: List[ArgumentBase] = []
+    edit: List[ArgumentEdit] = []
+    remove: List[UUID] = []
+
+class BatchAnalysisCreate(BaseModel):
+    """Bulk submission: the decisions are analyzed as one batch (up to BATCH_MAX_DECISIONS)."""
+    decisions: List[DecisionCreate] = Field(..., min_items=1)
+
 class DecisionUpdateOutcome(BaseModel):
     outcome: str
     selected_variant: Optional[str] = None
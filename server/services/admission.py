@@ -0,0 +1,211 @@
+"""
+Admission Control - reject analyses early instead of queueing them for minutes.
+
+Two layers:
+  - Admission (API): a new analysis is rejected when the user already has
+    too many active jobs (429) or the queue is too deep / its estimated
+    wait too long (503), both with Retry-After.
+  - Stage slots (workers): per-process semaphores cap in-flight
+    cross-encoder, embedding and LLM work; a worker waits for a slot
+    instead of overloading the model or the LLM provider.
+
+The estimated wait is backlog cost (see job_scheduler) divided by
+capacity: worker slots, lowered when a stage's slots cannot keep that
+many jobs busy (slots / share of job time spent in that stage, from
+observed stage durations). Cost units (see job_scheduler) are converted
+to seconds with the observed seconds per cost unit of recent jobs. The
+API reads stage durations and job costs from recent analyses in the
+database, since the stages usually run in separate worker processes.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import math
+import threading
+import time
+
+from server.core.config import config
+from server.core.metrics import metrics, percentile
+from server.services.stage_graph import stage_seconds
+
+admission_outcomes = metrics.counter(
+    "analysis_admission_total",
+    "Admission decisions for new analyses (admitted / user_limit / queue_full / wait_too_long)"
+)
+slot_wait = metrics.histogram(
+    "analysis_stage_slot_wait_seconds",
+    "Time spent waiting for a stage concurrency slot",
+    buckets=[0.01, 0.1, 0.5, 1, 5, 10, 30]
+)
+
+# Slot name -> pipeline stages whose time it accounts for
+SLOT_STAGES = {
+    "cross_encoder": ("ml_scoring",),
+    "embedding": ("rag", "index"),
+    "llm": ("llm",),
+}
+PIPELINE_STAGES = ("validate", "ml_scoring", "rag", "llm", "index")
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def slot_limits() -> Dict[str, int]:
+    return {
+        "cross_encoder": config.STAGE_CROSS_ENCODER_CONCURRENCY,
+        "embedding": config.STAGE_EMBEDDING_CONCURRENCY,
+        "llm": config.STAGE_LLM_CONCURRENCY,
+    }
+
+
+_slots: Dict[str, threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+
+
+@contextmanager
+def stage_slot(name: str) -> Iterator[None]:
+    """Hold one of the stage's concurrency slots (blocks while all are taken)."""
+    with _slots_lock:
+        if name not in _slots:
+            _slots[name] = threading.BoundedSemaphore(max(1, slot_limits()[name]))
+        semaphore = _slots[name]
+    started = time.perf_counter()
+    semaphore.acquire()
+    slot_wait.observe(time.perf_counter() - started, slot=name)
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+
+def stage_medians(timelines: Iterable[Optional[List[Dict]]]) -> Dict[str, float]:
+    """Median seconds per pipeline stage over stage timelines (successful runs only)."""
+    durations: Dict[str, List[float]] = {}
+    for timeline in timelines:
+        for entry in timeline or []:
+            if entry.get("status") == "ok" and entry.get("stage") in PIPELINE_STAGES:
+                durations.setdefault(entry["stage"], []).append(entry["duration_ms"] / 1000)
+    return {stage: percentile(values, 50) for stage, values in durations.items()}
+
+
+def seconds_per_cost(timings: Iterable[Tuple[Optional[List[Dict]], float]]) -> Optional[float]:
+    """
+    Observed seconds per cost unit: median job duration / median job cost.
+
+    A job's duration is the wall-clock span of its timeline (stages run in
+    parallel). None without samples.
+    """
+    durations, costs = [], []
+    for timeline, cost in timings:
+        spans = [entry["start_ms"] + entry["duration_ms"] for entry in timeline or [] if "duration_ms" in entry]
+        if spans and cost and cost > 0:
+            durations.append(max(spans) / 1000)
+            costs.append(cost)
+    if not durations:
+        return None
+    return percentile(durations, 50) / percentile(costs, 50)
+
+
+_shared_timing: Tuple[float, Tuple[Dict[str, float], Optional[float]]] = (0.0, ({}, None))
+_shared_timing_lock = threading.Lock()
+
+
+def shared_job_timing(
+    load_timings: Callable[[], List[Tuple[Optional[List[Dict]], float]]]
+) -> Tuple[Dict[str, float], Optional[float]]:
+    """
+    (stage_medians, seconds_per_cost) of recent analyses of all workers,
+    reloaded at most every ADMISSION_TIMELINE_TTL_SECONDS.
+
+    Args:
+        load_timings: Reads (stage timeline, job cost) pairs (e.g. from the database)
+    """
+    global _shared_timing
+    with _shared_timing_lock:
+        expires, timing = _shared_timing
+        if time.monotonic() >= expires:
+            timings = load_timings()
+            timing = (stage_medians(timeline for timeline, _ in timings), seconds_per_cost(timings))
+            _shared_timing = (time.monotonic() + config.ADMISSION_TIMELINE_TTL_SECONDS, timing)
+        return timing
+
+
+def estimated_capacity(medians: Optional[Dict[str, Optional[float]]] = None) -> float:
+    """
+    Jobs in progress at once.
+
+    Args:
+        medians: Stage -> median seconds; defaults to this process's
+            stage_seconds, which only has data where stages run
+    """
+    capacity = float(config.ADMISSION_WORKER_SLOTS)
+    if medians is None:
+        medians = {
+            stage: stage_seconds.percentiles(50, stage=stage).get("p50")
+            for stage in PIPELINE_STAGES
+        }
+    job_seconds = sum(m for m in medians.values() if m)
+    if not job_seconds:
+        return max(1.0, capacity)
+    for slot, limit in slot_limits().items():
+        share = sum(medians.get(s) or 0.0 for s in SLOT_STAGES[slot]) / job_seconds
+        if share > 0:
+            capacity = min(capacity, limit / share)
+    return max(1.0, capacity)
+
+
+def check_admission(
+    backlog: Tuple[int, float],
+    user_backlog: Tuple[int, float],
+    capacity: Optional[float] = None,
+    incoming: Tuple[int, float] = (1, 0.0),
+    max_user_jobs: Optional[int] = None,
+    unit_seconds: Optional[float] = None
+):
+    """
+    Admit or reject new analyses.
+
+    A single analysis is judged by the wait before it starts. A batch also
+    adds its own cost, since every later submission waits behind it.
+
+    Args:
+        backlog: (active jobs, total cost) of all users
+        user_backlog: (active jobs, total cost) of the requesting user
+        capacity: Override of estimated_capacity()
+        incoming: (jobs, total cost) to be queued
+        max_user_jobs: Override of ADMISSION_MAX_ACTIVE_JOBS_PER_USER
+        unit_seconds: Observed seconds per cost unit (seconds_per_cost);
+            without samples a cost unit counts as one second
+
+    Raises:
+        AdmissionRejected: 429 (user over limit) or 503 (queue overloaded)
+    """
+    if not config.ADMISSION_ENABLED:
+        return
+    capacity = capacity or estimated_capacity()
+    unit_seconds = unit_seconds or 1.0
+    jobs, cost = backlog[0], backlog[1] * unit_seconds
+    user_jobs, user_cost = user_backlog[0], user_backlog[1] * unit_seconds
+    new_jobs, new_cost = incoming[0], incoming[1] * unit_seconds
+    user_limit = max_user_jobs if max_user_jobs is not None else config.ADMISSION_MAX_ACTIVE_JOBS_PER_USER
+    wait = (cost + new_cost) / capacity
+
+    if user_jobs + new_jobs > user_limit:
+        admission_outcomes.inc(outcome="user_limit")
+        # Until enough of the user's jobs finish; fair queuing gives them at least one worker
+        excess = user_jobs + new_jobs - user_limit
+        retry_after = excess * user_cost / user_jobs if user_jobs else 0.0
+        raise AdmissionRejected(429, "Too many analyses in progress for this user", retry_after)
+    if jobs + new_jobs > config.ADMISSION_MAX_ACTIVE_JOBS:
+        admission_outcomes.inc(outcome="queue_full")
+        excess = jobs + new_jobs - config.ADMISSION_MAX_ACTIVE_JOBS
+        raise AdmissionRejected(503, "Analysis queue is full", excess * cost / jobs / capacity if jobs else 0.0)
+    if wait > config.ADMISSION_MAX_WAIT_SECONDS:
+        admission_outcomes.inc(outcome="wait_too_long")
+        raise AdmissionRejected(503, "Analysis queue is overloaded", wait - config.ADMISSION_MAX_WAIT_SECONDS)
+    admission_outcomes.inc(outcome="admitted")
@@ -0,0 +1,20 @@
+"""
+Analysis Errors - outcomes of an analysis run that callers handle.
+
+Kept free of database / model imports so workers and tests can use them
+without loading the orchestrator.
+"""
+
+from typing import Dict
+
+
+class InsufficientArgumentsError(Exception):
+    """Arguments failed the quality guardrails; details are stored as the analysis result."""
+
+    def __init__(self, details: Dict):
+        super().__init__(details["message"])
+        self.details = details
+
+
+class AnalysisRetry(Exception):
+    """A non-final attempt failed; the decision is kept for the next attempt."""
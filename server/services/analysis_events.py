@@ -0,0 +1,161 @@
+"""
+Analysis Event Bus - pub/sub for per-decision progress events.
+
+Background analysis (worker threads) publishes status changes and partial
+LLM results; the SSE endpoint replays and follows them per decision.
+
+Events are kept in process, and (QUEUE_SHARED_EVENTS) also written to the
+analysis_events table: with separate worker processes the API serving
+/stream is not the one running the analysis, so it polls the table.
+Writes go through a background writer thread, since partial events are
+published from the shared LLM event loop and must not block it.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from uuid import UUID
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+
+from server.core.config import config
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_EVENTS = {"completed", "failed"}
+
+
+class DatabaseEventStore:
+    """Events in the analysis_events table, one short session per call (see EventRepository)."""
+
+    def _run(self, action):
+        from server.db.database import SessionLocal
+        from server.repositories.event_repository import EventRepository
+        session = SessionLocal()
+        try:
+            return action(EventRepository(session))
+        finally:
+            session.close()
+
+    def append(self, decision_id: UUID, event: str, data: Any):
+        data = json.loads(json.dumps(data, default=str))  # UUIDs, datetimes
+        self._run(lambda repo: repo.append(decision_id, event, data))
+
+    def since(self, decision_id: UUID, after_id: int) -> List[Tuple[int, str, Any]]:
+        return self._run(lambda repo: repo.since(decision_id, after_id))
+
+    def delete(self, decision_id: UUID):
+        self._run(lambda repo: repo.delete(decision_id))
+
+    def purge(self, before: datetime):
+        self._run(lambda repo: repo.purge(before))
+
+
+class AnalysisEventBus:
+    RETENTION_SECONDS = 300  # Keep finished streams for late subscribers
+    SHARED_RETENTION_SECONDS = 3600  # Stored events outlive slow analyses; /stream falls back to the decision
+
+    def __init__(self, store=None):
+        self._lock = threading.Lock()
+        self._events: Dict[str, List[Tuple[str, Any]]] = {}
+        self._finished_at: Dict[str, float] = {}
+        self.store = store  # append / since / delete / purge, e.g. DatabaseEventStore
+        self._pending: "queue.Queue[Tuple[UUID, str, Any]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    @property
+    def shared(self) -> bool:
+        return self.store is not None and config.QUEUE_SHARED_EVENTS
+
+    def publish(self, decision_id: UUID, event: str, data: Any):
+        key = str(decision_id)
+        with self._lock:
+            self._events.setdefault(key, []).append((event, data))
+            if event in TERMINAL_EVENTS:
+                self._finished_at[key] = time.time()
+            self._cleanup()
+        if self.shared:
+            self._start_writer()
+            self._pending.put((decision_id, event, data))
+
+    def flush(self):
+        """Wait until every published event has been written to the store."""
+        if self._writer is not None:
+            self._pending.join()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_events, name="analysis-events", daemon=True)
+                self._writer.start()
+
+    def _write_events(self):
+        """Writer thread: store events one by one, in publishing order."""
+        while True:
+            decision_id, event, data = self._pending.get()
+            # Progress events are best effort: the analysis itself never fails on them
+            try:
+                self.store.append(decision_id, event, data)
+                if event in TERMINAL_EVENTS:
+                    self.store.purge(datetime.utcnow() - timedelta(seconds=self.SHARED_RETENTION_SECONDS))
+            except Exception as e:
+                logger.warning(f"Storing {event} event of {decision_id} failed: {str(e)}")
+            finally:
+                self._pending.task_done()
+
+    def reset(self, decision_id: UUID):
+        """Drop a decision's stream (e.g. a failed analysis is retried and starts a new one)."""
+        key = str(decision_id)
+        with self._lock:
+            self._events.pop(key, None)
+            self._finished_at.pop(key, None)
+        if self.shared:
+            self.flush()  # A late write of the old run must not land after the delete
+            try:
+                self.store.delete(decision_id)
+            except Exception as e:
+                logger.warning(f"Dropping stored events of {decision_id} failed: {str(e)}")
+
+    def fetch_shared(self, decision_id: UUID, after_id: int = 0) -> List[Tuple[int, str, Any]]:
+        """(id, event, data) published by any process after after_id ([] when events are not shared)."""
+        if not self.shared:
+            return []
+        return self.store.since(decision_id, after_id)
+
+    def has_stream(self, decision_id: UUID) -> bool:
+        with self._lock:
+            return str(decision_id) in self._events
+
+    def _cleanup(self):
+        """Drop streams finished more than RETENTION_SECONDS ago. Caller holds the lock."""
+        cutoff = time.time() - self.RETENTION_SECONDS
+        for key in [k for k, t in self._finished_at.items() if t < cutoff]:
+            self._events.pop(key, None)
+            self._finished_at.pop(key, None)
+
+    async def subscribe(
+        self,
+        decision_id: UUID,
+        poll_interval: float = 0.2,
+        timeout: float = 600.0
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Replay past events, then follow new ones until a terminal event or timeout."""
+        key = str(decision_id)
+        sent = 0
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                pending = self._events.get(key, [])[sent:]
+            for event, data in pending:
+                sent += 1
+                yield event, data
+                if event in TERMINAL_EVENTS:
+                    return
+            await asyncio.sleep(poll_interval)
+
+
+# Singleton
+analysis_events = AnalysisEventBus(DatabaseEventStore())
@@ -0,0 +1,205 @@
+"""
+Analysis Repair - salvage malformed or incomplete LLM responses.
+
+Two steps before giving up on a response:
+  1. Local repair: strip code fences and prose, drop trailing commas, close
+     truncated strings/containers, then keep every section that validates.
+  2. Targeted re-ask: a short follow-up prompt asks the LLM only for the
+     sections that are still missing or invalid.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import re
+
+from server.schemas.decision import ArgumentQualityDetails, ScoreDetails, SystemicInconsistency
+from server.services.compact_schema import TOP_LEVEL_KEYS
+
+_FENCE = re.compile(r"```(?:json)?", re.IGNORECASE)
+_CLOSERS = {"{": "}", "[": "]"}
+
+REQUIRED_TEXT_FIELDS = ["alignment_with_model_scores", "detected_reasoning_patterns", "final_note"]
+REQUIRED_LIST_FIELDS = ["key_weak_points_to_reconsider"]
+SHORT_KEYS = {full: short for short, full in TOP_LEVEL_KEYS.items()}
+
+MAX_CUT_ATTEMPTS = 50
+
+
+def _scan(text: str) -> Tuple[str, List[Tuple[int, str]], str, bool]:
+    """
+    Single pass over text outside of strings.
+
+    Returns:
+        (text without trailing commas, [(cut index, open containers)] at
+        each member separator, open containers at the end, ends inside a string)
+    """
+    out: List[str] = []
+    cuts: List[Tuple[int, str]] = []
+    stack = ""
+    in_string = escape = False
+    for c in text:
+        if in_string:
+            out.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+        elif c in _CLOSERS:
+            stack += c
+        elif c in "}]":
+            # Drop a trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if not stack or _CLOSERS[stack[-1]] != c:
+                break  # Unbalanced; keep what came before
+            stack = stack[:-1]
+            out.append(c)
+            if not stack:
+                return "".join(out), cuts, stack, False
+            continue
+        elif c == "," and stack:
+            cuts.append((len(out), stack))
+        out.append(c)
+    return "".join(out), cuts, stack, in_string
+
+
+def _close(stack: str) -> str:
+    return "".join(_CLOSERS[c] for c in reversed(stack))
+
+
+def _loads_object(text: str) -> Optional[Dict[str, Any]]:
+    try:
+        data = json.loads(text)
+    except (json.JSONDecodeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Best-effort parse of a malformed JSON object.
+
+    Truncated output loses its incomplete trailing member; everything
+    before it is kept.
+
+    Returns:
+        Parsed object, or None if nothing could be recovered
+    """
+    text = _FENCE.sub("", text or "")
+    start = text.find("{")
+    if start < 0:
+        return None
+    text = text[start:]
+
+    data = _loads_object(text)
+    if data is not None:
+        return data
+
+    cleaned, cuts, stack, in_string = _scan(text)
+    data = _loads_object(cleaned + ('"' if in_string else "") + _close(stack))
+    if data is not None:
+        return data
+    for index, open_stack in reversed(cuts[-MAX_CUT_ATTEMPTS:]):
+        data = _loads_object(cleaned[:index] + _close(open_stack))
+        if data is not None:
+            return data
+    return None
+
+
+def salvage_analysis(
+    data: Dict[str, Any],
+    variants: List[str]
+) -> Tuple[Dict[str, Any], List[str], List[str]]:
+    """
+    Keep every section of a (full-schema) analysis that validates on its own.
+
+    Invalid optional sections are dropped (score_details, confidence_level)
+    or filtered (systemic_inconsistencies).
+
+    Returns:
+        (salvaged analysis, variants still missing, required fields still missing)
+    """
+    salvaged: Dict[str, Any] = {"argument_quality_comparison": {}}
+    missing_variants: List[str] = []
+    missing_fields: List[str] = []
+
+    comparison = data.get("argument_quality_comparison")
+    comparison = comparison if isinstance(comparison, dict) else {}
+    for variant in variants:
+        try:
+            details = ArgumentQualityDetails.parse_obj(comparison[variant])
+            salvaged["argument_quality_comparison"][variant] = details.dict()
+        except Exception:
+            missing_variants.append(variant)
+
+    for field in REQUIRED_TEXT_FIELDS:
+        value = data.get(field)
+        if isinstance(value, str) and value.strip():
+            salvaged[field] = value
+        else:
+            missing_fields.append(field)
+    for field in REQUIRED_LIST_FIELDS:
+        value = data.get(field)
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            salvaged[field] = value
+        else:
+            missing_fields.append(field)
+
+    try:
+        salvaged["score_details"] = ScoreDetails.parse_obj(data["score_details"]).dict()
+    except Exception:
+        salvaged["score_details"] = None
+    confidence = data.get("confidence_level")
+    salvaged["confidence_level"] = confidence if isinstance(confidence, str) else None
+    inconsistencies = []
+    for item in data.get("systemic_inconsistencies") or []:
+        try:
+            inconsistencies.append(SystemicInconsistency.parse_obj(item).dict())
+        except Exception:
+            continue
+    salvaged["systemic_inconsistencies"] = inconsistencies
+
+    return salvaged, missing_variants, missing_fields
+
+
+def merge_salvaged(base: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill gaps in base with sections from extra (base wins where both are valid)."""
+    merged = dict(base)
+    merged["argument_quality_comparison"] = {
+        **extra.get("argument_quality_comparison", {}),
+        **base.get("argument_quality_comparison", {})
+    }
+    for key, value in extra.items():
+        if key != "argument_quality_comparison" and not merged.get(key) and value:
+            merged[key] = value
+    return merged
+
+
+def describe_sections(variants: List[str], fields: List[str], compact: bool) -> str:
+    """The given variant entries and top-level fields as keys of the active schema."""
+    parts = []
+    if variants:
+        key = "v" if compact else "argument_quality_comparison"
+        names = ", ".join(f'"{v}"' for v in variants)
+        parts.append(f'"{key}" with entries for the variants {names}')
+    if fields:
+        keys = [SHORT_KEYS[f] if compact else f for f in fields]
+        parts.append(", ".join(f'"{k}"' for k in keys))
+    return "; ".join(parts)
+
+
+def build_reask_instruction(missing_variants: List[str], missing_fields: List[str], compact: bool) -> str:
+    """Follow-up prompt asking only for the missing sections, in the active schema."""
+    return (
+        "FOLLOW-UP: Your previous answer was incomplete or invalid JSON. "
+        "Return a JSON object with ONLY these keys, in the same output format: "
+        f"{describe_sections(missing_variants, missing_fields, compact)}. "
+        "Keep it concise."
+    )
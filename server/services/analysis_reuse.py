@@ -0,0 +1,93 @@
+"""
+Analysis Reuse - detect near-duplicate resubmissions and reuse prior LLM analyses.
+
+A prior decision qualifies when its embedding is above the similarity
+threshold AND its arguments match the current ones after normalization
+(typos and reordering tolerated).
+"""
+
+from typing import Dict, List, Optional
+import copy
+import difflib
+import re
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Casefold, drop punctuation, collapse whitespace."""
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def match_variants(current: List[str], prior: List[str]) -> Optional[Dict[str, str]]:
+    """
+    Map current variant names to prior ones by normalized name.
+
+    Returns:
+        {current_name: prior_name}, or None if the sets differ
+    """
+    prior_by_norm = {normalize_text(v): v for v in prior}
+    if len(prior_by_norm) != len(prior) or len(current) != len(prior):
+        return None
+    mapping = {}
+    for variant in current:
+        prior_name = prior_by_norm.get(normalize_text(variant))
+        if prior_name is None:
+            return None
+        mapping[variant] = prior_name
+    return mapping
+
+
+def arguments_match(
+    current: List[Dict[str, str]],
+    prior: List[Dict[str, str]],
+    variant_map: Dict[str, str],
+    min_ratio: float = 0.9
+) -> bool:
+    """
+    Check that argument sets are the same up to order and small edits.
+
+    Arguments are compared within the same (variant, type) group; each
+    current argument must pair with a distinct prior one at similarity
+    ratio >= min_ratio.
+    """
+    if len(current) != len(prior):
+        return False
+
+    def group(args: List[Dict[str, str]], rename: Dict[str, str]) -> Dict[tuple, List[str]]:
+        groups: Dict[tuple, List[str]] = {}
+        for arg in args:
+            variant = rename.get(arg['variant_name'], arg['variant_name'])
+            groups.setdefault((variant, arg['type']), []).append(normalize_text(arg['text']))
+        return groups
+
+    current_groups = group(current, variant_map)
+    prior_groups = group(prior, {})
+    if set(current_groups) != set(prior_groups):
+        return False
+
+    for key, texts in current_groups.items():
+        remaining = list(prior_groups[key])
+        if len(texts) != len(remaining):
+            return False
+        for text in texts:
+            ratios = [difflib.SequenceMatcher(None, text, other).ratio() for other in remaining]
+            best = max(range(len(ratios)), key=ratios.__getitem__)
+            if ratios[best] < min_ratio:
+                return False
+            remaining.pop(best)
+    return True
+
+
+def patch_analysis(prior_analysis: Dict, variant_map: Dict[str, str]) -> Dict:
+    """Re-key prior analysis from prior variant names to current ones."""
+    analysis = copy.deepcopy(prior_analysis)
+    comparison = analysis.get("argument_quality_comparison", {})
+    analysis["argument_quality_comparison"] = {
+        current: comparison[prior]
+        for current, prior in variant_map.items()
+        if prior in comparison
+    }
+    return analysis
@@ -0,0 +1,117 @@
+"""
+Argument Edits - change the arguments of an analyzed decision and re-analyze
+only what the edit touched.
+
+PATCH /analysis/{id}/arguments applies add / edit / remove operations to the
+stored ArgumentModel rows and queues a re-analysis that reuses the rest:
+  - ML scoring: raw pair scores are checkpointed ("ml_pairs"), so only pairs
+    with a new argument go through the cross-encoder
+  - RAG: retrieved context of unchanged variants is kept, only changed
+    variants are re-embedded and searched
+  - LLM: sections of unchanged variants are kept; one call gets the previous
+    analysis plus the changes and returns the changed variants and the
+    cross-variant synthesis
+
+The analysis and the arguments it was based on are saved as the "edit"
+checkpoint until the re-analysis completes, so a failed re-analysis (or a
+further edit after it) still diffs against what was actually analyzed.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from server.schemas.decision import ArgumentChanges
+
+
+def apply_changes(rows: List[Dict[str, Any]], changes: ArgumentChanges) -> List[Dict[str, Any]]:
+    """
+    Arguments after applying the changes to the stored rows.
+
+    Args:
+        rows: Stored arguments [{id, variant_name, type, text}]
+        changes: Operations keyed by argument row ID
+
+    Returns:
+        [{id, variant_name, type, text}] in stored order, added arguments
+        last with id None
+
+    Raises:
+        ValueError: If an edited or removed ID is not an argument of the decision
+    """
+    by_id = {str(row["id"]): row for row in rows}
+    unknown = [
+        str(arg_id) for arg_id in [edit.id for edit in changes.edit] + list(changes.remove)
+        if str(arg_id) not in by_id
+    ]
+    if unknown:
+        raise ValueError(f"Unknown argument IDs: {', '.join(unknown)}")
+
+    edits = {str(edit.id): edit for edit in changes.edit}
+    removed = {str(arg_id) for arg_id in changes.remove}
+    arguments = []
+    for row in rows:
+        row_id = str(row["id"])
+        if row_id in removed:
+            continue
+        argument = dict(row)
+        if row_id in edits:
+            argument.update(edits[row_id].dict(exclude={"id"}, exclude_none=True))
+        arguments.append(argument)
+    arguments += [dict(arg.dict(), id=None) for arg in changes.add]
+    return arguments
+
+
+def diff_arguments(
+    before: List[Dict[str, str]],
+    after: List[Dict[str, str]]
+) -> Dict[str, List]:
+    """
+    Arguments added and removed between two ml_input lists.
+
+    Arguments are compared by their content-derived IDs, so an edited
+    argument shows up as removed (old text) and added (new text).
+
+    Returns:
+        {"added": [...], "removed": [...], "variants": [variants with changes]}
+    """
+    before_ids = {arg["id"] for arg in before}
+    after_ids = {arg["id"] for arg in after}
+    added = [arg for arg in after if arg["id"] not in before_ids]
+    removed = [arg for arg in before if arg["id"] not in after_ids]
+    variants = []
+    for arg in added + removed:
+        if arg["variant_name"] not in variants:
+            variants.append(arg["variant_name"])
+    return {"added": added, "removed": removed, "variants": variants}
+
+
+def carry_over_checkpoints(
+    checkpoints: Optional[Dict[str, Any]],
+    ml_input: List[Dict[str, str]],
+    changed_variants: List[str],
+    edit: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Checkpoints the re-analysis after an edit can still use.
+
+    Pair scores of remaining arguments and retrieved context of unchanged
+    variants are kept; final ML scores (normalized over the old argument
+    set) are dropped, and indexing is redone because the stored text changed.
+    """
+    checkpoints = checkpoints or {}
+    argument_ids = {arg["id"] for arg in ml_input}
+    kept: Dict[str, Any] = {}
+    pairs = {
+        key: score for key, score in (checkpoints.get("ml_pairs") or {}).items()
+        if set(key.split("|")) <= argument_ids
+    }
+    if pairs:
+        kept["ml_pairs"] = pairs
+    context = {
+        variant: texts for variant, texts in (checkpoints.get("rag") or {}).items()
+        if variant not in changed_variants
+    }
+    if context:
+        kept["rag"] = context
+    if edit is not None:
+        kept["edit"] = edit
+    return kept
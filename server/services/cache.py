@@ -0,0 +1,155 @@
+"""
+Local Disk Caches - SQLite-backed key/value stores.
+Used for embeddings, cross-encoder pair scores and LLM responses.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import logging
+
+from server.core.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: str) -> str:
+    """Stable cache key from arbitrary string parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x1f')  # Separator so ("ab", "c") != ("a", "bc")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Thread-safe SQLite key/value cache with optional TTL and size cap.
+
+    Values are stored as JSON. When the size cap is exceeded, the oldest
+    entries are evicted (FIFO, so reads never write).
+    """
+    EVICT_SLACK = 0.1  # Evict in batches of 10% to amortize the cost
+
+    def __init__(self, path: str, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_created_at ON entries (created_at)")
+        self._conn.commit()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return {key: value} for keys present and not expired."""
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            # SQLite limits bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM entries WHERE key IN ({placeholders})",
+                    chunk
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if not self._is_expired(created_at):
+                        found[key] = json.loads(value)
+        return found
+
+    def set(self, key: str, value: Any):
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, Any]]):
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, created_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """Drop expired entries and enforce the size cap. Caller holds the lock."""
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM entries WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+        if self.max_entries is not None:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries + int(self.max_entries * self.EVICT_SLACK)
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY created_at LIMIT ?)",
+                    (excess,)
+                )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def backup(self, dest_path: str):
+        """Consistent online copy of the cache (safe while in use)."""
+        with self._lock:
+            dest = sqlite3.connect(dest_path)
+            try:
+                self._conn.backup(dest)
+            finally:
+                dest.close()
+
+
+# Named caches (one SQLite file per cache in CACHE_DIR)
+_caches: Dict[str, DiskCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name: str, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None) -> DiskCache:
+    """
+    Get named cache singleton.
+
+    On first open, if the cache file is missing and a warm-start bundle
+    is configured, the bundle's copy is used as the starting point.
+    """
+    with _caches_lock:
+        if name not in _caches:
+            path = os.path.join(config.CACHE_DIR, f"{name}.sqlite")
+            bundled = os.path.join(config.WARM_START_BUNDLE, f"{name}.sqlite") if config.WARM_START_BUNDLE else ""
+            if not os.path.exists(path) and bundled and os.path.exists(bundled):
+                os.makedirs(config.CACHE_DIR, exist_ok=True)
+                shutil.copyfile(bundled, path)
+                logger.info(f"Cache '{name}' warm-started from {bundled}")
+            _caches[name] = DiskCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        return _caches[name]
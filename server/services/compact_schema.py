@@ -0,0 +1,142 @@
+"""
+Compact LLM Output Schema - short keys and positional arrays on the wire,
+expanded server-side into the full ReasoningAnalysis shape.
+
+Output tokens dominate LLM latency; the full schema repeats long keys for
+every variant, fallacy and inconsistency.
+
+Wire format:
+{
+  "v": {"<variant>": {"s": [...], "w": [...], "f": [[type, quote, explanation]], "m": [...], "q": "S|I"}},
+  "a": alignment_with_model_scores,
+  "p": detected_reasoning_patterns,
+  "k": [key_weak_points_to_reconsider],
+  "n": final_note,
+  "sc": [logic_stability, data_grounding, historical_consistency],
+  "c": "h|m|l",
+  "si": [[past_decision_id|null, past_statement, current_statement, conflict_description]]
+}
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+COMPACT_OUTPUT_FORMAT = """OUTPUT FORMAT (compact JSON, short keys, arrays are positional):
+{
+  "v": {
+    "<variant name>": {
+      "s": ["strength with quote"],
+      "w": ["weakness with quote"],
+      "f": [["Fallacy Name", "Exact quote", "Explanation"]],
+      "m": ["missing consideration"],
+      "q": "S" (sufficient) | "I" (insufficient reasoning)
+    }
+  },
+  "a": "Agreement/disagreement with ML scores",
+  "p": "Recurring themes or contradictions with Archive",
+  "k": ["'Exact quote' — Critical issue"],
+  "n": "Summary of decision quality (in User's Language)",
+  "sc": [logic_stability, data_grounding, historical_consistency] (each 0.0-1.0),
+  "c": "h" | "m" | "l" (confidence),
+  "si": [["decision_id_from_context or null", "Exact past quote from Archive", "Exact current quote", "⚠️ Value Conflict: ..."]]
+}
+Be concise: no filler, no repetition between fields.
+"""
+
+# Full variant keys in positional / short-key order
+VARIANT_KEYS = {
+    "s": "strengths",
+    "w": "weaknesses",
+    "f": "logical_fallacies",
+    "m": "missing_considerations",
+    "q": "data_quality",
+}
+TOP_LEVEL_KEYS = {
+    "a": "alignment_with_model_scores",
+    "p": "detected_reasoning_patterns",
+    "k": "key_weak_points_to_reconsider",
+    "n": "final_note",
+    "sc": "score_details",
+    "c": "confidence_level",
+    "si": "systemic_inconsistencies",
+}
+FALLACY_FIELDS = ["type", "quote", "explanation"]
+SCORE_FIELDS = ["logic_stability", "data_grounding", "historical_consistency"]
+INCONSISTENCY_FIELDS = ["past_decision_id", "past_statement", "current_statement", "conflict_description"]
+DATA_QUALITY = {"S": "SUFFICIENT", "I": "INSUFFICIENT_REASONING"}
+CONFIDENCE = {"h": "high", "m": "medium", "l": "low"}
+
+
+def _as_dict(value: Any, fields: List[str]) -> Dict[str, Any]:
+    """Positional array -> dict (dicts pass through; missing trailing fields become "")."""
+    if isinstance(value, dict):
+        return value
+    values = list(value) if isinstance(value, (list, tuple)) else [value]
+    return {field: values[i] if i < len(values) else "" for i, field in enumerate(fields)}
+
+
+def expand_variant(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact per-variant object -> ArgumentQualityDetails dict."""
+    details = {VARIANT_KEYS.get(k, k): v for k, v in compact.items()}
+    details["logical_fallacies"] = [
+        _as_dict(f, FALLACY_FIELDS) for f in details.get("logical_fallacies") or []
+    ]
+    quality = details.get("data_quality", "")
+    details["data_quality"] = DATA_QUALITY.get(quality, quality)
+    for key in ("strengths", "weaknesses", "missing_considerations"):
+        details.setdefault(key, [])
+    return details
+
+
+def _expand_scores(value: Any) -> Optional[Dict[str, float]]:
+    if not value:
+        return None
+    scores = _as_dict(value, SCORE_FIELDS)
+    return {k: min(1.0, max(0.0, float(scores.get(k) or 0.0))) for k in SCORE_FIELDS}
+
+
+def _expand_inconsistency(value: Any) -> Dict[str, Any]:
+    if isinstance(value, (list, tuple)) and len(value) == 3:
+        value = [None] + list(value)  # Model omitted the optional decision id
+    item = _as_dict(value, INCONSISTENCY_FIELDS)
+    if not item.get("past_decision_id"):
+        item["past_decision_id"] = None
+    return item
+
+
+def _expand_top_level(key: str, value: Any) -> Any:
+    if key == "score_details":
+        return _expand_scores(value)
+    if key == "confidence_level":
+        return CONFIDENCE.get(value, value)
+    if key == "systemic_inconsistencies":
+        return [_expand_inconsistency(v) for v in value or []]
+    return value
+
+
+def expand_analysis(compact: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compact response -> dict accepted by ReasoningAnalysis.
+
+    Full keys are passed through unchanged, so a model that ignores the
+    compact format still parses.
+    """
+    analysis: Dict[str, Any] = {}
+    for key, value in compact.items():
+        if key in ("v", "argument_quality_comparison"):
+            analysis["argument_quality_comparison"] = {
+                variant: expand_variant(details) for variant, details in (value or {}).items()
+            }
+            continue
+        full_key = TOP_LEVEL_KEYS.get(key, key)
+        analysis[full_key] = _expand_top_level(full_key, value)
+    return analysis
+
+
+def expand_partial(path: Tuple[Any, ...], value: Any) -> Tuple[Tuple[Any, ...], Any]:
+    """Translate a streamed (path, value) from the compact to the full schema."""
+    if path and path[0] == "v":
+        if len(path) == 2:
+            return ("argument_quality_comparison", path[1]), expand_variant(value)
+        return ("argument_quality_comparison",), expand_analysis({"v": value})["argument_quality_comparison"]
+    full_key = TOP_LEVEL_KEYS.get(path[0], path[0])
+    return (full_key,) + tuple(path[1:]), _expand_top_level(full_key, value)
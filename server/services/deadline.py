@@ -0,0 +1,106 @@
+"""
+Analysis Deadline - one time limit per analysis attempt, split across stages.
+
+The orchestrator starts a Deadline per attempt (ANALYSIS_DEADLINE_SECONDS,
+the pipeline's latency SLO) and StageGraph hands each stage its own
+deadline from the budget split (ANALYSIS_STAGE_BUDGETS). The stage's
+deadline is bound to the thread running it, so code deep inside a stage
+honors it without extra parameters:
+  - LLM calls are cancelled in flight (LLMService.run_sync)
+  - Qdrant requests get the remaining time as their timeout
+  - long loops (cross-encoder pairs) call check_deadline() between steps
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+import json
+import math
+import time
+
+from server.core.config import config
+from server.core.metrics import metrics
+
+analysis_seconds = metrics.histogram(
+    "analysis_seconds",
+    "Duration of analysis attempts by outcome (completed / rejected / retried / failed)",
+    buckets=[1, 5, 10, 30, 60, 120, 300]
+)
+deadline_exceeded = metrics.counter(
+    "analysis_deadline_exceeded_total",
+    "Stages cut short or skipped because their time budget ran out"
+)
+
+
+class DeadlineExceeded(Exception):
+    """The analysis (or stage) ran out of time."""
+
+
+class Deadline:
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at  # time.monotonic() value
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, what: str = "analysis"):
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline of {what} exceeded")
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("analysis_deadline", default=None)
+
+
+@contextmanager
+def bound(deadline: Optional[Deadline]) -> Iterator[None]:
+    """Make deadline the current one for code running in this thread / context."""
+    token = _current.set(deadline)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining_seconds() -> Optional[float]:
+    """Time left before the current deadline (None = no deadline)."""
+    deadline = _current.get()
+    return None if deadline is None else max(0.0, deadline.remaining())
+
+
+def request_timeout() -> Optional[int]:
+    """Remaining time as a whole-second client timeout (at least 1 second)."""
+    remaining = remaining_seconds()
+    return None if remaining is None else max(1, math.ceil(remaining))
+
+
+def check_deadline(what: str = "analysis"):
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(what)
+
+
+def stage_budgets(total_seconds: float) -> Dict[str, float]:
+    """Seconds per stage from the configured shares of the deadline."""
+    shares = json.loads(config.ANALYSIS_STAGE_BUDGETS or "{}")
+    return {stage: float(share) * total_seconds for stage, share in shares.items()}
+
+
+def slo_status() -> Dict:
+    """Latency SLO (the deadline), completed attempt latencies and stages that ran out of time."""
+    return {
+        "deadline_seconds": config.ANALYSIS_DEADLINE_SECONDS or None,
+        "completed_latency": analysis_seconds.percentiles(50, 95, 99, outcome="completed"),
+        "deadline_exceeded": deadline_exceeded.snapshot()
+    }
@@ -9,10 +9,19 @@ class DecisionService:
     def __init__(self, repository: DecisionRepository):
         self.repository = repository
 
-    def create_new_decision(self, decision_data: DecisionCreate, user_id: UUID) -> DecisionResponse:
-        """Create new decision for user."""
+    def create_new_decision(
+        self,
+        decision_data: DecisionCreate,
+        user_id: UUID,
+        content_hash: Optional[str] = None,
+        idempotency_key: Optional[str] = None,
+        commit: bool = True
+    ) -> DecisionResponse:
+        """Create new decision for user (commit=False: flushed only, see DecisionRepository.create)."""
         # Future: Trigger Async ML Job here
-        return self.repository.create(decision_data, user_id)
+        return self.repository.create(
+            decision_data, user_id, content_hash=content_hash, idempotency_key=idempotency_key, commit=commit
+        )
 
     def get_history(self, skip: int = 0, limit: int = 100, user_id: UUID = None) -> List[DecisionResponse]:
         """Get decision history, optionally filtered by user_id."""
@@ -3,13 +3,18 @@ Decision Engine - Simplified RAG for MVP.
 Only dense retrieval, no sparse vectors or reranking.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
 import hashlib
+import zlib
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from FlagEmbedding import BGEM3FlagModel
 
 from server.core.config import config
+from server.services.cache import get_cache, make_key
+from server.services import warm_start
+from server.services.deadline import check_deadline, request_timeout
 
 
 class DecisionEngine:
@@ -19,14 +24,28 @@ class DecisionEngine:
         
         print(f"Loading Embedding Model: {config.EMBEDDING_MODEL}")
         self.embedding_model = BGEM3FlagModel(config.EMBEDDING_MODEL, use_fp16=True)
+        self.embedding_cache = get_cache("embeddings", max_entries=config.EMBEDDING_CACHE_SIZE)
 
         self._ensure_collection()
         print("DecisionEngine Initialized.")
 
     def _ensure_collection(self):
-        """Create Qdrant collection if it doesn't exist."""
+        """Create Qdrant collection if it doesn't exist (or restore it from warm-start bundle)."""
+        if (
+            not self.qdrant.collection_exists(config.QDRANT_COLLECTION)
+            and config.WARM_START_BUNDLE
+            and warm_start.has_snapshot(config.WARM_START_BUNDLE)
+        ):
+            print(f"Restoring collection {config.QDRANT_COLLECTION} from {config.WARM_START_BUNDLE}...")
+            try:
+                warm_start.restore_collection(self.qdrant, config.WARM_START_BUNDLE)
+            except Exception as e:
+                print(f"Warm start failed, creating empty collection: {e}")
+
         if not self.qdrant.collection_exists(config.QDRANT_COLLECTION):
-            print(f"Creating collection {config.QDRANT_COLLECTION}...")
+            print(f"Creating collection {config.QDRANT_COLLECTION} "
+                  f"(sharding={config.QDRANT_SHARDING_METHOD}, shards={config.QDRANT_SHARD_NUMBER}, "
+                  f"replication={config.QDRANT_REPLICATION_FACTOR})...")
             self.qdrant.create_collection(
                 collection_name=config.QDRANT_COLLECTION,
                 vectors_config={
@@ -34,39 +53,158 @@ class DecisionEngine:
                         size=1024,
                         distance=models.Distance.COSINE
                     )
-                }
+                },
+                sharding_method=(
+                    models.ShardingMethod.CUSTOM if self._custom_sharding
+                    else models.ShardingMethod.AUTO
+                ),
+                shard_number=None if self._custom_sharding else config.QDRANT_SHARD_NUMBER,
+                replication_factor=config.QDRANT_REPLICATION_FACTOR,
+                write_consistency_factor=config.QDRANT_WRITE_CONSISTENCY_FACTOR
             )
+            if self._custom_sharding:
+                for bucket in range(config.QDRANT_SHARD_KEY_BUCKETS):
+                    self.qdrant.create_shard_key(
+                        collection_name=config.QDRANT_COLLECTION,
+                        shard_key=f"users-{bucket}",
+                        shards_number=config.QDRANT_SHARD_NUMBER,
+                        replication_factor=config.QDRANT_REPLICATION_FACTOR
+                    )
+
+        # Payload indexes for filter-based deletion (idempotent)
+        self.qdrant.create_payload_index(
+            collection_name=config.QDRANT_COLLECTION,
+            field_name="user_id",
+            field_schema=models.PayloadSchemaType.KEYWORD
+        )
+        self.qdrant.create_payload_index(
+            collection_name=config.QDRANT_COLLECTION,
+            field_name="timestamp",
+            field_schema=models.PayloadSchemaType.DATETIME
+        )
+
+    @property
+    def _custom_sharding(self) -> bool:
+        return config.QDRANT_SHARDING_METHOD == "custom"
+
+    def _shard_key(self, user_id: Optional[str]) -> Optional[str]:
+        """
+        Shard key holding this user's points ("custom" sharding only).
+        
+        Users are hashed into a fixed number of shard keys, so a user's
+        whole archive lives on one shard and user-scoped reads hit only it.
+        """
+        if not self._custom_sharding:
+            return None
+        bucket = zlib.crc32((user_id or "").encode('utf-8')) % config.QDRANT_SHARD_KEY_BUCKETS
+        return f"users-{bucket}"
+
+    def _user_filter(
+        self,
+        user_id: Optional[str],
+        exclude_decision_id: Optional[str] = None
+    ) -> Optional[models.Filter]:
+        if not user_id and not exclude_decision_id:
+            return None
+        must = [models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id))] if user_id else None
+        must_not = [
+            models.FieldCondition(key="decision_id", match=models.MatchValue(value=exclude_decision_id))
+        ] if exclude_decision_id else None
+        return models.Filter(must=must, must_not=must_not)
 
     def _generate_hash(self, text: str) -> str:
         return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
-    def index_decision(self, decision_id: str, context: str, arguments: List[Dict[str, str]]):
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Dense-encode texts, using the embedding cache and one batched call for misses."""
+        keys = [make_key(config.EMBEDDING_MODEL, text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            check_deadline("embedding")
+            output = self.embedding_model.encode(
+                [texts[i] for i in missing],
+                return_dense=True,
+                return_sparse=False,
+                return_colbert_vecs=False
+            )
+            fresh = [(keys[i], vector.tolist()) for i, vector in zip(missing, output['dense_vecs'])]
+            self.embedding_cache.set_many(fresh)
+            cached.update(fresh)
+
+        return [cached[key] for key in keys]
+
+    def _canonical_text(self, context: str, arguments: List[Dict[str, str]]) -> str:
+        return f"Context: {context}\n" + "\n".join([f"- {a['text']}" for a in arguments])
+
+    def find_similar_decision(
+        self,
+        context: str,
+        arguments: List[Dict[str, str]],
+        user_id: str
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Find the user's most similar prior decision by decision embedding.
+        
+        The embedding is the same one index_decision stores (cached), so
+        indexing the current decision later costs no extra encode.
+        
+        Returns:
+            (decision_id, cosine similarity) or None if archive is empty
+        """
+        vector = self._encode([self._canonical_text(context, arguments)])[0]
+        response = self.qdrant.query_points(
+            collection_name=config.QDRANT_COLLECTION,
+            query=vector,
+            using="dense",
+            query_filter=self._user_filter(user_id),
+            limit=1,
+            with_payload=["decision_id"],
+            shard_key_selector=self._shard_key(user_id),
+            timeout=request_timeout(),
+        )
+        if not response.points:
+            return None
+        point = response.points[0]
+        return point.payload.get("decision_id", str(point.id)), point.score
+
+    def index_decision(
+        self,
+        decision_id: str,
+        context: str,
+        arguments: List[Dict[str, str]],
+        user_id: Optional[str] = None,
+        timestamp: Optional[datetime] = None
+    ):
         """Index a decision and its arguments into Qdrant with content hashing."""
         # For simplicity, we index the whole context + arguments as one point
         # In a more advanced RAG, we might index each argument separately
-        canonical_text = f"Context: {context}\n" + "\n".join([f"- {a['text']}" for a in arguments])
+        canonical_text = self._canonical_text(context, arguments)
         content_hash = self._generate_hash(canonical_text)
         
-        # Check if already indexed
+        # Check if already indexed (within the user's archive)
+        must = [
+            models.FieldCondition(
+                key="content_hash",
+                match=models.MatchValue(value=content_hash)
+            )
+        ]
+        if user_id:
+            must.append(models.FieldCondition(key="user_id", match=models.MatchValue(value=user_id)))
         scroll_result, _ = self.qdrant.scroll(
             collection_name=config.QDRANT_COLLECTION,
-            scroll_filter=models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="content_hash",
-                        match=models.MatchValue(value=content_hash)
-                    )
-                ]
-            ),
-            limit=1
+            scroll_filter=models.Filter(must=must),
+            limit=1,
+            shard_key_selector=self._shard_key(user_id),
+            timeout=request_timeout()
         )
         
         if scroll_result:
             return  # Duplicate
 
         # Encode (dense only)
-        output = self.embedding_model.encode([canonical_text], return_dense=True)
-        query_dense = output['dense_vecs'][0]
+        query_dense = self._encode([canonical_text])[0]
 
         # Upsert
         self.qdrant.upsert(
@@ -74,43 +212,45 @@ class DecisionEngine:
             points=[
                 models.PointStruct(
                     id=decision_id,
-                    vector={"dense": query_dense.tolist()},
+                    vector={"dense": query_dense},
                     payload={
                         "decision_id": decision_id,
                         "canonical_text": canonical_text,
-                        "content_hash": content_hash
+                        "content_hash": content_hash,
+                        "user_id": user_id,
+                        "timestamp": (timestamp or datetime.utcnow()).isoformat()
                     }
                 )
-            ]
+            ],
+            shard_key_selector=self._shard_key(user_id),
+            timeout=request_timeout()
         )
 
-    def simple_retrieval(self, query: str, top_k: int = 3) -> List[str]:
+    def simple_retrieval(self, query: str, top_k: int = 3, user_id: Optional[str] = None) -> List[str]:
         """
         Simple RAG: dense retrieval only, no reranking.
         
         Args:
             query: search query
             top_k: number of results
+            user_id: restrict to this user's archive (and its shard)
             
         Returns:
             List of similar argument texts
         """
         # Encode query (dense only)
-        output = self.embedding_model.encode(
-            [query], 
-            return_dense=True, 
-            return_sparse=False,
-            return_colbert_vecs=False
-        )
-        query_dense = output['dense_vecs'][0]
+        query_dense = self._encode([query])[0]
         
         # Search in Qdrant
         response = self.qdrant.query_points(
             collection_name=config.QDRANT_COLLECTION,
-            query=query_dense.tolist(),
+            query=query_dense,
             using="dense",
+            query_filter=self._user_filter(user_id),
             limit=top_k,
             with_payload=True,
+            shard_key_selector=self._shard_key(user_id) if user_id else None,
+            timeout=request_timeout(),
         )
         
         # Extract texts
@@ -122,19 +262,162 @@ class DecisionEngine:
         
         return results
 
+    def retrieve_per_variant(
+        self,
+        context: str,
+        variant_arguments: Dict[str, List[str]],
+        top_k: int = 3,
+        user_id: Optional[str] = None,
+        exclude_decision_id: Optional[str] = None
+    ) -> Dict[str, List[str]]:
+        """
+        Multi-query RAG: context and each variant's arguments are separate queries.
+        
+        All queries are embedded in one batched encode call and sent to Qdrant
+        in one query_batch_points round trip. Each variant's hits are merged
+        with the context hits and deduplicated by point ID.
+        
+        Args:
+            context: decision context
+            variant_arguments: {variant_name: [argument texts]}
+            top_k: number of results per variant
+            user_id: restrict to this user's archive (and its shard)
+            exclude_decision_id: leave out this decision's own vectors (re-analysis)
+            
+        Returns:
+            {variant_name: [canonical texts]} ordered by similarity
+        """
+        return self.retrieve_many([(context, variant_arguments, user_id, exclude_decision_id)], top_k)[0]
+
+    def retrieve_many(
+        self,
+        requests: List[Tuple[str, Dict[str, List[str]], Optional[str], Optional[str]]],
+        top_k: int = 3
+    ) -> List[Dict[str, List[str]]]:
+        """
+        retrieve_per_variant for several decisions at once.
+        
+        The queries of all decisions are embedded in one encode call and
+        sent in one query_batch_points round trip.
+        
+        Args:
+            requests: [(context, variant_arguments, user_id, exclude_decision_id)]
+            top_k: number of results per variant
+            
+        Returns:
+            {variant_name: [canonical texts]} per request, in input order
+        """
+        queries, query_requests = [], []
+        for context, variant_arguments, user_id, exclude_decision_id in requests:
+            # Variants without arguments rely on context hits only
+            variants = [v for v, texts in variant_arguments.items() if texts]
+            queries += [context] + ["\n".join(variant_arguments[v]) for v in variants]
+            query_requests += [(user_id, exclude_decision_id)] * (len(variants) + 1)
+
+        vectors = self._encode(queries)
+
+        responses = self.qdrant.query_batch_points(
+            collection_name=config.QDRANT_COLLECTION,
+            requests=[
+                models.QueryRequest(
+                    query=vector,
+                    using="dense",
+                    filter=self._user_filter(user_id, exclude_decision_id),
+                    limit=top_k,
+                    with_payload=True,
+                    shard_key=self._shard_key(user_id) if user_id else None
+                )
+                for vector, (user_id, exclude_decision_id) in zip(vectors, query_requests)
+            ],
+            timeout=request_timeout()
+        )
+
+        all_results = []
+        offset = 0
+        for _, variant_arguments, _, _ in requests:
+            variants = [v for v, texts in variant_arguments.items() if texts]
+            context_points = responses[offset].points
+            variant_points = dict(zip(variants, (r.points for r in responses[offset + 1:offset + 1 + len(variants)])))
+            offset += len(variants) + 1
+
+            results = {}
+            for variant in variant_arguments:
+                # Deduplicate by point ID, keep best score
+                best = {}
+                for point in list(variant_points.get(variant, [])) + list(context_points):
+                    if point.id not in best or point.score > best[point.id].score:
+                        best[point.id] = point
+                ranked = sorted(best.values(), key=lambda p: p.score, reverse=True)[:top_k]
+                results[variant] = [
+                    p.payload.get("canonical_text", "") for p in ranked
+                    if p.payload.get("canonical_text")
+                ]
+            all_results.append(results)
+
+        return all_results
+
 
     def delete_decision_vectors(self, decision_id: str):
         """Delete vectors associated with a decision ID."""
+        self.delete_vectors(decision_ids=[decision_id])
+
+    def _build_delete_filter(
+        self,
+        user_id: Optional[str] = None,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        decision_ids: Optional[List[str]] = None
+    ) -> models.Filter:
+        """Build payload filter for bulk deletion. All given conditions must match."""
+        must = []
+        if user_id:
+            must.append(models.FieldCondition(
+                key="user_id",
+                match=models.MatchValue(value=user_id)
+            ))
+        if before or after:
+            must.append(models.FieldCondition(
+                key="timestamp",
+                range=models.DatetimeRange(lt=before, gte=after)
+            ))
+        if decision_ids:
+            must.append(models.HasIdCondition(has_id=decision_ids))
+
+        if not must:
+            raise ValueError("Refusing to delete without any filter condition")
+        return models.Filter(must=must)
+
+    def delete_vectors(
+        self,
+        user_id: Optional[str] = None,
+        before: Optional[datetime] = None,
+        after: Optional[datetime] = None,
+        decision_ids: Optional[List[str]] = None
+    ) -> bool:
+        """
+        Bulk-delete vectors by payload filter in a single request.
+        
+        Args:
+            user_id: only points owned by this user
+            before: only points indexed before this time (exclusive)
+            after: only points indexed at or after this time
+            decision_ids: only these decision IDs
+            
+        Returns:
+            True if the delete request succeeded
+        """
+        points_filter = self._build_delete_filter(user_id, before, after, decision_ids)
         try:
             self.qdrant.delete(
                 collection_name=config.QDRANT_COLLECTION,
-                points_selector=models.PointIdsList(
-                    points=[decision_id]
-                )
+                points_selector=models.FilterSelector(filter=points_filter),
+                shard_key_selector=self._shard_key(user_id) if user_id else None
             )
-            print(f"Deleted vectors for decision {decision_id}")
+            print(f"Deleted vectors (user={user_id}, before={before}, after={after}, ids={len(decision_ids or [])})")
+            return True
         except Exception as e:
-            print(f"Error deleting vectors for {decision_id}: {e}")
+            print(f"Error deleting vectors (user={user_id}, ids={len(decision_ids or [])}): {e}")
+            return False
 
 # Singleton
 engine = DecisionEngine()
@@ -0,0 +1,62 @@
+"""
+Idempotent Submission - one decision per logical submission.
+
+A resubmitted analysis (double click, client retry of a timed-out POST)
+returns the decision created by the first submission instead of storing
+a new one and running the pipeline again. Duplicates are recognized by:
+  - the Idempotency-Key header: same key from the same user, at any time
+  - the content hash: same canonical DecisionCreate from the same user
+    within IDEMPOTENCY_WINDOW_SECONDS (failed analyses are not reused)
+"""
+
+from typing import Optional
+from uuid import UUID
+import hashlib
+import json
+
+from server.schemas.decision import DecisionCreate
+from server.core.metrics import metrics
+
+MAX_KEY_LENGTH = 255
+
+dedupe_checks = metrics.counter(
+    "analysis_dedupe_total",
+    "Analysis submissions by outcome (key_hit / content_hit / miss)"
+)
+
+
+def _normalize(text: Optional[str]) -> Optional[str]:
+    return " ".join(text.split()) if text is not None else None
+
+
+def content_hash(decision: DecisionCreate) -> str:
+    """
+    SHA-256 of the decision's canonical content.
+
+    Whitespace differences and argument order do not change the hash;
+    any change to the text, variants or argument types does.
+    """
+    canonical = {
+        "context": _normalize(decision.context),
+        "variants": [_normalize(v) for v in decision.variants],
+        "selected_variant": _normalize(decision.selected_variant),
+        "arguments": sorted(
+            [_normalize(arg.variant_name), arg.type.strip().lower(), _normalize(arg.text)]
+            for arg in decision.arguments
+        ),
+    }
+    encoded = json.dumps(canonical, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def submission_lock_id(user_id: UUID) -> int:
+    """Signed 64-bit advisory lock ID serializing one user's submissions."""
+    digest = hashlib.sha256(f"analysis-submission:{user_id}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
+
+
+def hit_rate() -> float:
+    """Share of submissions answered with an existing decision (since process start)."""
+    hits = dedupe_checks.value(outcome="key_hit") + dedupe_checks.value(outcome="content_hit")
+    total = hits + dedupe_checks.value(outcome="miss")
+    return round(hits / total, 4) if total else 0.0
@@ -0,0 +1,87 @@
+"""
+Job Scheduler - weighted fair queuing of analysis jobs.
+
+Each job gets virtual start / finish tags when it is queued (start-time
+fair queuing):
+
+    start  = max(V, finish tag of the same user's last active job in its class)
+    finish = start + cost / weight(class)
+
+Workers claim the job with the smallest finish tag. V is the queue's
+current position (smallest start tag among active jobs), so a user who
+queues dozens of heavy decisions only spreads out their own jobs: another
+user's job starts at V and is claimed ahead of that backlog. Class
+weights let interactive analyses advance faster than batch work without
+starving it.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from server.core.config import config
+from server.schemas.decision import DecisionCreate
+from server.services.prompt_builder import CHARS_PER_TOKEN
+
+PRIORITY_CLASSES = ("interactive", "batch")
+
+# Cost model (relative units; admission converts them to seconds from observed job durations)
+COST_BASE = 1.0  # Fixed overhead: validation, RAG, one LLM round trip
+COST_PER_ARGUMENT = 0.2  # ML scoring of one (context, argument) pair
+COST_PER_PAIR = 0.02  # Cross-argument comparisons the LLM has to reason about
+COST_PER_1K_PROMPT_TOKENS = 0.5  # LLM input (and proportional output) size
+
+
+def class_weight(priority: str) -> float:
+    weights = {
+        "interactive": config.QUEUE_WEIGHT_INTERACTIVE,
+        "batch": config.QUEUE_WEIGHT_BATCH,
+    }
+    if priority not in weights:
+        raise ValueError(f"Unknown priority class '{priority}', expected one of {PRIORITY_CLASSES}")
+    return weights[priority]
+
+
+def estimate_cost(decision: DecisionCreate) -> float:
+    """Relative cost of analyzing a decision, from argument count, argument pairs and prompt size."""
+    arguments = len(decision.arguments)
+    pairs = arguments * (arguments - 1) // 2
+    chars = len(decision.context) + sum(len(arg.text) for arg in decision.arguments)
+    prompt_tokens = chars / CHARS_PER_TOKEN
+    return round(
+        COST_BASE
+        + COST_PER_ARGUMENT * arguments
+        + COST_PER_PAIR * pairs
+        + COST_PER_1K_PROMPT_TOKENS * prompt_tokens / 1000,
+        3
+    )
+
+
+def estimate_edit_cost(decision: DecisionCreate, changes: Dict[str, List]) -> float:
+    """
+    Relative cost of re-analyzing after an argument edit (see argument_edits.py).
+
+    Only added arguments are scored, and only their pairs with the other
+    arguments are new; the prompt is still sent in full.
+    """
+    arguments = len(decision.arguments)
+    added = len(changes["added"])
+    pairs = min(added * (arguments - 1), arguments * (arguments - 1) // 2)
+    chars = len(decision.context) + sum(len(arg.text) for arg in decision.arguments)
+    prompt_tokens = chars / CHARS_PER_TOKEN
+    return round(
+        COST_BASE
+        + COST_PER_ARGUMENT * added
+        + COST_PER_PAIR * pairs
+        + COST_PER_1K_PROMPT_TOKENS * prompt_tokens / 1000,
+        3
+    )
+
+
+def virtual_tags(
+    virtual_time: float,
+    user_tail: Optional[float],
+    cost: float,
+    weight: float
+) -> Tuple[float, float]:
+    """(start, finish) tags of a new job."""
+    start = max(virtual_time, user_tail or 0.0)
+    return start, start + cost / weight
@@ -0,0 +1,134 @@
+"""
+Incremental JSON Parser - emits completed fields of a streamed JSON object.
+
+Used to surface partial LLM results (e.g. `final_note`, each entry of
+`argument_quality_comparison`) while the rest of the response is still
+being generated.
+"""
+
+import json
+from typing import Any, List, Optional, Set, Tuple
+
+# (path, value): ("final_note",) or ("argument_quality_comparison", "Variant A")
+PartialField = Tuple[Tuple[Any, ...], Any]
+
+
+class _Frame:
+    """Open container (object or array) being parsed."""
+    __slots__ = ("is_object", "path", "state", "key", "key_start", "value_start", "index")
+
+    def __init__(self, is_object: bool, path: Tuple[Any, ...]):
+        self.is_object = is_object
+        self.path = path
+        self.state = "key" if is_object else "value"  # key -> colon -> value -> after_value
+        self.key: Any = None if is_object else 0
+        self.key_start: Optional[int] = None
+        self.value_start: Optional[int] = None
+        self.index = 0
+
+
+class IncrementalJSONParser:
+    """
+    Streaming scanner for a single top-level JSON object.
+
+    Feed text chunks as they arrive; each call returns the fields whose
+    values became complete. Top-level fields are emitted whole, except
+    keys listed in `expand_keys`, whose entries are emitted one by one.
+    """
+
+    def __init__(self, expand_keys: Optional[Set[str]] = None):
+        self.expand_keys = expand_keys or set()
+        self._buf = ""
+        self._pos = 0
+        self._frames: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        return self._buf
+
+    def feed(self, chunk: str) -> List[PartialField]:
+        """Consume chunk, return newly completed fields."""
+        self._buf += chunk
+        events: List[PartialField] = []
+
+        while self._pos < len(self._buf) and not self.done:
+            i, c = self._pos, self._buf[self._pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._string_end(i, events)
+                continue
+
+            if not self._frames:
+                # Skip anything before the root object
+                if c == "{":
+                    self._frames.append(_Frame(True, ()))
+                continue
+
+            frame = self._frames[-1]
+            if c == '"':
+                self._in_string = True
+                if frame.state == "key":
+                    frame.key_start = i
+                elif frame.state == "value":
+                    frame.value_start = i
+            elif c in "{[":
+                frame.value_start = i
+                self._frames.append(_Frame(c == "{", frame.path + (frame.key,)))
+            elif c in "}]":
+                self._finish_primitive(frame, i - 1, events)
+                self._frames.pop()
+                if not self._frames:
+                    self.done = True
+                else:
+                    parent = self._frames[-1]
+                    self._complete(parent, parent.value_start, i, events)
+            elif c == ",":
+                self._finish_primitive(frame, i - 1, events)
+                if frame.is_object:
+                    frame.state = "key"
+                else:
+                    frame.index += 1
+                    frame.key = frame.index
+                    frame.state = "value"
+            elif c == ":":
+                frame.state = "value"
+            elif not c.isspace() and frame.state == "value" and frame.value_start is None:
+                frame.value_start = i  # number / true / false / null
+
+        return events
+
+    def _string_end(self, i: int, events: List[PartialField]):
+        frame = self._frames[-1]
+        if frame.state == "key":
+            frame.key = json.loads(self._buf[frame.key_start:i + 1])
+            frame.state = "colon"
+        elif frame.state == "value":
+            self._complete(frame, frame.value_start, i, events)
+
+    def _finish_primitive(self, frame: _Frame, end: int, events: List[PartialField]):
+        if frame.state == "value" and frame.value_start is not None:
+            self._complete(frame, frame.value_start, end, events)
+
+    def _complete(self, frame: _Frame, start: int, end: int, events: List[PartialField]):
+        raw = self._buf[start:end + 1]
+        frame.state = "after_value"
+        frame.value_start = None
+
+        path = frame.path + (frame.key,)
+        is_top_level = len(frame.path) == 0
+        is_expanded_entry = len(frame.path) == 1 and frame.path[0] in self.expand_keys
+        if (is_top_level and frame.key not in self.expand_keys) or is_expanded_entry:
+            try:
+                events.append((path, json.loads(raw)))
+            except ValueError:
+                pass  # Malformed value; the final parse reports it
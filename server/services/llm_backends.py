@@ -0,0 +1,211 @@
+"""
+LLM Backends - registry of OpenAI-compatible endpoints with latency-aware routing.
+
+Each backend keeps an exponentially weighted moving average (EWMA) of its
+latency and error rate. Requests go to the fastest healthy backend and fail
+over to the next one on retryable errors (timeouts, connection errors, 429,
+5xx); other errors are the request's fault and are raised as they are.
+After repeated failures a backend is skipped for a cooldown period.
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+import json
+import threading
+import time
+import logging
+
+from openai import AsyncOpenAI
+
+from server.core.config import config
+from server.core.metrics import metrics
+from server.services.llm_resilience import is_retryable
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+backend_requests = metrics.counter("llm_backend_requests_total", "LLM requests per backend by outcome (ok / error)")
+backend_latency = metrics.histogram("llm_backend_request_seconds", "Latency of successful LLM requests per backend")
+backend_tokens = metrics.counter("llm_backend_completion_tokens_total", "Completion tokens generated per backend")
+
+
+class LLMBackend:
+    """One OpenAI-compatible endpoint plus its health statistics."""
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        base_url: Optional[str] = None,
+        api_key: str = "",
+        timeout: float = 60.0
+    ):
+        self.name = name
+        self.model = model
+        self.base_url = base_url
+        self.timeout = timeout
+        # Retries are done by ResiliencePolicy / failover, not the SDK
+        self.client = AsyncOpenAI(
+            api_key=api_key or "not-needed",
+            base_url=base_url,
+            timeout=timeout,
+            max_retries=0
+        )
+        self.latency_ewma: Optional[float] = None  # None until the first success
+        self.error_ewma = 0.0
+        self.consecutive_failures = 0
+        self.unhealthy_until = 0.0
+        self.in_flight = 0
+
+    def record_usage(self, usage):
+        """Count completion tokens from a response's usage block (if any)."""
+        if usage is not None and usage.completion_tokens:
+            backend_tokens.inc(usage.completion_tokens, backend=self.name)
+
+    def healthy(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) >= self.unhealthy_until
+
+    def score(self) -> float:
+        """
+        Expected cost of a request; lower is better.
+
+        Untried backends score 0 (explored first). Backends that failed
+        without ever succeeding are scored as if every request took the
+        full timeout, so they rank behind measured ones, by error rate.
+        """
+        if self.latency_ewma is None:
+            if self.error_ewma == 0.0:
+                return 0.0
+            latency = self.timeout
+        else:
+            latency = self.latency_ewma
+        return latency / max(0.05, 1.0 - self.error_ewma)
+
+    def snapshot(self) -> Dict:
+        return {
+            "model": self.model,
+            "base_url": self.base_url,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "error_ewma": round(self.error_ewma, 4),
+            "healthy": self.healthy(),
+            "in_flight": self.in_flight
+        }
+
+
+class BackendRegistry:
+    def __init__(
+        self,
+        backends: List[LLMBackend],
+        alpha: float = 0.3,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0
+    ):
+        if not backends:
+            raise ValueError("At least one LLM backend is required")
+        self.backends = backends
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self) -> LLMBackend:
+        return self.backends[0]
+
+    def ranked(self) -> List[LLMBackend]:
+        """Healthy backends by score (ties keep config order), then unhealthy ones as a last resort."""
+        now = time.time()
+        with self._lock:
+            healthy = [b for b in self.backends if b.healthy(now)]
+            unhealthy = [b for b in self.backends if not b.healthy(now)]
+        return sorted(healthy, key=lambda b: b.score()) + sorted(unhealthy, key=lambda b: b.unhealthy_until)
+
+    def record_success(self, backend: LLMBackend, latency: float):
+        with self._lock:
+            if backend.latency_ewma is None:
+                backend.latency_ewma = latency
+            else:
+                backend.latency_ewma += self.alpha * (latency - backend.latency_ewma)
+            backend.error_ewma *= (1 - self.alpha)
+            backend.consecutive_failures = 0
+            backend.unhealthy_until = 0.0
+        backend_requests.inc(backend=backend.name, outcome="ok")
+        backend_latency.observe(latency, backend=backend.name)
+
+    def record_failure(self, backend: LLMBackend, error: BaseException):
+        with self._lock:
+            backend.error_ewma += self.alpha * (1.0 - backend.error_ewma)
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.failure_threshold:
+                backend.unhealthy_until = time.time() + self.cooldown_seconds
+                logger.warning(
+                    f"LLM backend {backend.name} marked unhealthy for {self.cooldown_seconds:.0f}s "
+                    f"after {backend.consecutive_failures} failures: {error!r}"
+                )
+        backend_requests.inc(backend=backend.name, outcome="error")
+
+    async def call(self, send: Callable[[LLMBackend], Awaitable[T]]) -> T:
+        """
+        Run send(backend) on the best backend, failing over on error.
+
+        Args:
+            send: Coroutine factory performing one request against a backend
+
+        Returns:
+            Result of the first backend that succeeds (the last error is
+            raised if all fail; non-retryable errors such as 400 / 401 are
+            raised at once and not counted against the backend)
+        """
+        last_error: Optional[BaseException] = None
+        for backend in self.ranked():
+            start = time.perf_counter()
+            backend.in_flight += 1
+            try:
+                result = await send(backend)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                self.record_failure(backend, e)
+                last_error = e
+                if len(self.backends) > 1:
+                    logger.warning(f"LLM backend {backend.name} failed, trying next: {e!r}")
+                continue
+            finally:
+                backend.in_flight -= 1
+            self.record_success(backend, time.perf_counter() - start)
+            return result
+        raise last_error
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {b.name: b.snapshot() for b in self.backends}
+
+
+def load_backends() -> BackendRegistry:
+    """
+    Build the registry from settings.
+
+    LLM_BACKENDS is a JSON list of {"name", "model", "base_url", "api_key",
+    "timeout"}; when empty, a single OpenAI backend is built from
+    OPENAI_API_KEY and LLM_MODEL.
+    """
+    specs = json.loads(config.LLM_BACKENDS) if config.LLM_BACKENDS.strip() else [
+        {"name": "openai", "model": config.LLM_MODEL, "api_key": config.OPENAI_API_KEY}
+    ]
+    backends = [
+        LLMBackend(
+            name=spec["name"],
+            model=spec.get("model", config.LLM_MODEL),
+            base_url=spec.get("base_url"),
+            api_key=spec.get("api_key", config.OPENAI_API_KEY),
+            timeout=spec.get("timeout", config.LLM_BACKEND_TIMEOUT_SECONDS)
+        )
+        for spec in specs
+    ]
+    logger.info(f"LLM backends: {[f'{b.name} ({b.model})' for b in backends]}")
+    return BackendRegistry(
+        backends,
+        alpha=config.LLM_BACKEND_EWMA_ALPHA,
+        failure_threshold=config.LLM_BACKEND_FAILURE_THRESHOLD,
+        cooldown_seconds=config.LLM_BACKEND_COOLDOWN_SECONDS
+    )
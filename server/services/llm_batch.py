@@ -0,0 +1,355 @@
+"""
+LLM Batch Re-analysis - re-run stored decisions through the OpenAI Batch API.
+
+Pipeline:
+  1. Select decisions (DecisionRepository.iter_for_reanalysis)
+  2. Write one chat completion request per decision into a JSONL file
+     (prompts come from LLMService, same as interactive analysis)
+  3. Upload, create the batch, poll until it finishes
+  4. Stream the output file back and bulk-update llm_analysis
+
+LocalBatchClient implements the same interface on the local filesystem
+(requests are answered by a callable) for tests and development.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime
+import json
+import os
+import shutil
+import time
+import uuid
+import logging
+
+from server.core.config import config
+from server.schemas.decision import DecisionCreate
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchClient(ABC):
+    """Minimal batch interface shared by the OpenAI and local implementations."""
+
+    @abstractmethod
+    def upload(self, path: str) -> str:
+        """Upload a JSONL request file, return its file ID."""
+
+    @abstractmethod
+    def create(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Create a batch, return the batch object (id, status, ...)."""
+
+    @abstractmethod
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """Current batch object: status, output_file_id, error_file_id, request_counts."""
+
+    @abstractmethod
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        """Lines of a result file."""
+
+
+class OpenAIBatchClient(BatchClient):
+    def __init__(self, api_key: Optional[str] = None):
+        from openai import OpenAI
+        self.client = OpenAI(api_key=api_key or config.OPENAI_API_KEY)
+
+    def upload(self, path: str) -> str:
+        with open(path, "rb") as f:
+            return self.client.files.create(file=f, purpose="batch").id
+
+    def create(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        batch = self.client.batches.create(
+            input_file_id=input_file_id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=config.LLM_BATCH_COMPLETION_WINDOW,
+            metadata=metadata
+        )
+        return batch.model_dump()
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        return self.client.batches.retrieve(batch_id).model_dump()
+
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        response = self.client.files.content(file_id)
+        for line in response.iter_lines():
+            if line:
+                yield line
+
+
+class LocalBatchClient(BatchClient):
+    """
+    File-based stand-in for the Batch API.
+
+    Requests are answered by respond(body) -> message content when the
+    batch is first retrieved; output files use the Batch API result format.
+    A respond() exception becomes a per-request error.
+    """
+
+    def __init__(self, directory: str, respond: Callable[[Dict[str, Any]], str]):
+        self.directory = directory
+        self.respond = respond
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _save(self, batch: Dict[str, Any]):
+        with open(self._path(f"{batch['id']}.json"), "w") as f:
+            json.dump(batch, f)
+
+    def upload(self, path: str) -> str:
+        file_id = f"file-{uuid.uuid4().hex}"
+        shutil.copyfile(path, self._path(file_id))
+        return file_id
+
+    def create(self, input_file_id: str, metadata: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex}",
+            "status": "validating",
+            "input_file_id": input_file_id,
+            "output_file_id": None,
+            "error_file_id": None,
+            "metadata": metadata or {},
+            "request_counts": {"total": 0, "completed": 0, "failed": 0}
+        }
+        self._save(batch)
+        return batch
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._path(f"{batch_id}.json")) as f:
+            batch = json.load(f)
+        if batch["status"] not in TERMINAL_STATUSES:
+            batch = self._process(batch)
+        return batch
+
+    def _process(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        output_id, error_id = f"file-{uuid.uuid4().hex}", f"file-{uuid.uuid4().hex}"
+        counts = {"total": 0, "completed": 0, "failed": 0}
+        with open(self._path(batch["input_file_id"]), encoding="utf-8") as requests, \
+                open(self._path(output_id), "w", encoding="utf-8") as output, \
+                open(self._path(error_id), "w", encoding="utf-8") as errors:
+            for line in requests:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                counts["total"] += 1
+                try:
+                    content = self.respond(request["body"])
+                except Exception as e:
+                    counts["failed"] += 1
+                    errors.write(json.dumps({
+                        "id": f"batch_req_{uuid.uuid4().hex}",
+                        "custom_id": request["custom_id"],
+                        "response": None,
+                        "error": {"code": "local_error", "message": str(e)}
+                    }) + "\n")
+                    continue
+                counts["completed"] += 1
+                output.write(json.dumps({
+                    "id": f"batch_req_{uuid.uuid4().hex}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]}
+                    },
+                    "error": None
+                }) + "\n")
+        batch.update(
+            status="completed",
+            output_file_id=output_id,
+            error_file_id=error_id if counts["failed"] else None,
+            request_counts=counts
+        )
+        self._save(batch)
+        return batch
+
+    def iter_lines(self, file_id: str) -> Iterator[str]:
+        with open(self._path(file_id), encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield line.rstrip("\n")
+
+
+def write_batch_file(requests: Iterable[Tuple[str, List[Dict[str, str]]]], path: str) -> int:
+    """
+    Write (custom_id, messages) pairs as Batch API chat completion requests.
+
+    Returns:
+        Number of requests written
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for custom_id, messages in requests:
+            f.write(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": config.LLM_MODEL,
+                    "messages": messages,
+                    "response_format": {"type": "json_object"},
+                    "max_tokens": config.LLM_MAX_OUTPUT_TOKENS
+                }
+            }, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def wait_for_batch(
+    client: BatchClient,
+    batch_id: str,
+    poll_seconds: float = 30.0,
+    timeout: Optional[float] = None
+) -> Dict[str, Any]:
+    """Poll until the batch reaches a terminal status (or timeout, returning the last state)."""
+    deadline = time.time() + timeout if timeout else None
+    while True:
+        batch = client.retrieve(batch_id)
+        counts = batch.get("request_counts") or {}
+        logger.info(f"Batch {batch_id}: {batch['status']} {counts}")
+        if batch["status"] in TERMINAL_STATUSES:
+            return batch
+        if deadline and time.time() >= deadline:
+            return batch
+        time.sleep(poll_seconds)
+
+
+def iter_results(client: BatchClient, batch: Dict[str, Any]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Stream (custom_id, content, error) from a finished batch's output and error files.
+    """
+    for file_id, is_error_file in ((batch.get("output_file_id"), False), (batch.get("error_file_id"), True)):
+        if not file_id:
+            continue
+        for line in client.iter_lines(file_id):
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if result.get("error") or is_error_file or response.get("status_code") != 200:
+                error = result.get("error") or response.get("body", {}).get("error") or "request failed"
+                yield result["custom_id"], None, json.dumps(error) if not isinstance(error, str) else error
+                continue
+            yield result["custom_id"], response["body"]["choices"][0]["message"]["content"], None
+
+
+def decision_from_model(db_decision) -> DecisionCreate:
+    """Rebuild the DecisionCreate input of a stored decision."""
+    return DecisionCreate(
+        context=db_decision.context,
+        variants=[v.name for v in db_decision.variants],
+        arguments=[
+            {"variant_name": a.variant_name, "text": a.text, "type": a.type}
+            for a in db_decision.arguments
+        ]
+    )
+
+
+class BatchReanalysis:
+    """
+    Re-analysis of stored decisions via a BatchClient.
+
+    Per-argument ML scores and per-variant retrieval results are not
+    stored, so prompts are rebuilt from what is: each argument gets its
+    variant's stored score and every variant gets the stored archive
+    context (re-running retrieval would also return the decision itself).
+    """
+
+    def __init__(self, repo, llm_service, client: BatchClient, work_dir: Optional[str] = None):
+        self.repo = repo
+        self.llm_service = llm_service
+        self.client = client
+        self.work_dir = work_dir or os.path.join(config.CACHE_DIR, "batches")
+        os.makedirs(self.work_dir, exist_ok=True)
+
+    def _messages(self, db_decision) -> Tuple[DecisionCreate, List[Dict[str, str]]]:
+        from server.services.llm_service import build_ml_input
+
+        decision = decision_from_model(db_decision)
+        ml_input = build_ml_input(decision)
+        stored_scores = db_decision.ml_scores or {}
+        ml_scores = {
+            arg["id"]: stored_scores[arg["variant_name"]]
+            for arg in ml_input if arg["variant_name"] in stored_scores
+        }
+        stored_context = db_decision.retrieved_context or []
+        retrieved_context = {variant: stored_context for variant in decision.variants}
+        messages = self.llm_service.build_messages(decision, ml_scores, retrieved_context, ml_input)
+        return decision, messages
+
+    def submit(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        before: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Write the request file for the selected decisions and create the batch.
+
+        Returns:
+            Batch object (empty dict if nothing was selected)
+        """
+        path = os.path.join(self.work_dir, f"requests-{datetime.utcnow():%Y%m%d-%H%M%S}.jsonl")
+
+        def requests():
+            for db_decision in self.repo.iter_for_reanalysis(user_id=user_id, before=before, limit=limit):
+                try:
+                    _, messages = self._messages(db_decision)
+                except Exception as e:
+                    logger.warning(f"Skipping decision {db_decision.id}: {e}")
+                    continue
+                yield str(db_decision.id), messages
+
+        count = write_batch_file(requests(), path)
+        if not count:
+            os.remove(path)
+            logger.info("No decisions selected for re-analysis")
+            return {}
+        batch = self.client.create(
+            self.client.upload(path),
+            metadata={"purpose": "reanalysis", "model": config.LLM_MODEL}
+        )
+        logger.info(f"Submitted batch {batch['id']} with {count} decisions ({path})")
+        return batch
+
+    def collect(self, batch: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Stream results of a finished batch into llm_analysis, in chunks.
+
+        Responses go through the same repair / re-ask as interactive
+        analysis; decisions whose response can't be used keep their
+        previous analysis.
+
+        Returns:
+            {"updated": n, "failed": n}
+        """
+        stats = {"updated": 0, "failed": 0}
+        pending: List[Tuple[uuid.UUID, Dict[str, Any]]] = []
+
+        def flush():
+            if pending:
+                stats["updated"] += self.repo.update_analyses_bulk(pending)
+                pending.clear()
+
+        for custom_id, content, error in iter_results(self.client, batch):
+            if error is not None:
+                logger.warning(f"Batch request for {custom_id} failed: {error}")
+                stats["failed"] += 1
+                continue
+            db_decision = self.repo.get_by_id(uuid.UUID(custom_id))
+            if db_decision is None:
+                continue  # Deleted since submission
+            try:
+                decision, messages = self._messages(db_decision)
+                analysis = self.llm_service.parse_response(content, decision, messages)
+            except Exception as e:
+                logger.warning(f"Unusable batch response for {custom_id}: {e}")
+                stats["failed"] += 1
+                continue
+            pending.append((db_decision.id, analysis.dict()))
+            if len(pending) >= self.repo.BULK_UPDATE_CHUNK_SIZE:
+                flush()
+        flush()
+        logger.info(f"Batch {batch['id']} collected: {stats}")
+        return stats
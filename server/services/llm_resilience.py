@@ -0,0 +1,135 @@
+"""
+LLM Resilience - per-attempt timeouts, jittered exponential retries and
+optional hedged requests around async LLM calls.
+"""
+
+from typing import Awaitable, Callable, Optional, TypeVar
+import asyncio
+import random
+import time
+import logging
+
+import openai
+
+from server.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+llm_attempts = metrics.counter("llm_attempts_total", "LLM attempts by outcome (ok / retryable / fatal / timeout)")
+llm_hedges = metrics.counter("llm_hedged_requests_total", "Hedged second requests by winner (primary / hedge)")
+llm_latency = metrics.histogram("llm_request_seconds", "Latency of successful LLM requests")
+
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class ResiliencePolicy:
+    """
+    Runs an async request factory with:
+      - a timeout per attempt (the hedged pair counts as one attempt)
+      - up to max_attempts tries on retryable errors, with full-jitter
+        exponential backoff
+      - optionally, a hedged duplicate request if the first one is slower
+        than the observed p95 latency; the first success wins
+    """
+
+    def __init__(
+        self,
+        attempt_timeout: float = 60.0,
+        max_attempts: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 10.0,
+        hedging: bool = False,
+        hedge_min_delay: float = 2.0,
+        hedge_min_samples: int = 20,
+        name: str = "default"
+    ):
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.name = name
+        self._samples = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max, base * 2^attempt))."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def hedge_delay(self) -> Optional[float]:
+        """Delay before hedging, or None until enough latency samples exist."""
+        if not self.hedging or self._samples < self.hedge_min_samples:
+            return None
+        p95 = llm_latency.percentiles(95, policy=self.name).get("p95")
+        return max(self.hedge_min_delay, p95) if p95 is not None else None
+
+    async def call(self, request: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        last_error: Optional[BaseException] = None
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                delay = self.backoff(attempt - 1)
+                logger.warning(f"LLM retry {attempt}/{self.max_attempts - 1} in {delay:.2f}s after: {last_error!r}")
+                await asyncio.sleep(delay)
+            try:
+                result = await asyncio.wait_for(
+                    self._attempt(request, self.hedge_delay() if hedge else None),
+                    timeout=self.attempt_timeout
+                )
+                llm_attempts.inc(outcome="ok", policy=self.name)
+                return result
+            except asyncio.TimeoutError as e:
+                llm_attempts.inc(outcome="timeout", policy=self.name)
+                last_error = e
+            except Exception as e:
+                if not is_retryable(e):
+                    llm_attempts.inc(outcome="fatal", policy=self.name)
+                    raise
+                llm_attempts.inc(outcome="retryable", policy=self.name)
+                last_error = e
+        raise last_error
+
+    async def _timed(self, request: Callable[[], Awaitable[T]]) -> T:
+        start = time.perf_counter()
+        result = await request()
+        llm_latency.observe(time.perf_counter() - start, policy=self.name)
+        self._samples += 1
+        return result
+
+    async def _attempt(self, request: Callable[[], Awaitable[T]], hedge_delay: Optional[float]) -> T:
+        primary = asyncio.ensure_future(self._timed(request))
+        if hedge_delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        if done:
+            return primary.result()
+
+        logger.info(f"LLM request slower than {hedge_delay:.2f}s, sending hedged request")
+        hedged = asyncio.ensure_future(self._timed(request))
+        pending = {primary, hedged}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        llm_hedges.inc(winner="primary" if task is primary else "hedge", policy=self.name)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -2,12 +2,68 @@
 Enhanced LLM Service with Strict ID Mapping and Verifiable Quotes
 """
 
-from typing import List, Dict
-from openai import OpenAI
+from typing import Any, Callable, Coroutine, List, Dict, Optional, Tuple, Union
+import asyncio
+import json
+import threading
+import uuid
+import logging
 from server.core.config import config
 from server.schemas.decision import DecisionCreate, ReasoningAnalysis
+from server.services.json_stream import IncrementalJSONParser
+from server.services.cache import get_cache, make_key
+from server.services.prompt_builder import PromptBuilder, PromptSection
+from server.services.compact_schema import (
+    COMPACT_OUTPUT_FORMAT, TOP_LEVEL_KEYS, expand_analysis, expand_partial, expand_variant
+)
+from server.services.llm_resilience import ResiliencePolicy
+from server.services.llm_backends import LLMBackend, load_backends
+from server.services.analysis_repair import (
+    build_reask_instruction, describe_sections, merge_salvaged, repair_json, salvage_analysis
+)
+from server.services.value_profile import PROFILE_KINDS, is_verbatim, render_entries
+from server.services.deadline import DeadlineExceeded, check_deadline, remaining_seconds
+from server.core.metrics import metrics
 
-SYSTEM_PROMPT = """You are a multilingual Analytical Critic specializing in decision quality assessment.
+logger = logging.getLogger(__name__)
+
+response_repairs = metrics.counter(
+    "llm_response_repairs_total",
+    "LLM responses by validation outcome (valid / repaired / reasked / failed)"
+)
+
+# Namespace for content-derived argument IDs (uuid5)
+ARGUMENT_ID_NAMESPACE = uuid.UUID("5b0e6a2e-3f4c-4d8a-9c1e-7a2f1d9e8b60")
+
+
+def build_ml_input(decision: DecisionCreate) -> List[Dict[str, str]]:
+    """
+    Build [{id, text, variant_name, type}] with IDs derived from content.
+    
+    Same decision -> same IDs -> same prompt, which makes LLM responses
+    cacheable. Identical arguments in one variant are disambiguated by
+    their occurrence number.
+    """
+    ml_input = []
+    seen: Dict[Tuple[str, str, str], int] = {}
+    for arg in decision.arguments:
+        identity = (arg.variant_name, arg.type, arg.text)
+        occurrence = seen.get(identity, 0)
+        seen[identity] = occurrence + 1
+        arg_id = uuid.uuid5(
+            ARGUMENT_ID_NAMESPACE,
+            f"{arg.variant_name}\x1f{arg.type}\x1f{arg.text}\x1f{occurrence}"
+        )
+        ml_input.append({
+            "id": str(arg_id),
+            "text": arg.text,
+            "variant_name": arg.variant_name,
+            "type": arg.type
+        })
+    return ml_input
+
+
+SYSTEM_PROMPT_CORE = """You are a multilingual Analytical Critic specializing in decision quality assessment.
 **LANGUAGE RULE**: Always respond in the SAME language as the User's input context (e.g., if User writes in Russian, JSON values must be in Russian).
 
 CORE MISSION:
@@ -45,7 +101,9 @@ ANALYTICAL FRAMEWORK:
    - Is the user repeating a past mistake (from Archive)?
    - Are they rationalizing a fear-based decision?
 
-OUTPUT FORMAT (JSON):
+"""
+
+FULL_OUTPUT_FORMAT = """OUTPUT FORMAT (JSON):
 {
   "argument_quality_comparison": {
     "variant_name": {
@@ -86,26 +144,139 @@ OUTPUT FORMAT (JSON):
     }
   ]
 }
+"""
 
+PROMPT_RULES = """
 RULES:
 - JSON keys must remain English.
 - JSON string values MUST be in the User's Language.
 - Do not apologize or be polite. Be objective and direct.
 """
 
+SYSTEM_PROMPT = SYSTEM_PROMPT_CORE + FULL_OUTPUT_FORMAT + PROMPT_RULES
+COMPACT_SYSTEM_PROMPT = SYSTEM_PROMPT_CORE + COMPACT_OUTPUT_FORMAT + PROMPT_RULES
+
+# Fan-out mode: appended after the shared (cacheable) system + input prefix
+VARIANT_INSTRUCTION = """PARTIAL TASK: Analyze ONLY the variant "{variant}" (other variants are analyzed separately).
+Use the other variants and the Archive only as reference.
+Return a JSON object with exactly these keys for this variant:
+{{"strengths": [...], "weaknesses": [...], "logical_fallacies": [{{"type": "...", "quote": "...", "explanation": "..."}}], "missing_considerations": [...], "data_quality": "SUFFICIENT | INSUFFICIENT_REASONING"}}"""
+
+CROSS_VARIANT_INSTRUCTION = """PARTIAL TASK: Cross-variant synthesis only. Do NOT return argument_quality_comparison (it is produced separately).
+Return a JSON object with only these keys:
+alignment_with_model_scores, detected_reasoning_patterns, key_weak_points_to_reconsider, final_note, score_details, confidence_level, systemic_inconsistencies"""
+
+COMPACT_VARIANT_INSTRUCTION = """PARTIAL TASK: Analyze ONLY the variant "{variant}" (other variants are analyzed separately).
+Use the other variants and the Archive only as reference.
+Return only this variant's compact object: {{"s": [...], "w": [...], "f": [["type", "quote", "explanation"]], "m": [...], "q": "S|I"}}"""
+
+COMPACT_CROSS_VARIANT_INSTRUCTION = """PARTIAL TASK: Cross-variant synthesis only. Do NOT return "v" (it is produced separately).
+Return a compact JSON object with only these keys: a, p, k, n, sc, c, si"""
+
+# Re-analysis after an argument edit: appended after the system + (edited) input prefix
+INCREMENTAL_INSTRUCTION = """UPDATE TASK: The user changed the arguments of this decision after it was analyzed.
+Previous analysis:
+{previous}
+
+Changes (+ added, - removed):
+{changes}
+
+Revise the previous analysis for these changes and keep what still holds.
+Return a JSON object with ONLY these keys, in the same output format: {keys}"""
+
+PROFILE_EXTRACTION_PROMPT = """Extract the user's stated values, goals, fears, constraints and beliefs from this decision.
+Rules:
+- Quote the user EXACTLY (a short phrase copied from the text, in its original language). Never paraphrase or infer.
+- Only statements that say something lasting about the user, not facts about one option.
+- At most {limit} items; return an empty list if there are none.
+Return JSON: {{"items": [["value|goal|fear|constraint|belief", "exact quote"]]}}"""
+
+
 class LLMService:
     def __init__(self):
         if not config.OPENAI_API_KEY:
             print("⚠️ OPENAI_API_KEY not set")
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        # Each attempt goes to the fastest healthy backend and fails over to the next
+        self.backends = load_backends()
+        self.resilience = ResiliencePolicy(
+            attempt_timeout=config.LLM_ATTEMPT_TIMEOUT_SECONDS,
+            max_attempts=config.LLM_MAX_ATTEMPTS,
+            backoff_base=config.LLM_RETRY_BACKOFF_SECONDS,
+            backoff_max=config.LLM_RETRY_BACKOFF_MAX_SECONDS,
+            hedging=config.LLM_HEDGING_ENABLED,
+            hedge_min_delay=config.LLM_HEDGE_MIN_DELAY_SECONDS,
+            hedge_min_samples=config.LLM_HEDGE_MIN_SAMPLES,
+            name=config.LLM_MODEL
+        )
         self.model = config.LLM_MODEL
+        self.response_cache = get_cache(
+            "llm_responses",
+            max_entries=config.LLM_CACHE_SIZE,
+            ttl_seconds=config.LLM_CACHE_TTL_SECONDS
+        ) if config.LLM_CACHE_ENABLED else None
+        
+        # Dedicated event loop for the async client (callers are sync worker threads)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="llm-event-loop", daemon=True).start()
+
+    def run_sync(self, coro: Coroutine) -> Any:
+        """
+        Run coroutine on the service's event loop and wait for the result.
+        
+        Under an analysis deadline (see deadline.py) the call is cancelled
+        in flight when the deadline passes.
+        """
+        try:
+            check_deadline("LLM call")
+        except DeadlineExceeded:
+            coro.close()
+            raise
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout=remaining_seconds())
+        except TimeoutError:
+            if future.done():
+                raise  # Raised by the coroutine itself
+            future.cancel()
+            raise DeadlineExceeded("LLM call cancelled at the analysis deadline")
+
+    @property
+    def system_prompt(self) -> str:
+        return COMPACT_SYSTEM_PROMPT if config.LLM_COMPACT_OUTPUT else SYSTEM_PROMPT
+
+    @staticmethod
+    def _parse(content: str) -> ReasoningAnalysis:
+        """Parse a response in the compact or full schema."""
+        return ReasoningAnalysis.parse_obj(expand_analysis(json.loads(content)))
+
+    def _cache_key(self, input_text: str) -> str:
+        """
+        Keyed by the models of all configured backends (routing may send
+        the request to any of them), not LLM_MODEL: changing the backend
+        set never serves another model's cached response.
+        """
+        models = ",".join(sorted({backend.model for backend in self.backends.backends}))
+        return make_key(self.system_prompt, models, input_text)
+
+    def _get_cached(self, input_text: str) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        content = self.response_cache.get(self._cache_key(input_text))
+        if content is not None:
+            logger.info("LLM: response cache hit")
+        return content
+
+    def _store_cached(self, input_text: str, content: str):
+        if self.response_cache is not None:
+            self.response_cache.set(self._cache_key(input_text), content)
 
     def analyze_decision(
         self, 
         decision: DecisionCreate, 
         ml_scores: Dict[str, float], 
-        retrieved_context: List[str],
-        ml_input: List[Dict[str, str]]  # NEW: Strict ID mapping
+        retrieved_context: Dict[str, List[str]],
+        ml_input: List[Dict[str, str]],  # NEW: Strict ID mapping
+        profile: Optional[List[Dict[str, Any]]] = None
     ) -> ReasoningAnalysis:
         """
         Analyze decision with strict ID-based argument tracking.
@@ -113,28 +284,349 @@ class LLMService:
         Args:
             decision: Decision data
             ml_scores: ML scores keyed by argument UUID
-            retrieved_context: RAG results
+            retrieved_context: RAG results per variant
             ml_input: List of {id, text, variant_name, type} with UUIDs
+            profile: User value profile entries (replace the raw archive when present)
         """
-        input_text = self._prepare_input_with_ids(decision, ml_scores, retrieved_context, ml_input)
+        input_text = self._prepare_input_with_ids(decision, ml_scores, retrieved_context, ml_input, profile)
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": input_text}
-            ],
-            response_format={"type": "json_object"}
+        cached = self._get_cached(input_text)
+        if cached is not None:
+            return self._parse(cached)
+        
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": input_text}
+        ]
+        content = self.run_sync(self._complete(messages))
+        analysis = self.run_sync(self._finalize(content, decision, messages))
+        self._store_cached(input_text, analysis.json())  # Only valid responses are cached
+        return analysis
+
+    async def analyze_decision_stream(
+        self,
+        decision: DecisionCreate,
+        ml_scores: Dict[str, float],
+        retrieved_context: Dict[str, List[str]],
+        ml_input: List[Dict[str, str]],
+        on_partial: Optional[Callable[[Tuple[Any, ...], Any], None]] = None,
+        profile: Optional[List[Dict[str, Any]]] = None
+    ) -> ReasoningAnalysis:
+        """
+        Async streaming variant of analyze_decision.
+        
+        Completed top-level fields (and each variant entry of
+        argument_quality_comparison) are passed to on_partial(path, value)
+        while the rest of the response is still being generated.
+        """
+        input_text = self._prepare_input_with_ids(decision, ml_scores, retrieved_context, ml_input, profile)
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": input_text}
+        ]
+        
+        def new_parser() -> IncrementalJSONParser:
+            return IncrementalJSONParser(expand_keys={"v", "argument_quality_comparison"})
+        
+        def emit(path: Tuple[Any, ...], value: Any):
+            # Partials always use the full schema (same as the stored analysis)
+            if on_partial:
+                on_partial(*expand_partial(path, value))
+        
+        cached = self._get_cached(input_text)
+        if cached is not None:
+            for path, value in new_parser().feed(cached):
+                emit(path, value)
+            return self._parse(cached)
+        
+        async def send(backend: LLMBackend) -> str:
+            # Fresh parser per attempt/backend; a retry re-sends partials already seen
+            parser = new_parser()
+            stream = await backend.client.chat.completions.create(
+                model=backend.model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                max_tokens=config.LLM_MAX_OUTPUT_TOKENS,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for path, value in parser.feed(chunk.choices[0].delta.content):
+                    emit(path, value)
+            return parser.text
+        
+        # No hedging: two concurrent streams would interleave partial events
+        content = await self.resilience.call(lambda: self.backends.call(send), hedge=False)
+        analysis = await self._finalize(content, decision, messages)
+        self._store_cached(input_text, analysis.json())
+        return analysis
+
+    async def _complete(self, messages: List[Dict[str, str]]) -> str:
+        """JSON-mode completion with per-attempt timeout, retries and optional hedging."""
+        async def send(backend: LLMBackend) -> str:
+            response = await backend.client.chat.completions.create(
+                model=backend.model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                max_tokens=config.LLM_MAX_OUTPUT_TOKENS
+            )
+            backend.record_usage(response.usage)
+            return response.choices[0].message.content
+        
+        return await self.resilience.call(lambda: self.backends.call(send))
+
+    def build_messages(
+        self,
+        decision: DecisionCreate,
+        ml_scores: Dict[str, float],
+        retrieved_context: Dict[str, List[str]],
+        ml_input: List[Dict[str, str]],
+        profile: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, str]]:
+        """Messages of a single-call analysis (e.g. for Batch API requests)."""
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self._prepare_input_with_ids(decision, ml_scores, retrieved_context, ml_input, profile)}
+        ]
+
+    def parse_response(
+        self,
+        content: str,
+        decision: DecisionCreate,
+        messages: List[Dict[str, str]]
+    ) -> ReasoningAnalysis:
+        """Validate a response obtained outside the service (repair / re-ask as usual)."""
+        return self.run_sync(self._finalize(content, decision, messages))
+
+    def extract_value_statements(self, decision: DecisionCreate) -> List[Dict[str, str]]:
+        """
+        Verbatim value / goal statements of a decision for the user's value profile.
+        
+        Quotes not found in the user's own text are dropped.
+        
+        Returns:
+            List of {kind, quote}
+        """
+        limit = config.LLM_PROFILE_STATEMENTS_PER_DECISION
+        source = "\n".join([decision.context] + [arg.text for arg in decision.arguments])
+        messages = [
+            {"role": "system", "content": PROFILE_EXTRACTION_PROMPT.format(limit=limit)},
+            {"role": "user", "content": source}
+        ]
+        data = self.run_sync(self._chat_json(messages))
+        
+        statements = []
+        for item in data.get("items") or []:
+            if not (isinstance(item, list) and len(item) == 2 and all(isinstance(v, str) for v in item)):
+                continue
+            kind, quote = item[0].strip().lower(), item[1].strip()
+            if kind in PROFILE_KINDS and is_verbatim(quote, source):
+                statements.append({"kind": kind, "quote": quote})
+        return statements[:limit]
+
+    async def _chat_json(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Single async JSON-mode completion (malformed JSON is repaired locally)."""
+        content = await self._complete(messages)
+        data = repair_json(content)
+        if data is None:
+            raise ValueError(f"LLM response is not a JSON object: {content[:200]!r}")
+        return data
+
+    async def _finalize(
+        self,
+        content: Union[str, Dict[str, Any]],
+        decision: DecisionCreate,
+        messages: List[Dict[str, str]]
+    ) -> ReasoningAnalysis:
+        """
+        Validate a response, repairing it instead of failing where possible.
+        
+        Malformed JSON is fixed locally and valid sections are kept; only
+        the sections still missing or invalid are re-asked with a short
+        follow-up to the original messages.
+        
+        Args:
+            content: Raw response text, or an already parsed dict
+            decision: Decision data (expected variants)
+            messages: Messages of the original request
+            
+        Raises:
+            ValueError: If the analysis is still incomplete after the re-ask
+        """
+        data = repair_json(content) if isinstance(content, str) else content
+        expanded = expand_analysis(data or {})
+        salvaged, missing_variants, missing_fields = salvage_analysis(expanded, decision.variants)
+        if not missing_variants and not missing_fields:
+            try:
+                analysis = ReasoningAnalysis.parse_obj(expanded)
+                response_repairs.inc(outcome="valid")
+                return analysis
+            except Exception:
+                pass  # Invalid optional sections; the salvaged version drops them
+            response_repairs.inc(outcome="repaired")
+            return ReasoningAnalysis.parse_obj(salvaged)
+        
+        logger.warning(
+            f"LLM response incomplete (variants: {missing_variants}, fields: {missing_fields}), re-asking"
+        )
+        instruction = build_reask_instruction(missing_variants, missing_fields, config.LLM_COMPACT_OUTPUT)
+        reply = await self._complete(messages + [{"role": "user", "content": instruction}])
+        extra, _, _ = salvage_analysis(expand_analysis(repair_json(reply) or {}), decision.variants)
+        salvaged = merge_salvaged(salvaged, extra)
+        
+        _, missing_variants, missing_fields = salvage_analysis(salvaged, decision.variants)
+        if missing_variants or missing_fields:
+            response_repairs.inc(outcome="failed")
+            raise ValueError(
+                f"LLM analysis incomplete after re-ask (variants: {missing_variants}, fields: {missing_fields})"
+            )
+        response_repairs.inc(outcome="reasked")
+        return ReasoningAnalysis.parse_obj(salvaged)
+
+    async def analyze_decision_fanout(
+        self,
+        decision: DecisionCreate,
+        ml_scores: Dict[str, float],
+        retrieved_context: Dict[str, List[str]],
+        ml_input: List[Dict[str, str]],
+        on_partial: Optional[Callable[[Tuple[Any, ...], Any], None]] = None,
+        profile: Optional[List[Dict[str, Any]]] = None
+    ) -> ReasoningAnalysis:
+        """
+        Fan-out variant of analyze_decision: one call per variant plus one
+        cross-variant call, all concurrent, merged into one ReasoningAnalysis.
+        
+        Every call starts with the same system prompt + input (so the
+        provider's prompt cache can reuse it) and differs only in the
+        trailing task instruction. Wall-clock time is close to the slowest
+        single call instead of growing with the number of variants.
+        """
+        input_text = self._prepare_input_with_ids(decision, ml_scores, retrieved_context, ml_input, profile)
+        cache_text = "fanout\n" + input_text
+        
+        cached = self._get_cached(cache_text)
+        if cached is not None:
+            return self._parse(cached)
+        
+        compact = config.LLM_COMPACT_OUTPUT
+        variant_instruction = COMPACT_VARIANT_INSTRUCTION if compact else VARIANT_INSTRUCTION
+        cross_instruction = COMPACT_CROSS_VARIANT_INSTRUCTION if compact else CROSS_VARIANT_INSTRUCTION
+        prefix = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": input_text}
+        ]
+        
+        async def analyze_variant(variant: str) -> Dict[str, Any]:
+            result = await self._chat_json(
+                prefix + [{"role": "user", "content": variant_instruction.format(variant=variant)}]
+            )
+            # Tolerate the model wrapping its answer
+            result = result.get("v", result.get("argument_quality_comparison", result))
+            if set(result) == {variant} and isinstance(result[variant], dict):
+                result = result[variant]
+            result = expand_variant(result)
+            if on_partial:
+                on_partial(("argument_quality_comparison", variant), result)
+            return result
+        
+        async def analyze_cross_variant() -> Dict[str, Any]:
+            result = await self._chat_json(
+                prefix + [{"role": "user", "content": cross_instruction}]
+            )
+            result.pop("v", None)
+            result.pop("argument_quality_comparison", None)
+            result = expand_analysis(result)
+            if on_partial:
+                for key, value in result.items():
+                    on_partial((key,), value)
+            return result
+        
+        results = await asyncio.gather(
+            analyze_cross_variant(),
+            *(analyze_variant(variant) for variant in decision.variants),
+            return_exceptions=True
         )
+        # A failed part is left out and re-asked by _finalize (an empty variant
+        # section would expand to a valid one and never be re-asked)
+        for i, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.warning(f"LLM fan-out part {i} failed: {result!r}")
+                results[i] = None
         
-        return ReasoningAnalysis.parse_raw(response.choices[0].message.content)
+        merged = dict(results[0] or {})
+        merged["argument_quality_comparison"] = {
+            variant: result for variant, result in zip(decision.variants, results[1:]) if result is not None
+        }
+        analysis = await self._finalize(merged, decision, prefix)
+        self._store_cached(cache_text, analysis.json())
+        return analysis
+
+    async def analyze_decision_incremental(
+        self,
+        decision: DecisionCreate,
+        ml_scores: Dict[str, float],
+        retrieved_context: Dict[str, List[str]],
+        ml_input: List[Dict[str, str]],
+        previous: Dict[str, Any],
+        changes: Dict[str, List],
+        profile: Optional[List[Dict[str, Any]]] = None
+    ) -> ReasoningAnalysis:
+        """
+        Re-analysis after an argument edit (see argument_edits.py).
+        
+        Sections of variants without changes are kept from the previous
+        analysis. One call with the usual system + input prefix, followed
+        by the previous analysis and the changes, returns only the changed
+        variants and the cross-variant fields, so the output grows with
+        the edit rather than with the decision.
+        
+        Args:
+            previous: Previous analysis (full schema)
+            changes: diff_arguments() of the analyzed and the current arguments
+        """
+        input_text = self._prepare_input_with_ids(decision, ml_scores, retrieved_context, ml_input, profile)
+        unchanged = [v for v in decision.variants if v not in changes["variants"]]
+        kept, stale, _ = salvage_analysis(previous, unchanged)
+        redo = [v for v in decision.variants if v not in unchanged or v in stale]
+        
+        change_lines = [
+            f'+ {arg["id"]}: [{arg["variant_name"]}] [{arg["type"].upper()}] "{arg["text"]}"'
+            for arg in changes["added"]
+        ] + [
+            f'- [{arg["variant_name"]}] [{arg["type"].upper()}] "{arg["text"]}"'
+            for arg in changes["removed"]
+        ]
+        instruction = INCREMENTAL_INSTRUCTION.format(
+            previous=json.dumps(previous, ensure_ascii=False),
+            changes="\n".join(change_lines),
+            keys=describe_sections(redo, list(TOP_LEVEL_KEYS.values()), config.LLM_COMPACT_OUTPUT)
+        )
+        cache_text = "incremental\n" + input_text + "\n" + instruction
+        
+        cached = self._get_cached(cache_text)
+        if cached is not None:
+            return self._parse(cached)
+        
+        messages = [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": input_text},
+            {"role": "user", "content": instruction}
+        ]
+        content = await self._complete(messages)
+        fresh, _, _ = salvage_analysis(expand_analysis(repair_json(content) or {}), redo)
+        merged = merge_salvaged(fresh, {"argument_quality_comparison": kept["argument_quality_comparison"]})
+        analysis = await self._finalize(merged, decision, messages)
+        self._store_cached(cache_text, analysis.json())
+        return analysis
 
     def _prepare_input_with_ids(
         self, 
         decision: DecisionCreate, 
         ml_scores: Dict[str, float], 
-        retrieved_context: List[str],
-        ml_input: List[Dict[str, str]]
+        retrieved_context: Dict[str, List[str]],
+        ml_input: List[Dict[str, str]],
+        profile: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """
         Prepare input with strict ID mapping to prevent logic swap.
@@ -143,9 +635,10 @@ class LLMService:
         Arguments:
         {arg_uuid_1}: [Variant A] [PRO] "text..."
         {arg_uuid_2}: [Variant A] [CON] "text..."
-        """
-        parts = [f"Context: {decision.context}\n"]
         
+        With a non-empty value profile, the profile digest is sent instead
+        of raw archive entries (constant size however long the history is).
+        """
         # Group arguments by variant for clarity
         variant_args = {}
         for arg_data in ml_input:
@@ -154,31 +647,64 @@ class LLMService:
                 variant_args[variant] = []
             variant_args[variant].append(arg_data)
         
-        parts.append("Arguments (keyed by ID):")
+        argument_lines = []
         for variant in decision.variants:
-            parts.append(f"\n=== {variant} ===")
+            argument_lines.append(f"\n=== {variant} ===")
             args = variant_args.get(variant, [])
             for arg_data in args:
                 arg_id = arg_data['id']
                 arg_type = arg_data.get('type', 'essay').upper()
                 text = arg_data['text']
-                parts.append(f"{arg_id}: [{arg_type}] \"{text}\"")
+                argument_lines.append(f"{arg_id}: [{arg_type}] \"{text}\"")
         
-        parts.append("\nML Scores (by argument ID):")
-        for arg_id, score in ml_scores.items():
-            parts.append(f"  {arg_id}: {score:.1f}/100")
+        # Archive entries are listed once (best-ranked first), tagged with the variants they relate to
+        archive: Dict[str, List[str]] = {}
+        depth = max((len(texts) for texts in retrieved_context.values()), default=0)
+        for rank in range(depth):
+            for variant in decision.variants:
+                texts = retrieved_context.get(variant, [])
+                if rank < len(texts):
+                    archive.setdefault(texts[rank], []).append(variant)
+        archive_lines = [
+            f"  [{i}] (relevant to: {', '.join(variants)}) {ctx}"
+            for i, (ctx, variants) in enumerate(archive.items(), 1)
+        ]
         
-        parts.append("\nPast Similar Arguments:")
-        if retrieved_context:
-            for i, ctx in enumerate(retrieved_context, 1):
-                parts.append(f"  {i}. {ctx}")
+        builder = PromptBuilder(self.model, config.LLM_PROMPT_MAX_TOKENS)
+        builder.add(PromptSection(
+            "context", "", [f"Context: {decision.context}\n"], priority=0, trimmable=False
+        ))
+        builder.add(PromptSection(
+            "arguments", "Arguments (keyed by ID):", argument_lines, priority=0, trimmable=False
+        ))
+        builder.add(PromptSection(
+            "ml_scores", "\nML Scores (by argument ID):",
+            [f"  {arg_id}: {score:.1f}/100" for arg_id, score in ml_scores.items()],
+            priority=1
+        ))
+        if profile:
+            builder.add(PromptSection(
+                "profile", "\nUser Value Profile (stated in past decisions):", render_entries(profile),
+                priority=2, budget=config.LLM_PROFILE_MAX_TOKENS
+            ))
         else:
-            parts.append("  None")
-        
-        parts.append("\nIMPORTANT: Return analysis keyed by variant name, NOT by argument ID.")
-        parts.append("Aggregate insights per variant, citing specific argument IDs when relevant.")
+            builder.add(PromptSection(
+                "archive", "\nPast Similar Arguments:", archive_lines, priority=2,
+                budget=config.LLM_ARCHIVE_MAX_TOKENS,
+                item_max_tokens=config.LLM_ARCHIVE_ENTRY_MAX_TOKENS,
+                empty_text="  None"
+            ))
+        builder.add(PromptSection(
+            "instructions", "",
+            [
+                "\nIMPORTANT: Return analysis keyed by variant name, NOT by argument ID.",
+                "Aggregate insights per variant, citing specific argument IDs when relevant."
+            ],
+            priority=0, trimmable=False
+        ))
         
-        return "\n".join(parts)
+        prompt, _ = builder.build()
+        return prompt
 
 
 # Singleton
@@ -3,7 +3,7 @@ ML Scoring Service - Pairwise argument comparison using Cross-Encoder.
 Returns relative strength scores (0-100) based on raw score normalization.
 """
 
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from sentence_transformers import CrossEncoder
 import os
 import itertools
@@ -11,6 +11,8 @@ import random
 import math
 import logging
 from server.core.config import config
+from server.services.cache import get_cache, make_key
+from server.services.deadline import check_deadline
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,8 @@ class MLScoring:
                 model_name = 'cross-encoder/ms-marco-MiniLM-L-12-v2'
         
         self.model = CrossEncoder(model_name, max_length=512)
+        self.model_name = model_name
+        self.pair_cache = get_cache("pair_scores", max_entries=config.PAIR_SCORE_CACHE_SIZE)
         print(f"ML Scoring initialized with {model_name}")
     
     def _format_with_context(self, argument: str, context: str) -> str:
@@ -52,12 +56,21 @@ class MLScoring:
         text_a = self._format_with_context(arg_a, context)
         text_b = self._format_with_context(arg_b, context)
         
-        raw_score = self.model.predict([[text_a, text_b]])[0]
+        key = make_key(self.model_name, text_a, text_b)
+        raw_score = self.pair_cache.get(key)
+        if raw_score is None:
+            raw_score = float(self.model.predict([[text_a, text_b]])[0])
+            self.pair_cache.set(key, raw_score)
         winner = 1 if raw_score > 0 else 0
         
         return raw_score, winner
     
-    def score_arguments(self, arguments: List[Dict[str, str]], context: str) -> Dict[str, float]:
+    def score_arguments(
+        self,
+        arguments: List[Dict[str, str]],
+        context: str,
+        pair_scores: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
         """
         Score arguments via pairwise comparison + absolute quality assessment.
         Formula: Final Score = (Comparative Score + Absolute Quality Score) / 2
@@ -68,10 +81,107 @@ class MLScoring:
         Args:
             arguments: [{id, text}, ...]
             context: decision context
+            pair_scores: Raw pair scores by "id_a|id_b" from an earlier run of
+                the same decision; reused (in either order) instead of calling
+                the model, and filled with the pairs scored now
             
         Returns:
             {argument_id: combined_score (0-100)}
         """
+        pairs = self._select_pairs(arguments, pair_scores)
+        
+        # Pairwise comparisons (stop between pairs once the analysis deadline passed)
+        raw_scores = []
+        for i, j in pairs:
+            check_deadline("ML scoring")
+            arg_a, arg_b = arguments[i], arguments[j]
+            raw_score = self._known_pair(pair_scores, arg_a['id'], arg_b['id'])
+            if raw_score is None:
+                raw_score, _ = self.compare_arguments(arg_a['text'], arg_b['text'], context)
+                if pair_scores is not None:
+                    pair_scores[f"{arg_a['id']}|{arg_b['id']}"] = raw_score
+            raw_scores.append(raw_score)
+        
+        return self._combine(arguments, pairs, raw_scores)
+    
+    def score_many(
+        self,
+        items: List[Tuple[List[Dict[str, str]], str]],
+        pair_scores: Optional[List[Dict[str, float]]] = None
+    ) -> List[Dict[str, float]]:
+        """
+        score_arguments for several decisions with one cross-encoder call.
+        
+        Pairs are chosen per decision exactly as score_arguments does;
+        uncached pairs of all decisions are predicted in one batch.
+        
+        Args:
+            items: [(arguments, context)] per decision
+            pair_scores: Optional dict per decision, filled with raw pair scores
+            
+        Returns:
+            {argument_id: combined_score (0-100)} per decision, in input order
+        """
+        selected = [self._select_pairs(arguments) for arguments, _ in items]
+        requests = []  # (decision index, pair index, cache key, text_a, text_b)
+        for n, ((arguments, context), pairs) in enumerate(zip(items, selected)):
+            for k, (i, j) in enumerate(pairs):
+                text_a = self._format_with_context(arguments[i]['text'], context)
+                text_b = self._format_with_context(arguments[j]['text'], context)
+                requests.append((n, k, make_key(self.model_name, text_a, text_b), text_a, text_b))
+        
+        cached = self.pair_cache.get_many([key for _, _, key, _, _ in requests])
+        raw_scores: List[List[Optional[float]]] = [[None] * len(pairs) for pairs in selected]
+        pending = []
+        for n, k, key, text_a, text_b in requests:
+            raw_scores[n][k] = cached.get(key)
+            if raw_scores[n][k] is None:
+                pending.append((n, k, key, text_a, text_b))
+        
+        if pending:
+            check_deadline("ML scoring")
+            logger.info(f"Scoring {len(pending)} pairs of {len(items)} decisions in one batch")
+            predicted = [float(raw_score) for raw_score in self.model.predict([[a, b] for _, _, _, a, b in pending])]
+            for (n, k, _, _, _), raw_score in zip(pending, predicted):
+                raw_scores[n][k] = raw_score
+            self.pair_cache.set_many((key, raw_score) for (_, _, key, _, _), raw_score in zip(pending, predicted))
+        
+        results = []
+        for n, ((arguments, _), pairs) in enumerate(zip(items, selected)):
+            if pair_scores is not None:
+                pair_scores[n].update({
+                    f"{arguments[i]['id']}|{arguments[j]['id']}": raw_score
+                    for (i, j), raw_score in zip(pairs, raw_scores[n])
+                })
+            results.append(self._combine(arguments, pairs, raw_scores[n]))
+        return results
+    
+    def _select_pairs(
+        self,
+        arguments: List[Dict[str, str]],
+        pair_scores: Optional[Dict[str, float]] = None
+    ) -> List[Tuple[int, int]]:
+        """Argument index pairs to compare: all of them for small sets, a seeded sample otherwise."""
+        n = len(arguments)
+        if n <= self.MAX_ARGS_FULL:
+            return list(itertools.combinations(range(n), 2))
+        all_pairs = list(itertools.combinations(range(n), 2))
+        # Seeded by argument IDs: same input -> same pairs -> same scores
+        rng = random.Random("|".join(arg['id'] for arg in arguments))
+        if pair_scores:
+            pairs = self._sample_incremental(arguments, all_pairs, pair_scores, rng)
+        else:
+            pairs = rng.sample(all_pairs, min(len(all_pairs), self.MAX_PAIRS_SAMPLE))
+        print(f"⚠️ Sampling {len(pairs)} pairs from {n} arguments")
+        return pairs
+    
+    def _combine(
+        self,
+        arguments: List[Dict[str, str]],
+        pairs: List[Tuple[int, int]],
+        raw_scores: List[float]
+    ) -> Dict[str, float]:
+        """Final scores from raw pair scores (comparative) and absolute argument quality."""
         if not arguments:
             return {}
         
@@ -85,19 +195,8 @@ class MLScoring:
         scores_sum = {arg['id']: 0.0 for arg in arguments}
         comparison_count = {arg['id']: 0 for arg in arguments}
         
-        # Generate pairs
-        n = len(arguments)
-        if n <= self.MAX_ARGS_FULL:
-            pairs = list(itertools.combinations(range(n), 2))
-        else:
-            all_pairs = list(itertools.combinations(range(n), 2))
-            pairs = random.sample(all_pairs, min(len(all_pairs), self.MAX_PAIRS_SAMPLE))
-            print(f"⚠️ Sampling {len(pairs)} pairs from {n} arguments")
-        
-        # Pairwise comparisons
-        for i, j in pairs:
+        for (i, j), raw_score in zip(pairs, raw_scores):
             arg_a, arg_b = arguments[i], arguments[j]
-            raw_score, _ = self.compare_arguments(arg_a['text'], arg_b['text'], context)
             
             # Normalize: tanh(x/5) maps [-5,+5] to [-1,+1]
             normalized = math.tanh(raw_score / 5.0)
@@ -163,6 +262,57 @@ class MLScoring:
         
         return final_scores
     
+    @staticmethod
+    def _known_pair(pair_scores: Optional[Dict[str, float]], id_a: str, id_b: str) -> Optional[float]:
+        """Stored raw score of a pair (antisymmetric: the reversed pair scores -x)."""
+        if not pair_scores:
+            return None
+        if f"{id_a}|{id_b}" in pair_scores:
+            return pair_scores[f"{id_a}|{id_b}"]
+        if f"{id_b}|{id_a}" in pair_scores:
+            return -pair_scores[f"{id_b}|{id_a}"]
+        return None
+    
+    def _sample_incremental(
+        self,
+        arguments: List[Dict[str, str]],
+        all_pairs: List[Tuple[int, int]],
+        pair_scores: Dict[str, float],
+        rng: random.Random
+    ) -> List[Tuple[int, int]]:
+        """
+        Pair sample after an argument edit: pairs scored before are kept and
+        only pairs with a new argument are added, each new argument getting
+        at least one comparison. Model calls scale with the size of the edit.
+        
+        Known pairs beyond MAX_PAIRS_SAMPLE (they accumulate over repeated
+        edits) are dropped, but never the last one covering an argument.
+        """
+        def known(pair: Tuple[int, int]) -> bool:
+            return self._known_pair(pair_scores, arguments[pair[0]]['id'], arguments[pair[1]]['id']) is not None
+        
+        known_pairs = [p for p in all_pairs if known(p)]
+        pairs: List[Tuple[int, int]] = []
+        covered = set()
+        for pair in known_pairs:  # First the known pairs that cover another argument
+            if not set(pair) <= covered:
+                pairs.append(pair)
+                covered.update(pair)
+        kept = set(pairs)
+        pairs += [p for p in known_pairs if p not in kept][:max(0, self.MAX_PAIRS_SAMPLE - len(pairs))]
+        fresh = [p for p in all_pairs if not known(p) and not set(p) <= covered]
+        pairs += rng.sample(fresh, max(0, min(len(fresh), self.MAX_PAIRS_SAMPLE - len(pairs))))
+        covered = {i for pair in pairs for i in pair}
+        for i in range(len(arguments)):
+            if i not in covered:
+                candidates = [p for p in fresh if i in p]
+                if not candidates:
+                    continue
+                pair = rng.choice(candidates)
+                pairs.append(pair)
+                covered.update(pair)
+        return pairs
+    
     def score_arguments_by_variant(self, arguments: List[Dict[str, str]], context: str) -> Dict[str, float]:
         """Aggregate scores by variant name."""
         scores = self.score_arguments(arguments, context)
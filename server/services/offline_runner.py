@@ -0,0 +1,277 @@
+"""
+Offline Runner - the analysis pipeline over JSONL, without HTTP or the database.
+
+For evaluations and backfills over many decisions:
+  - Input: one decision per line (DecisionCreate fields, plus optional
+    "id" and "user_id"), read as a stream. Records without an id are
+    keyed by their content hash. Retrieval is scoped to the record's
+    user_id; records without one get no context unless cross-user
+    retrieval (the whole archive) is explicitly enabled.
+  - Pipeline: validation, ML scoring, RAG and LLM run as the same stage
+    graph as OrchestratorService.run_background_analysis, using its stage
+    methods. Indexing and value profiles are skipped, so offline runs never
+    write to the archive. `workers` decisions are in flight at once; stage
+    slots cap cross-encoder, embedding and LLM concurrency as in workers.
+  - Output: one result per line, written as soon as it finishes, in
+    completion order.
+  - Resume: IDs already in the output (except failed ones) are skipped.
+  - Sharding: shard i/N keeps the records whose ID hashes to i, so runs
+    can be split across machines without coordination.
+  - Stubs: any stage can be replaced by a cheap fake, to benchmark the
+    others on their own.
+
+CLI: python -m server.cli.offline_analysis
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+import hashlib
+import json
+import logging
+import os
+
+from server.core.config import config
+from server.schemas.decision import ArgumentQualityDetails, DecisionCreate, ReasoningAnalysis
+from server.services.admission import stage_slot
+from server.services.analysis_errors import InsufficientArgumentsError
+from server.services.deadline import Deadline, stage_budgets
+from server.services.idempotency import content_hash
+from server.services.llm_service import build_ml_input
+from server.services.stage_graph import Stage, StageFailed, StageGraph
+
+logger = logging.getLogger(__name__)
+
+STUBBABLE_STAGES = ("validate", "ml_scoring", "rag", "llm")
+
+
+@dataclass
+class OfflineRecord:
+    """One input line: a decision, or the reason it could not be read."""
+    id: str
+    decision: Optional[DecisionCreate] = None
+    user_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def read_records(lines: Iterable[str]) -> Iterator[OfflineRecord]:
+    """Parse JSONL lines lazily (blank lines skipped, unreadable ones yielded with an error)."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            payload = json.loads(line)
+            if not isinstance(payload, dict):
+                raise ValueError("Line is not a JSON object")
+            record_id = payload.pop("id", None)
+            user_id = payload.pop("user_id", None)
+            decision = DecisionCreate.parse_obj(payload)
+        except ValueError as e:  # Not a JSON object or not a valid decision (ValidationError is a ValueError)
+            yield OfflineRecord(id=f"line-{number}", error=str(e))
+            continue
+        yield OfflineRecord(
+            id=str(record_id) if record_id is not None else content_hash(decision),
+            decision=decision,
+            user_id=str(user_id) if user_id is not None else None
+        )
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N) with 0 <= i < N."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like i/N, got '{value}'")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"Shard index must be in 0..N-1, got '{value}'")
+    return index, count
+
+
+def shard_of(record_id: str, count: int) -> int:
+    """Stable shard of a record ID (same on every machine and run)."""
+    digest = hashlib.sha256(record_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count
+
+
+def finished_ids(path: str) -> Set[str]:
+    """
+    IDs with a result in an existing output file (failed ones are retried).
+
+    A line cut off by a crash is ignored; its decision runs again.
+    """
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get("status") != "failed":
+                done.add(result["id"])
+    return done
+
+
+def select_records(
+    records: Iterable[OfflineRecord],
+    shard: Optional[Tuple[int, int]] = None,
+    skip: Optional[Set[str]] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> Iterator[OfflineRecord]:
+    """Records of this shard not finished yet; stats counts the ones left out."""
+    stats = stats if stats is not None else {}
+    for record in records:
+        if shard is not None and shard_of(record.id, shard[1]) != shard[0]:
+            stats["other_shard"] = stats.get("other_shard", 0) + 1
+        elif skip and record.id in skip:
+            stats["resumed"] = stats.get("resumed", 0) + 1
+        else:
+            yield record
+
+
+def open_output(path: str, append: bool):
+    """Output file for results; appending after a cut-off last line starts a new line first."""
+    if append and os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+        out = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            out.write("\n")
+        return out
+    return open(path, "w", encoding="utf-8")
+
+
+def stub_analysis(decision: DecisionCreate) -> ReasoningAnalysis:
+    """Minimal valid analysis standing in for the LLM stage."""
+    return ReasoningAnalysis(
+        argument_quality_comparison={
+            variant: ArgumentQualityDetails(
+                strengths=[], weaknesses=[], logical_fallacies=[], missing_considerations=[], data_quality="stub"
+            )
+            for variant in decision.variants
+        },
+        alignment_with_model_scores="",
+        detected_reasoning_patterns="",
+        key_weak_points_to_reconsider=[],
+        final_note="LLM stage stubbed"
+    )
+
+
+class OfflineRunner:
+    def __init__(self, orchestrator=None, stubs: Sequence[str] = (), cross_user_retrieval: bool = False):
+        unknown = set(stubs) - set(STUBBABLE_STAGES)
+        if unknown:
+            raise ValueError(f"Unknown stages to stub: {sorted(unknown)}")
+        if orchestrator is None:
+            from server.services.orchestrator import get_orchestrator
+            orchestrator = get_orchestrator()
+        self.orchestrator = orchestrator
+        self.stubs = set(stubs)
+        self.cross_user_retrieval = cross_user_retrieval
+
+    def run(self, records: Iterable[OfflineRecord], workers: int = 4) -> Iterator[Dict[str, Any]]:
+        """
+        Results of all records in completion order.
+
+        At most 2 * workers records are read ahead, so the input is
+        streamed however large it is.
+        """
+        workers = max(1, workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="offline") as pool:
+            running = set()
+            for record in records:
+                running.add(pool.submit(self.run_one, record))
+                if len(running) >= 2 * workers:
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        yield future.result()
+            for future in as_completed(running):
+                yield future.result()
+
+    def run_one(self, record: OfflineRecord) -> Dict[str, Any]:
+        """
+        Analyze one record.
+
+        Returns:
+            {id, status: completed / rejected / failed / invalid, ...};
+            completed results carry ml_scores (per variant, as stored by the
+            API), argument_scores, analysis, retrieved_context and timeline
+        """
+        if record.error is not None:
+            return {"id": record.id, "status": "invalid", "error": record.error}
+        try:
+            return self._analyze(record)
+        except Exception as e:
+            logger.error(f"Offline analysis of {record.id} failed: {e}")
+            return {"id": record.id, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+    def _analyze(self, record: OfflineRecord) -> Dict[str, Any]:
+        decision_data = record.decision
+        ml_input = build_ml_input(decision_data)
+        deadline = Deadline.after(config.ANALYSIS_DEADLINE_SECONDS) if config.ANALYSIS_DEADLINE_SECONDS > 0 else None
+        budgets = stage_budgets(config.ANALYSIS_DEADLINE_SECONDS) if deadline else {}
+        graph = StageGraph([
+            Stage("validate", lambda r: self._validate(ml_input), budget=budgets.get("validate")),
+            Stage(
+                "ml_scoring", lambda r: self._score(decision_data, ml_input),
+                depends_on=("validate",), budget=budgets.get("ml_scoring")
+            ),
+            Stage(
+                "rag", lambda r: self._retrieve(record, decision_data),
+                depends_on=("validate",), required=False, fallback={}, budget=budgets.get("rag")
+            ),
+            Stage(
+                "llm", lambda r: self._call_llm(decision_data, r, ml_input),
+                depends_on=("validate", "ml_scoring", "rag"), budget=budgets.get("llm")
+            ),
+        ])
+        try:
+            results, timeline = graph.run(deadline=deadline)
+        except StageFailed as e:
+            if isinstance(e.error, InsufficientArgumentsError):
+                return {"id": record.id, "status": "rejected", "error": e.error.details, "timeline": e.timeline}
+            return {
+                "id": record.id,
+                "status": "failed",
+                "failed_stage": e.stage,
+                "error": f"{type(e.error).__name__}: {e.error}",
+                "timeline": e.timeline
+            }
+        return {
+            "id": record.id,
+            "status": "completed",
+            "ml_scores": self.orchestrator._variant_scores(results["ml_scoring"], ml_input),
+            "argument_scores": results["ml_scoring"],
+            "analysis": results["llm"].dict(),
+            "retrieved_context": self.orchestrator._flatten_context(results["rag"]),
+            "timeline": timeline
+        }
+
+    def _validate(self, ml_input: List[Dict[str, str]]):
+        if "validate" in self.stubs:
+            return {"is_valid": True}
+        return self.orchestrator._validate(ml_input)
+
+    def _score(self, decision_data: DecisionCreate, ml_input: List[Dict[str, str]]) -> Dict[str, float]:
+        if "ml_scoring" in self.stubs:
+            return {arg["id"]: 50.0 for arg in ml_input}
+        return self.orchestrator._score(decision_data, ml_input)
+
+    def _retrieve(self, record: OfflineRecord, decision_data: DecisionCreate) -> Dict[str, List[str]]:
+        if "rag" in self.stubs:
+            return {variant: [] for variant in decision_data.variants}
+        if record.user_id is None and not self.cross_user_retrieval:
+            # Searching without a user_id would return other users' decisions
+            return {variant: [] for variant in decision_data.variants}
+        # The record's own vectors (if it was indexed under its ID) are excluded
+        return self.orchestrator._retrieve(record.id, decision_data, record.user_id)
+
+    def _call_llm(self, decision_data: DecisionCreate, results: Dict, ml_input: List[Dict[str, str]]) -> ReasoningAnalysis:
+        if "llm" in self.stubs:
+            return stub_analysis(decision_data)
+        with stage_slot("llm"):
+            return self.orchestrator._call_llm(
+                None, decision_data, results["ml_scoring"], results["rag"], ml_input
+            )
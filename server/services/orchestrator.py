@@ -1,16 +1,42 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
+from datetime import datetime
+import time
 import logging
 
 from sqlalchemy.orm import Session
-from server.schemas.decision import DecisionCreate, AnalysisResponse
+from server.schemas.decision import DecisionCreate, AnalysisResponse, ReasoningAnalysis
 from server.repositories.decision_repository import DecisionRepository
+from server.repositories.profile_repository import ProfileRepository
 from server.services.ml_scoring import get_ml_scoring
-from server.services.llm_service import get_llm_service
+from server.services.llm_service import get_llm_service, build_ml_input
 from server.services.engine import engine
+from server.services.analysis_events import analysis_events
+from server.services.analysis_reuse import match_variants, arguments_match, patch_analysis
+from server.services.argument_edits import diff_arguments
+from server.services.value_profile import merge_entries
+from server.services.stage_graph import Stage, StageFailed, StageGraph
+from server.services.analysis_errors import AnalysisRetry, InsufficientArgumentsError
+from server.services.admission import stage_slot
+from server.services.deadline import Deadline, analysis_seconds, stage_budgets
+from server.core.config import config
+from server.core.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Stages whose output is saved on the decision and restored by later attempts
+CHECKPOINT_STAGES = ("ml_scoring", "rag", "index")
+
+reuse_checks = metrics.counter(
+    "analysis_reuse_checks_total",
+    "Near-duplicate reuse checks by outcome (reused / below_threshold / arguments_differ / no_candidate / error)"
+)
+reuse_similarity = metrics.histogram(
+    "analysis_reuse_similarity",
+    "Cosine similarity of the closest prior decision",
+    buckets=[0.5, 0.7, 0.8, 0.9, 0.95, 0.97, 0.99]
+)
+
 
 class OrchestratorService:
     def __init__(self):
@@ -18,117 +44,603 @@ class OrchestratorService:
         self.llm_service = get_llm_service()
         self.engine = engine
 
-    def run_background_analysis(self, db: Session, decision_id: UUID, decision_data: DecisionCreate):
-        """Executed in background. Coordinates services and updates DB."""
+    def run_background_analysis(
+        self,
+        db: Session,
+        decision_id: UUID,
+        decision_data: DecisionCreate,
+        final_attempt: bool = True
+    ):
+        """
+        Executed in background. Coordinates services and updates DB.
+        
+        On a failed non-final attempt (queued job with retries left) the
+        decision is reset to pending and AnalysisRetry is raised so the job
+        is retried; after the final attempt it is marked failed and can be
+        retried later (POST /analysis/{id}/retry). Nothing is deleted.
+        
+        Stages run as a DAG: ML scoring and RAG retrieval both only need
+        validation and run concurrently; the LLM waits for both. Each
+        stage keeps its policy (ML / LLM failures fail the attempt, RAG and
+        indexing degrade), and the per-stage timeline is stored with the
+        decision.
+        
+        Finished stage outputs (ML scores, retrieved context, indexing) are
+        checkpointed on the decision, so a later attempt resumes after them:
+        a failed LLM call never repeats cross-encoder or embedding work.
+        
+        Each attempt has a deadline (ANALYSIS_DEADLINE_SECONDS) split into
+        stage budgets: optional stages are skipped or cut short when time is
+        tight, and in-flight calls are cancelled when it passes.
+        
+        After an argument edit (PATCH /analysis/{id}/arguments) only the
+        changed part is redone: new argument pairs, retrieval for changed
+        variants and an incremental LLM call (see argument_edits.py).
+        """
         repo = DecisionRepository(db)
+        started = time.perf_counter()
+        outcome = "failed"
+        deadline = Deadline.after(config.ANALYSIS_DEADLINE_SECONDS) if config.ANALYSIS_DEADLINE_SECONDS > 0 else None
+        budgets = stage_budgets(config.ANALYSIS_DEADLINE_SECONDS) if deadline else {}
         try:
             # 1. Update status to analyzing
-            repo.update_analysis(decision_id, status="analyzing")
-            
-            # 2. VALIDATION GUARDRAILS - Check argument quality
-            from server.services.argument_validator import ArgumentQualityValidator
-            import uuid
-            
-            # Generate strict UUIDs for each argument (prevents logic swap)
-            ml_input = []
-            for i, arg in enumerate(decision_data.arguments):
-                arg_id = str(uuid.uuid4())  # Unique ID for each argument
-                ml_input.append({
-                    "id": arg_id,
-                    "text": arg.text,
-                    "variant_name": arg.variant_name,
-                    "type": arg.type
-                })
-            
-            # Validate argument quality
-            validation_result = ArgumentQualityValidator.validate_arguments(ml_input)
-            
-            if not validation_result['is_valid']:
-                # Insufficient data - fail with clear message
-                error_details = {
-                    "error": "INSUFFICIENT_DATA",
-                    "message": "Some arguments lack sufficient reasoning",
-                    "invalid_arguments": validation_result['invalid_arguments'],
-                    "quality_score": validation_result['quality_score']
-                }
-                repo.update_analysis(
-                    decision_id,
-                    status="failed",
-                    llm_analysis=error_details
-                )
-                logger.warning(f"Analysis rejected for {decision_id}: {error_details}")
-                return
+            db_decision = repo.update_analysis(decision_id, status="analyzing")
+            analysis_events.publish(decision_id, "status", {"status": "analyzing"})
+            user_id = db_decision.user_id
             
-            logger.info(f"Validation passed: {validation_result['valid_arguments']}/{validation_result['total_arguments']} arguments valid")
+            # Content-derived IDs for each argument (prevents logic swap, stable across resubmits)
+            ml_input = build_ml_input(decision_data)
+            stored = db_decision.stage_checkpoints or {}
+            checkpoints = self._restore_checkpoints(stored, decision_data, ml_input)
+            pair_scores = dict(stored.get("ml_pairs") or {})
+            edit = stored.get("edit")
+            if checkpoints:
+                logger.info(f"Resuming {decision_id} after stages {sorted(checkpoints)}")
             
-            # 3. ML Scoring (with absolute quality)
+            graph = StageGraph([
+                Stage("validate", lambda r: self._validate(ml_input), budget=budgets.get("validate")),
+                Stage(
+                    "ml_scoring", lambda r: self._score(decision_data, ml_input, pair_scores),
+                    depends_on=("validate",), budget=budgets.get("ml_scoring")
+                ),
+                Stage(
+                    "rag", lambda r: self._retrieve(decision_id, decision_data, user_id, stored.get("rag")),
+                    depends_on=("validate",), required=False, fallback={}, budget=budgets.get("rag")
+                ),
+                Stage(
+                    "llm", lambda r: self._analyze(db, repo, decision_id, user_id, decision_data, r, ml_input, edit),
+                    depends_on=("validate", "ml_scoring", "rag"), budget=budgets.get("llm")
+                ),
+                Stage(
+                    "index", lambda r: self._index(decision_id, decision_data, ml_input, user_id, db_decision.timestamp),
+                    depends_on=("llm",), required=False, budget=budgets.get("index")
+                ),
+            ])
             try:
-                logger.info(f"ML Scoring: {len(ml_input)} arguments")
-                ml_scores = self.ml_scoring.score_arguments(ml_input, decision_data.context)
-            except Exception as e:
-                logger.error(f"ML Scoring failed: {str(e)}")
-                self._rollback_and_delete(decision_id, repo)
-                return
-            
-            # 4. RAG (graceful degradation if fails)
-            retrieved_context = []
-            try:
-                query = f"{decision_data.context}\n" + "\n".join([a.text for a in decision_data.arguments])
-                logger.info("RAG: Retrieving context")
-                retrieved_context = self.engine.simple_retrieval(query, top_k=3)
-            except Exception as e:
-                logger.warning(f"RAG retrieval failed, continuing without context: {str(e)}")
-                # Continue without RAG context - not critical
-                retrieved_context = []
-            
-            # 5. LLM Analysis (with strict ID mapping)
-            try:
-                logger.info("LLM: Analyzing decision")
-                reasoning_analysis = self.llm_service.analyze_decision(
-                    decision_data, ml_scores, retrieved_context, ml_input
+                results, timeline = graph.run(
+                    checkpoints,
+                    on_result=lambda stage, value: self._checkpoint(
+                        repo, decision_id, stage, value, ml_input, pair_scores
+                    ),
+                    deadline=deadline
                 )
-            except Exception as e:
-                logger.error(f"LLM Analysis failed: {str(e)}")
-                self._rollback_and_delete(decision_id, repo)
+            except StageFailed as e:
+                logger.info(f"Stage timeline for {decision_id}: {e.timeline}")
+                if isinstance(e.error, InsufficientArgumentsError):
+                    # Insufficient data - fail with clear message
+                    repo.update_analysis(
+                        decision_id,
+                        status="failed",
+                        llm_analysis=e.error.details,
+                        stage_timeline=e.timeline
+                    )
+                    analysis_events.publish(decision_id, "failed", e.error.details)
+                    logger.warning(f"Analysis rejected for {decision_id}: {e.error.details}")
+                    outcome = "rejected"
+                    return
+                logger.error(f"{e.stage} stage failed: {str(e.error)}")
+                self._handle_failure(decision_id, repo, e, final_attempt, e.timeline)
                 return
             
-            # 6. Indexing in Qdrant (graceful degradation if fails)
-            try:
-                logger.info("Indexing decision in Qdrant")
-                self.engine.index_decision(str(decision_id), decision_data.context, ml_input)
-            except Exception as e:
-                logger.warning(f"Qdrant indexing failed, but analysis completed: {str(e)}")
-                # Don't fail the entire analysis if indexing fails
+            reasoning_analysis = results["llm"]
+            retrieved_context = self._flatten_context(results["rag"])
             
-            # 7. Final Update (Success)
-            # TRANSFORM: Map UUID scores to Variant Names for UI display
-            ui_ml_scores = {}
-            for arg in ml_input:
-                if arg['id'] in ml_scores:
-                    ui_ml_scores[arg['variant_name']] = ml_scores[arg['id']]
+            # Final Update (Success)
+            ui_ml_scores = self._variant_scores(results["ml_scoring"], ml_input)
 
             repo.update_analysis(
                 decision_id, 
                 status="completed", 
                 ml_scores=ui_ml_scores,
                 llm_analysis=reasoning_analysis.dict(),
-                retrieved_context=retrieved_context
+                retrieved_context=retrieved_context,
+                stage_timeline=timeline
             )
-            logger.info(f"Analysis completed successfully for {decision_id}")
+            analysis_events.publish(decision_id, "completed", {
+                "ml_scores": ui_ml_scores,
+                "llm_analysis": reasoning_analysis.dict(),
+                "retrieved_context": retrieved_context
+            })
+            logger.info(f"Analysis completed successfully for {decision_id}: {timeline}")
+            outcome = "completed"
+            if edit is not None:
+                self._clear_edit(repo, decision_id)
+            else:
+                # Fold this decision's stated values into the user's profile (once:
+                # the first analysis already did it for an edited decision, and
+                # folded entries cannot be told apart to be replaced)
+                self._update_profile(db, user_id, decision_id, decision_data, db_decision.timestamp)
             
+        except AnalysisRetry:
+            outcome = "retried"
+            raise
         except Exception as e:
             logger.error(f"Unexpected error in analysis: {str(e)}")
-            self._rollback_and_delete(decision_id, repo)
+            self._handle_failure(decision_id, repo, e, final_attempt)
+        finally:
+            analysis_seconds.observe(time.perf_counter() - started, outcome=outcome)
+
+    @staticmethod
+    def _flatten_context(variant_context: Dict[str, List[str]]) -> List[str]:
+        """Flat, deduplicated list of retrieved context for storage/UI."""
+        retrieved_context = []
+        for texts in variant_context.values():
+            for text in texts:
+                if text not in retrieved_context:
+                    retrieved_context.append(text)
+        return retrieved_context
+
+    @staticmethod
+    def _variant_scores(ml_scores: Dict[str, float], ml_input: List[Dict[str, str]]) -> Dict[str, float]:
+        """TRANSFORM: Map UUID scores to Variant Names for UI display."""
+        ui_ml_scores = {}
+        for arg in ml_input:
+            if arg['id'] in ml_scores:
+                ui_ml_scores[arg['variant_name']] = ml_scores[arg['id']]
+        return ui_ml_scores
+
+    def _handle_failure(
+        self,
+        decision_id: UUID,
+        repo: DecisionRepository,
+        error: Exception,
+        final_attempt: bool,
+        timeline: Optional[List[Dict]] = None
+    ):
+        """Reset for the next attempt, or mark failed (checkpoints are kept for a manual retry)."""
+        try:
+            repo.db.rollback()
+            if final_attempt:
+                details = {
+                    "error": "ANALYSIS_FAILED",
+                    "message": "Analysis failed. Finished stages were saved, retry to resume",
+                    "failed_stage": getattr(error, "stage", None),
+                    "technical_details": str(error)
+                }
+                repo.update_analysis(decision_id, status="failed", llm_analysis=details, stage_timeline=timeline)
+                analysis_events.publish(decision_id, "failed", details)
+            else:
+                repo.update_analysis(decision_id, status="pending", stage_timeline=timeline)
+                analysis_events.publish(decision_id, "status", {"status": "retrying"})
+        except Exception as e:
+            logger.error(f"Recording failure of {decision_id} failed: {e}")
+        if not final_attempt:
+            raise AnalysisRetry(str(error)) from error
+
+    def prefetch_batch(self, db: Session, items: List[Tuple[UUID, DecisionCreate]]):
+        """
+        ML scoring and RAG retrieval for several decisions at once (jobs of
+        one bulk submission claimed together), checkpointed on each decision
+        so its own run_background_analysis resumes at the LLM stage.
+        
+        One cross-encoder call scores the pairs of all decisions; one
+        embedding call and one Qdrant round trip retrieve their context.
+        Decisions failing validation or already checkpointed are left to
+        their own run. Failures only cost the batching.
+        """
+        from server.services.argument_validator import ArgumentQualityValidator
+        
+        repo = DecisionRepository(db)
+        pending = []
+        for decision_id, decision_data in items:
+            db_decision = repo.get_by_id(decision_id)
+            if db_decision is None:
+                continue
+            ml_input = build_ml_input(decision_data)
+            restored = self._restore_checkpoints(db_decision.stage_checkpoints, decision_data, ml_input)
+            if {"ml_scoring", "rag"} <= set(restored):
+                continue
+            if not ArgumentQualityValidator.validate_arguments(ml_input)["is_valid"]:
+                continue
+            pending.append((decision_id, decision_data, ml_input, db_decision.user_id))
+        if not pending:
+            return
+        
+        logger.info(f"Batched ML scoring and RAG for {len(pending)} decisions")
+        try:
+            pair_scores = [{} for _ in pending]
+            with stage_slot("cross_encoder"):
+                scores = self.ml_scoring.score_many(
+                    [(ml_input, decision_data.context) for _, decision_data, ml_input, _ in pending], pair_scores
+                )
+            for (decision_id, _, ml_input, _), decision_scores, pairs in zip(pending, scores, pair_scores):
+                self._checkpoint(repo, decision_id, "ml_scoring", decision_scores, ml_input, pairs)
+        except Exception as e:
+            logger.warning(f"Batched ML scoring failed, decisions score on their own: {str(e)}")
+            db.rollback()
+        
+        try:
+            requests = [
+                (
+                    decision_data.context,
+                    {
+                        v: [a.text for a in decision_data.arguments if a.variant_name == v]
+                        for v in decision_data.variants
+                    },
+                    str(user_id),
+                    str(decision_id)
+                )
+                for decision_id, decision_data, _, user_id in pending
+            ]
+            with stage_slot("embedding"):
+                contexts = self.engine.retrieve_many(requests, top_k=3)
+            for (decision_id, _, ml_input, _), context in zip(pending, contexts):
+                self._checkpoint(repo, decision_id, "rag", context, ml_input)
+        except Exception as e:
+            logger.warning(f"Batched retrieval failed, decisions retrieve on their own: {str(e)}")
+            db.rollback()
+
+    def abandon_analysis(self, db: Session, decision_id: UUID):
+        """Mark failed a decision whose job ran out of attempts without finishing (e.g. worker crashes)."""
+        self._handle_failure(
+            decision_id, DecisionRepository(db), RuntimeError("Analysis job ran out of attempts"), final_attempt=True
+        )
+
+    def _restore_checkpoints(
+        self,
+        checkpoints: Optional[Dict],
+        decision_data: DecisionCreate,
+        ml_input: List[Dict[str, str]]
+    ) -> Dict:
+        """Stage outputs of earlier attempts that still match the decision's arguments."""
+        checkpoints = checkpoints or {}
+        argument_ids = sorted(arg["id"] for arg in ml_input)
+        restored = {}
+        scores = checkpoints.get("ml_scoring")
+        if scores is not None and sorted(scores) == argument_ids:  # Scores are normalized over the whole set
+            restored["ml_scoring"] = scores
+        context = checkpoints.get("rag")
+        if context is not None and set(context) == set(decision_data.variants):
+            restored["rag"] = context
+        if checkpoints.get("index") == argument_ids:
+            restored["index"] = None
+        return restored
+
+    def _checkpoint(
+        self,
+        repo: DecisionRepository,
+        decision_id: UUID,
+        stage: str,
+        output,
+        ml_input: List[Dict[str, str]],
+        pair_scores: Optional[Dict[str, float]] = None
+    ):
+        """
+        Save a finished stage's output on the decision.
+        
+        Indexing is recorded with the argument IDs it indexed, ML scoring
+        together with its raw pair scores (reused after argument edits).
+        Failures only cost resumability.
+        """
+        if stage not in CHECKPOINT_STAGES:
+            return
+        if stage == "index":
+            output = sorted(arg["id"] for arg in ml_input)
+        try:
+            repo.save_checkpoint(decision_id, stage, output)
+            if stage == "ml_scoring" and pair_scores:
+                repo.save_checkpoint(decision_id, "ml_pairs", pair_scores)
+        except Exception as e:
+            logger.warning(f"Checkpointing {stage} of {decision_id} failed: {str(e)}")
+            repo.db.rollback()
 
-    def _rollback_and_delete(self, decision_id: UUID, repo: DecisionRepository):
-        """Rollback: delete vectors and decision record."""
+    def _clear_edit(self, repo: DecisionRepository, decision_id: UUID):
+        """Drop the edit state once the re-analysis completed (a stale one would only cost a diff)."""
         try:
-            logger.warning(f"Rolling back decision {decision_id} due to failure...")
-            self.engine.delete_decision_vectors(str(decision_id))
-            repo.delete(decision_id)
-            logger.info(f"Rollback successful for {decision_id}")
+            repo.clear_checkpoint(decision_id, "edit")
         except Exception as e:
-            logger.error(f"Rollback failed for {decision_id}: {e}")
+            logger.warning(f"Clearing edit state of {decision_id} failed: {str(e)}")
+            repo.db.rollback()
+
+    def _validate(self, ml_input: List[Dict[str, str]]) -> Dict:
+        """Validation guardrails - check argument quality."""
+        from server.services.argument_validator import ArgumentQualityValidator
+        
+        validation_result = ArgumentQualityValidator.validate_arguments(ml_input)
+        if not validation_result['is_valid']:
+            raise InsufficientArgumentsError({
+                "error": "INSUFFICIENT_DATA",
+                "message": "Some arguments lack sufficient reasoning",
+                "invalid_arguments": validation_result['invalid_arguments'],
+                "quality_score": validation_result['quality_score']
+            })
+        logger.info(f"Validation passed: {validation_result['valid_arguments']}/{validation_result['total_arguments']} arguments valid")
+        return validation_result
+
+    def _score(
+        self,
+        decision_data: DecisionCreate,
+        ml_input: List[Dict[str, str]],
+        pair_scores: Optional[Dict[str, float]] = None
+    ) -> Dict[str, float]:
+        """ML Scoring (with absolute quality); pairs in pair_scores are not scored again."""
+        logger.info(f"ML Scoring: {len(ml_input)} arguments ({len(pair_scores or {})} known pairs)")
+        with stage_slot("cross_encoder"):
+            return self.ml_scoring.score_arguments(ml_input, decision_data.context, pair_scores)
+
+    def _retrieve(
+        self,
+        decision_id: Optional[UUID],
+        decision_data: DecisionCreate,
+        user_id: Optional[UUID],
+        known: Optional[Dict[str, List[str]]] = None
+    ) -> Dict[str, List[str]]:
+        """
+        RAG context per variant (optional stage: failures continue without context).
+        
+        Variants in known (context kept after an argument edit) are not
+        searched again. The decision's own vectors are excluded. Without a
+        user_id the whole archive is searched (offline runs with cross-user
+        retrieval enabled only).
+        """
+        known = {v: texts for v, texts in (known or {}).items() if v in decision_data.variants}
+        variant_arguments = {
+            v: [a.text for a in decision_data.arguments if a.variant_name == v]
+            for v in decision_data.variants if v not in known
+        }
+        if not variant_arguments:
+            return known
+        logger.info(f"RAG: Retrieving context for {len(variant_arguments)} variants")
+        with stage_slot("embedding"):
+            context = self.engine.retrieve_per_variant(
+                decision_data.context, variant_arguments, top_k=3,
+                user_id=str(user_id) if user_id else None,
+                exclude_decision_id=str(decision_id) if decision_id else None
+            )
+        return {v: known[v] if v in known else context.get(v, []) for v in decision_data.variants}
+
+    def _index(
+        self,
+        decision_id: UUID,
+        decision_data: DecisionCreate,
+        ml_input: List[Dict[str, str]],
+        user_id: UUID,
+        timestamp: Optional[datetime]
+    ):
+        """Indexing in Qdrant (optional stage: the analysis completes without it)."""
+        with stage_slot("embedding"):
+            self.engine.index_decision(
+                str(decision_id), decision_data.context, ml_input,
+                user_id=str(user_id), timestamp=timestamp
+            )
+
+    def _analyze(
+        self,
+        db: Session,
+        repo: DecisionRepository,
+        decision_id: UUID,
+        user_id: UUID,
+        decision_data: DecisionCreate,
+        results: Dict,
+        ml_input: List[Dict[str, str]],
+        edit: Optional[Dict] = None
+    ) -> ReasoningAnalysis:
+        """
+        LLM Analysis (with strict ID mapping), unless a near-duplicate can be reused.
+        
+        After an argument edit the previous analysis is updated for the
+        changes instead (incremental call).
+        """
+        if edit is not None:
+            return self._analyze_edit(db, user_id, decision_data, results, ml_input, edit)
+        reasoning_analysis = self._reuse_prior_analysis(repo, user_id, decision_data, ml_input)
+        if reasoning_analysis is not None:
+            return reasoning_analysis
+        logger.info("LLM: Analyzing decision")
+        profile = self._load_profile(db, user_id)
+        with stage_slot("llm"):
+            return self._call_llm(
+                decision_id, decision_data, results["ml_scoring"], results["rag"], ml_input, profile
+            )
+
+    def _analyze_edit(
+        self,
+        db: Session,
+        user_id: UUID,
+        decision_data: DecisionCreate,
+        results: Dict,
+        ml_input: List[Dict[str, str]],
+        edit: Dict
+    ) -> ReasoningAnalysis:
+        """Incremental LLM analysis against the analysis and arguments saved by the edit."""
+        changes = diff_arguments(edit["arguments"], ml_input)
+        if not changes["variants"]:
+            return ReasoningAnalysis.parse_obj(edit["analysis"])  # Edit was reverted
+        logger.info(
+            f"LLM: Re-analyzing {changes['variants']} after argument edit "
+            f"(+{len(changes['added'])} / -{len(changes['removed'])})"
+        )
+        profile = self._load_profile(db, user_id)
+        with stage_slot("llm"):
+            return self.llm_service.run_sync(
+                self.llm_service.analyze_decision_incremental(
+                    decision_data, results["ml_scoring"], results["rag"], ml_input,
+                    edit["analysis"], changes, profile=profile
+                )
+            )
+
+    def _call_llm(
+        self,
+        decision_id: Optional[UUID],
+        decision_data: DecisionCreate,
+        ml_scores: Dict[str, float],
+        variant_context: Dict[str, List[str]],
+        ml_input: List[Dict[str, str]],
+        profile: Optional[List[Dict]] = None
+    ) -> ReasoningAnalysis:
+        """LLM call in the configured mode; partial results are published unless decision_id is None (offline runs)."""
+        def on_partial(path, value):
+            analysis_events.publish(decision_id, "partial", {"path": list(path), "value": value})
+        
+        if decision_id is None:
+            on_partial = None
+        
+        if config.LLM_FANOUT_ENABLED and len(decision_data.variants) > 1:
+            return self.llm_service.run_sync(
+                self.llm_service.analyze_decision_fanout(
+                    decision_data, ml_scores, variant_context, ml_input,
+                    on_partial=on_partial, profile=profile
+                )
+            )
+        if config.LLM_STREAMING:
+            return self.llm_service.run_sync(
+                self.llm_service.analyze_decision_stream(
+                    decision_data, ml_scores, variant_context, ml_input,
+                    on_partial=on_partial, profile=profile
+                )
+            )
+        return self.llm_service.analyze_decision(
+            decision_data, ml_scores, variant_context, ml_input, profile=profile
+        )
+
+    def _load_profile(self, db: Session, user_id: UUID) -> List[Dict]:
+        """User's value profile entries (empty = prompt falls back to raw archive)."""
+        if not config.LLM_PROFILE_ENABLED:
+            return []
+        try:
+            return ProfileRepository(db).get_entries(user_id)
+        except Exception as e:
+            logger.warning(f"Loading value profile failed, using archive: {str(e)}")
+            db.rollback()
+            return []
+
+    def _update_profile(
+        self,
+        db: Session,
+        user_id: UUID,
+        decision_id: UUID,
+        decision_data: DecisionCreate,
+        timestamp: Optional[datetime]
+    ):
+        """
+        Merge the decision's verbatim value statements into the user's profile.
+        
+        One small LLM call per decision keeps the profile current, so no
+        prompt ever needs the full history. Failures only cost freshness.
+        """
+        if not config.LLM_PROFILE_ENABLED:
+            return
+        try:
+            with stage_slot("llm"):
+                statements = self.llm_service.extract_value_statements(decision_data)
+            entries = [
+                {
+                    "kind": s["kind"],
+                    "quote": s["quote"],
+                    "decision_id": str(decision_id),
+                    "timestamp": timestamp.isoformat() if timestamp else None
+                }
+                for s in statements
+            ]
+            profiles = ProfileRepository(db)
+            profile = profiles.get_for_update(user_id)  # Serializes concurrent analyses of one user
+            profiles.save(profile, merge_entries(profile.entries or [], entries, config.LLM_PROFILE_MAX_ENTRIES))
+            logger.info(f"Value profile of {user_id}: {len(entries)} statements from {decision_id}")
+        except Exception as e:
+            logger.warning(f"Value profile update failed for {decision_id}: {str(e)}")
+            db.rollback()
+
+    def _reuse_prior_analysis(
+        self,
+        repo: DecisionRepository,
+        user_id: UUID,
+        decision_data: DecisionCreate,
+        ml_input: List[Dict[str, str]]
+    ) -> Optional[ReasoningAnalysis]:
+        """
+        Reuse the user's own near-duplicate prior analysis instead of calling the LLM.
+        
+        Never raises: any problem just means no reuse.
+        """
+        if not config.REUSE_ENABLED:
+            return None
+        try:
+            with stage_slot("embedding"):
+                match = self.engine.find_similar_decision(decision_data.context, ml_input, str(user_id))
+            if match is None:
+                reuse_checks.inc(outcome="no_candidate")
+                return None
+            
+            prior_id, similarity = match
+            reuse_similarity.observe(similarity)
+            if similarity < config.REUSE_SIMILARITY_THRESHOLD:
+                reuse_checks.inc(outcome="below_threshold")
+                return None
+            
+            prior = repo.get_by_id(UUID(prior_id))
+            if (
+                prior is None
+                or prior.user_id != user_id
+                or prior.analysis_status != "completed"
+                or not (prior.llm_analysis or {}).get("argument_quality_comparison")
+            ):
+                reuse_checks.inc(outcome="no_candidate")
+                return None
+            
+            variant_map = match_variants(decision_data.variants, [v.name for v in prior.variants])
+            prior_arguments = [
+                {"variant_name": a.variant_name, "type": a.type, "text": a.text}
+                for a in prior.arguments
+            ]
+            if variant_map is None or not arguments_match(
+                ml_input, prior_arguments, variant_map, config.REUSE_ARGUMENT_MATCH_RATIO
+            ):
+                reuse_checks.inc(outcome="arguments_differ")
+                return None
+            
+            reuse_checks.inc(outcome="reused")
+            logger.info(f"Reusing analysis of {prior_id} (similarity {similarity:.3f})")
+            return ReasoningAnalysis.parse_obj(patch_analysis(prior.llm_analysis, variant_map))
+        except Exception as e:
+            logger.warning(f"Analysis reuse check failed, calling LLM: {str(e)}")
+            reuse_checks.inc(outcome="error")
+            return None
+
+    def purge_decisions(self, db: Session, user_id: UUID, before: Optional[datetime] = None) -> int:
+        """
+        Purge user's archive (or everything older than cutoff).
+        
+        Works in chunks: each chunk's vectors are removed with one filtered
+        delete, then its rows with chunked DELETE statements.
+        
+        Returns:
+            Number of deleted decisions
+        """
+        repo = DecisionRepository(db)
+        profiles = ProfileRepository(db)
+        deleted = 0
+        while True:
+            decision_ids = repo.get_ids(user_id, before=before, limit=repo.PURGE_CHUNK_SIZE)
+            if not decision_ids:
+                break
+            self.engine.delete_vectors(user_id=str(user_id), decision_ids=[str(d) for d in decision_ids])
+            deleted += repo.delete_many(decision_ids)
+            profiles.remove_decisions(user_id, decision_ids)
+
+        # Sweep vectors whose rows are already gone (e.g. deleted while being indexed)
+        self.engine.delete_vectors(user_id=str(user_id), before=before)
+        logger.info(f"Purged {deleted} decisions for user {user_id} (before={before})")
+        return deleted
 
 
 # Singleton
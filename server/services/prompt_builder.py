@@ -0,0 +1,134 @@
+"""
+Token-budgeted Prompt Builder.
+
+Prompts are assembled from prioritized sections. Each section may have its
+own token budget; if the whole prompt exceeds the ceiling, items of the
+lowest-priority sections are shortened and then dropped first.
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # Fallback estimate when the model's tokenizer is unavailable
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Model's tiktoken encoding, or None (tiktoken missing or encoding can't be loaded)."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer for {model} unavailable, estimating tokens from length: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str) -> str:
+    """Cut text to at most max_tokens, marking the cut with an ellipsis."""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = _get_encoding(model)
+    if encoding is None:
+        cut = text[:max(0, max_tokens - 1) * CHARS_PER_TOKEN]
+    else:
+        cut = encoding.decode(encoding.encode(text)[:max(0, max_tokens - 1)])
+    return cut.rstrip() + "…"
+
+
+@dataclass
+class PromptSection:
+    """
+    Header line plus items (one line each, most important first).
+
+    Lower priority number = more important. Sections with trimmable=False
+    are never shortened (e.g. the user's own arguments).
+    """
+    name: str
+    header: str
+    items: List[str]
+    priority: int
+    budget: Optional[int] = None  # Max tokens for this section
+    item_max_tokens: Optional[int] = None  # Shorten each item to this first
+    trimmable: bool = True
+    empty_text: Optional[str] = None  # Line shown when no items remain
+    dropped: int = field(default=0, init=False)
+
+    def render(self) -> List[str]:
+        lines = [self.header] if self.header else []
+        if self.items:
+            lines.extend(self.items)
+        elif self.empty_text:
+            lines.append(self.empty_text)
+        return lines
+
+
+class PromptBuilder:
+    def __init__(self, model: str, max_tokens: int):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.sections: List[PromptSection] = []
+
+    def add(self, section: PromptSection) -> "PromptBuilder":
+        self.sections.append(section)
+        return self
+
+    def _tokens(self, section: PromptSection) -> int:
+        return count_tokens("\n".join(section.render()), self.model)
+
+    def _shrink(self, section: PromptSection, over: Callable[[], bool]):
+        """Shorten long items, then drop items from the end, while over() holds."""
+        if not section.trimmable:
+            return
+        if section.item_max_tokens is not None and over():
+            section.items = [truncate_tokens(i, section.item_max_tokens, self.model) for i in section.items]
+        while section.items and over():
+            section.items.pop()
+            section.dropped += 1
+
+    def build(self) -> Tuple[str, Dict[str, int]]:
+        """
+        Render prompt within budgets.
+
+        Returns:
+            (prompt text, {section name: tokens used})
+        """
+        # 1. Per-section budgets
+        for section in self.sections:
+            if section.budget is not None:
+                self._shrink(section, lambda s=section: self._tokens(s) > s.budget)
+
+        # 2. Global ceiling: least important sections give way first
+        def total() -> int:
+            return count_tokens(self.render(), self.model)
+
+        for section in sorted(self.sections, key=lambda s: s.priority, reverse=True):
+            self._shrink(section, lambda: total() > self.max_tokens)
+
+        usage = {section.name: self._tokens(section) for section in self.sections}
+        dropped = {section.name: section.dropped for section in self.sections if section.dropped}
+        text = self.render()
+        usage["total"] = count_tokens(text, self.model)
+        logger.info(f"Prompt tokens: {usage}" + (f", dropped items: {dropped}" if dropped else ""))
+        if usage["total"] > self.max_tokens:
+            logger.warning(f"Prompt exceeds ceiling ({usage['total']} > {self.max_tokens}) after trimming")
+        return text, usage
+
+    def render(self) -> str:
+        lines = []
+        for section in self.sections:
+            lines.extend(section.render())
+        return "\n".join(lines)
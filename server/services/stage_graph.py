@@ -0,0 +1,217 @@
+"""
+Stage Graph - run pipeline stages as a small dependency DAG.
+
+Each stage declares the stages it depends on and starts as soon as all of
+them have finished, so independent stages run concurrently (e.g. ML
+scoring and RAG retrieval: the critical path becomes max(ML, RAG) + LLM
+instead of their sum).
+
+Policy when a stage raises:
+  - required: no further stages are started, StageFailed is raised once
+    the running ones have finished
+  - optional: the stage degrades to its fallback value and its dependents
+    run as usual
+
+Stages whose result is passed in (e.g. restored from a checkpoint of an
+earlier attempt) are not run again.
+
+With a deadline, each stage runs under its own deadline (bound to its
+thread, see deadline.py): required stages may use the time left after
+setting aside the budgets of required stages still to come (at least
+their own budget), optional stages at most their budget. An optional stage
+with no time left is skipped (fallback), and a stage that overruns its
+deadline is abandoned like a failure.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import time
+import logging
+
+from server.core.metrics import metrics
+from server.services.deadline import Deadline, DeadlineExceeded, bound, deadline_exceeded
+
+logger = logging.getLogger(__name__)
+
+ABANDON_GRACE_SECONDS = 1.0  # Time a stage gets to stop by itself after its deadline
+
+stage_seconds = metrics.histogram("analysis_stage_seconds", "Duration of analysis pipeline stages")
+stage_outcomes = metrics.counter(
+    "analysis_stages_total",
+    "Analysis pipeline stages by outcome (ok / degraded / failed / skipped / restored)"
+)
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step.
+
+    run(results) receives the results of all stages finished so far
+    (always including its dependencies) and returns this stage's result.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Any]
+    depends_on: Tuple[str, ...] = ()
+    required: bool = True
+    fallback: Any = None  # Result of an optional stage that failed
+    budget: Optional[float] = None  # Seconds of the run's deadline set aside for this stage
+
+
+class StageFailed(Exception):
+    """A required stage raised; error is the original exception."""
+
+    def __init__(self, stage: str, error: BaseException, timeline: List[Dict[str, Any]]):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.timeline = timeline
+
+
+class StageGraph:
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names")
+        for stage in stages:
+            unknown = set(stage.depends_on) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {sorted(unknown)}")
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        done: set = set()
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, s in remaining.items() if set(s.depends_on) <= done]
+            if not ready:
+                raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+            for name in ready:
+                done.add(name)
+                del remaining[name]
+
+    def run(
+        self,
+        results: Optional[Dict[str, Any]] = None,
+        on_result: Optional[Callable[[str, Any], None]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Run all stages, each as soon as its dependencies are done.
+
+        Args:
+            results: Initial values visible to every stage (e.g. shared
+                inputs); a stage whose name is present is not run and is
+                reported as "restored"
+            on_result: Called as on_result(stage, value) in the calling
+                thread when a stage succeeds, before its dependents start
+            deadline: Deadline of the whole run, split by stage budgets
+
+        Returns:
+            (results by stage name, timeline) where the timeline has one
+            {stage, status, start_ms, duration_ms[, error]} entry per stage,
+            relative to the start of the run, in start order
+
+        Raises:
+            StageFailed: A required stage raised (its timeline is attached)
+        """
+        results = dict(results or {})
+        timeline: Dict[str, Dict[str, Any]] = {}
+        restored = [name for name in self.stages if name in results]
+        pending = {name: s for name, s in self.stages.items() if name not in results}
+        running: Dict[Future, Tuple[str, float, Optional[Deadline]]] = {}
+        failure: Optional[Tuple[str, BaseException]] = None
+        started = time.perf_counter()
+
+        def ms(t: float) -> float:
+            return round((t - started) * 1000, 1)
+
+        def stage_deadline(stage: Stage) -> Optional[Deadline]:
+            if deadline is None:
+                return None
+            # Required stages that have not started yet keep their budget
+            reserved = sum(s.budget or 0.0 for n, s in pending.items() if s.required and n != stage.name)
+            available = deadline.remaining() - reserved
+            if stage.required:
+                own = deadline.remaining() if stage.budget is None else min(stage.budget, deadline.remaining())
+                available = max(available, own)
+            elif stage.budget is not None:
+                available = min(available, stage.budget)
+            return Deadline(time.monotonic() + available)
+
+        def timed(stage: Stage, limit: Optional[Deadline]) -> Tuple[Any, Optional[Exception], float, float]:
+            begin = time.perf_counter()
+            try:
+                with bound(limit):
+                    value, error = stage.run(results), None
+            except Exception as e:
+                value, error = None, e
+            return value, error, begin, time.perf_counter()
+
+        def record(stage: Stage, value: Any, error: Optional[BaseException], begin: float, end: float):
+            nonlocal failure
+            entry = {"stage": stage.name, "start_ms": ms(begin), "duration_ms": round((end - begin) * 1000, 1)}
+            if error is None:
+                status = "ok"
+                results[stage.name] = value
+                if on_result is not None:
+                    on_result(stage.name, value)
+            else:
+                status = "failed" if stage.required else "degraded"
+                entry["error"] = f"{type(error).__name__}: {error}"
+                if isinstance(error, DeadlineExceeded):
+                    deadline_exceeded.inc(stage=stage.name)
+                if stage.required:
+                    failure = failure or (stage.name, error)
+                else:
+                    logger.warning(f"Stage {stage.name} failed, continuing without it: {error}")
+                    results[stage.name] = stage.fallback
+            entry["status"] = status
+            timeline[stage.name] = entry
+            stage_seconds.observe(end - begin, stage=stage.name)
+            stage_outcomes.inc(stage=stage.name, status=status)
+
+        pool = ThreadPoolExecutor(max_workers=len(self.stages) or 1, thread_name_prefix="stage")
+        try:
+            while pending or running:
+                while failure is None:
+                    ready = [n for n, s in pending.items() if all(d in results for d in s.depends_on)]
+                    if not ready:
+                        break
+                    for name in ready:
+                        stage = pending.pop(name)
+                        limit = stage_deadline(stage)
+                        if limit is not None and limit.expired() and not stage.required:
+                            # No time left for an optional stage: skip it, its dependents may still run
+                            now = time.perf_counter()
+                            record(stage, None, DeadlineExceeded("No time budget left"), now, now)
+                            continue
+                        running[pool.submit(timed, stage, limit)] = (name, time.perf_counter(), limit)
+                if not running:
+                    break
+                limits = [limit.remaining() for _, _, limit in running.values() if limit is not None]
+                timeout = max(0.0, min(limits)) + ABANDON_GRACE_SECONDS if limits else None
+                finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, _, _ = running.pop(future)
+                    record(self.stages[name], *future.result())
+                for future, (name, submitted, limit) in list(running.items()):
+                    if limit is not None and limit.remaining() < -ABANDON_GRACE_SECONDS:
+                        # Did not stop by itself: stop waiting, its thread ends in the background
+                        del running[future]
+                        error = DeadlineExceeded(f"Stage {name} did not finish within its time budget")
+                        record(self.stages[name], None, error, submitted, time.perf_counter())
+        finally:
+            pool.shutdown(wait=False)
+
+        ordered = [{"stage": name, "status": "restored"} for name in restored]
+        ordered += sorted(timeline.values(), key=lambda t: t["start_ms"])
+        for name in restored:
+            stage_outcomes.inc(stage=name, status="restored")
+        for name in pending:
+            ordered.append({"stage": name, "status": "skipped"})
+            stage_outcomes.inc(stage=name, status="skipped")
+        if failure is not None:
+            raise StageFailed(failure[0], failure[1], ordered)
+        return results, ordered
@@ -0,0 +1,64 @@
+"""
+Value Profile - compact per-user digest of stated values and goals.
+
+Each analyzed decision contributes a few verbatim quotes (extracted by the
+LLM and checked against the user's text). Entries are merged into a
+fixed-size list: repeated statements are folded together, and when the
+list is full the least mentioned / oldest entries are dropped. The digest
+replaces raw archive history in prompts, so prompt size stays constant as
+the archive grows.
+"""
+
+from typing import Dict, List
+import difflib
+
+from server.services.analysis_reuse import normalize_text
+
+PROFILE_KINDS = ("value", "goal", "fear", "constraint", "belief")
+DUPLICATE_RATIO = 0.85  # Normalized quotes at least this similar are the same statement
+
+
+def is_verbatim(quote: str, source: str) -> bool:
+    """Quote appears in source (ignoring case, punctuation and spacing)."""
+    quote = normalize_text(quote)
+    return bool(quote) and quote in normalize_text(source)
+
+
+def merge_entries(existing: List[Dict], new: List[Dict], max_entries: int) -> List[Dict]:
+    """
+    Fold new entries into the profile.
+
+    A new entry that repeats an existing statement replaces it (newest
+    quote and decision ID) and carries over its mention count + 1.
+
+    Returns:
+        At most max_entries entries, most mentioned and most recent first
+    """
+    merged = [dict(e, mentions=e.get("mentions", 1)) for e in existing]
+    for entry in new:
+        norm = normalize_text(entry["quote"])
+        match = next(
+            (i for i, e in enumerate(merged)
+             if e.get("kind") == entry.get("kind")
+             and difflib.SequenceMatcher(None, norm, normalize_text(e["quote"])).ratio() >= DUPLICATE_RATIO),
+            None
+        )
+        if match is None:
+            merged.append(dict(entry, mentions=1))
+        else:
+            merged[match] = dict(entry, mentions=merged[match]["mentions"] + 1)
+    merged.sort(key=lambda e: (e["mentions"], e.get("timestamp") or ""), reverse=True)
+    return merged[:max_entries]
+
+
+def render_entries(entries: List[Dict]) -> List[str]:
+    """Prompt lines, one per entry: [kind] "quote" (decision <id>, <date>, xN)."""
+    lines = []
+    for entry in entries:
+        details = [f"decision {entry['decision_id']}"]
+        if entry.get("timestamp"):
+            details.append(entry["timestamp"][:10])
+        if entry.get("mentions", 1) > 1:
+            details.append(f"stated {entry['mentions']}x")
+        lines.append(f"  - [{entry.get('kind', 'value')}] \"{entry['quote']}\" ({', '.join(details)})")
+    return lines
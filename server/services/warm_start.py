@@ -0,0 +1,123 @@
+"""
+Warm Start Bundles - Qdrant snapshot + local caches in one directory.
+
+Layout:
+    bundle/
+      manifest.json
+      qdrant.snapshot
+      embeddings.sqlite
+      pair_scores.sqlite
+
+New replicas point WARM_START_BUNDLE at a bundle: the engine restores the
+collection from the snapshot if it doesn't exist yet, and caches start
+from the bundled copies instead of empty.
+"""
+
+from typing import Any, Dict
+from datetime import datetime
+import json
+import os
+import shutil
+import logging
+
+import requests
+from qdrant_client import QdrantClient
+
+from server.core.config import config
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+SNAPSHOT_FILE = "qdrant.snapshot"
+BUNDLED_CACHES = ["embeddings", "pair_scores"]
+
+
+def _qdrant_url() -> str:
+    return f"http://{config.QDRANT_HOST}:{config.QDRANT_PORT}"
+
+
+def read_manifest(bundle_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(bundle_dir, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def has_snapshot(bundle_dir: str) -> bool:
+    """Check that bundle has a manifest and a Qdrant snapshot."""
+    return (
+        os.path.exists(os.path.join(bundle_dir, MANIFEST_FILE))
+        and os.path.exists(os.path.join(bundle_dir, SNAPSHOT_FILE))
+    )
+
+
+def create_bundle(qdrant: QdrantClient, bundle_dir: str) -> Dict[str, Any]:
+    """
+    Snapshot the collection and copy local caches into bundle_dir.
+    
+    Returns:
+        Written manifest
+    """
+    from server.services.cache import get_cache
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    collection = config.QDRANT_COLLECTION
+
+    # 1. Qdrant snapshot (created server-side, then downloaded)
+    logger.info(f"Creating snapshot of collection {collection}...")
+    snapshot = qdrant.create_snapshot(collection_name=collection, wait=True)
+    url = f"{_qdrant_url()}/collections/{collection}/snapshots/{snapshot.name}"
+    with requests.get(url, stream=True, timeout=600) as response:
+        response.raise_for_status()
+        with open(os.path.join(bundle_dir, SNAPSHOT_FILE), "wb") as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+    qdrant.delete_snapshot(collection_name=collection, snapshot_name=snapshot.name)
+
+    # 2. Local caches (online backup, safe while the server runs)
+    for name in BUNDLED_CACHES:
+        get_cache(name).backup(os.path.join(bundle_dir, f"{name}.sqlite"))
+
+    manifest = {
+        "collection": collection,
+        "snapshot_file": SNAPSHOT_FILE,
+        "points_count": qdrant.count(collection_name=collection).count,
+        "embedding_model": config.EMBEDDING_MODEL,
+        "cross_encoder_model": config.CROSS_ENCODER_MODEL,
+        "caches": BUNDLED_CACHES,
+        "created_at": datetime.utcnow().isoformat()
+    }
+    with open(os.path.join(bundle_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(f"Bundle written to {bundle_dir}: {manifest['points_count']} points")
+    return manifest
+
+
+def restore_collection(qdrant: QdrantClient, bundle_dir: str):
+    """Upload bundled snapshot into QDRANT_COLLECTION (replaces existing data)."""
+    manifest = read_manifest(bundle_dir)
+    if manifest.get("embedding_model") != config.EMBEDDING_MODEL:
+        raise ValueError(
+            f"Bundle was built with {manifest.get('embedding_model')}, "
+            f"current model is {config.EMBEDDING_MODEL}"
+        )
+
+    url = f"{_qdrant_url()}/collections/{config.QDRANT_COLLECTION}/snapshots/upload"
+    with open(os.path.join(bundle_dir, SNAPSHOT_FILE), "rb") as f:
+        response = requests.post(
+            url,
+            params={"priority": "snapshot", "wait": "true"},
+            files={"snapshot": (SNAPSHOT_FILE, f)},
+            timeout=600
+        )
+    response.raise_for_status()
+    logger.info(f"Restored {manifest['points_count']} points into {config.QDRANT_COLLECTION}")
+
+
+def restore_caches(bundle_dir: str):
+    """Overwrite local cache files with bundled copies. Run before the server starts."""
+    os.makedirs(config.CACHE_DIR, exist_ok=True)
+    for name in read_manifest(bundle_dir).get("caches", []):
+        src = os.path.join(bundle_dir, f"{name}.sqlite")
+        if os.path.exists(src):
+            shutil.copyfile(src, os.path.join(config.CACHE_DIR, f"{name}.sqlite"))
+            logger.info(f"Restored cache '{name}'")
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Analysis worker - runs queued analysis jobs from the durable job table.
+
+Workers can run on any machine with database access and scale separately
+from API replicas. Each worker thread opens its own sessions, claims one
+job at a time (SELECT ... FOR UPDATE SKIP LOCKED), keeps its lease alive
+with heartbeats while the orchestrator runs, and retries failed attempts
+with jittered exponential backoff. Jobs of a bulk submission are claimed
+in groups (BATCH_CLAIM_SIZE) so their ML scoring and retrieval run batched.
+
+Usage:
+    python -m server.worker [--concurrency N]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import uuid
+
+from server.core.config import config
+from server.core.metrics import metrics, percentile
+
+logger = logging.getLogger(__name__)
+
+queue_wait = metrics.histogram(
+    "analysis_queue_wait_seconds",
+    "Time from runnable to claimed, per priority class (jobs claimed by this process)",
+    buckets=[0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600]
+)
+job_outcomes = metrics.counter(
+    "analysis_jobs_total",
+    "Analysis job attempts by outcome (completed / retried / failed / abandoned / lost: lease reclaimed or decision deleted)"
+)
+
+
+# Claimed job fields the worker uses (copied, so runs do not share the claiming session)
+JOB_FIELDS = ("id", "decision_id", "payload", "priority", "cost", "attempts", "max_attempts", "queue_wait_seconds", "batch_id")
+
+
+def snapshot(job) -> SimpleNamespace:
+    return SimpleNamespace(**{field: getattr(job, field, None) for field in JOB_FIELDS})
+
+
+def queue_wait_summary(waits: Dict[str, List[float]], oldest_queued: Dict[str, float]) -> Dict[str, Any]:
+    """
+    /metrics entry for the queue wait of all workers, from analysis_jobs
+    (JobRepository.queue_wait_samples): the queue_wait histogram only
+    sees jobs claimed by its own process, which is not the API's when
+    workers run separately.
+    """
+    values = {}
+    for priority in sorted(set(waits) | set(oldest_queued)):
+        samples = waits.get(priority, [])
+        entry: Dict[str, Any] = {"count": len(samples)}
+        if samples:
+            entry.update({f"p{q}": round(percentile(samples, q), 3) for q in (50, 95, 99)})
+        entry["oldest_queued_seconds"] = round(oldest_queued.get(priority, 0.0), 3)
+        values[f"priority={priority}"] = entry
+    return {
+        "description": (
+            f"Time from runnable to claimed per priority class, jobs of all workers claimed in the last "
+            f"{config.QUEUE_WAIT_WINDOW_SECONDS:.0f}s; oldest_queued_seconds: longest wait of a runnable job not claimed yet"
+        ),
+        "values": values
+    }
+
+
+def retry_delay(attempt: int) -> float:
+    """Jittered exponential backoff before retrying after the given (1-based) attempt."""
+    delay = min(config.QUEUE_RETRY_BACKOFF_MAX_SECONDS, config.QUEUE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
+class JobWorker:
+    """
+    One worker loop: claim, run, heartbeat, then complete / retry / fail.
+
+    session_factory and repository_factory default to the application's
+    SessionLocal and JobRepository.
+    """
+
+    def __init__(
+        self,
+        orchestrator=None,
+        session_factory: Optional[Callable] = None,
+        repository_factory: Optional[Callable] = None,
+        worker_id: Optional[str] = None
+    ):
+        if session_factory is None:
+            from server.db.database import SessionLocal
+            session_factory = SessionLocal
+        if repository_factory is None:
+            from server.repositories.job_repository import JobRepository
+            repository_factory = JobRepository
+        if orchestrator is None:
+            from server.services.orchestrator import get_orchestrator
+            orchestrator = get_orchestrator()
+        self.orchestrator = orchestrator
+        self.session_factory = session_factory
+        self.repository_factory = repository_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def run_once(self) -> bool:
+        """
+        Claim and run one job, or a group of jobs of one bulk submission.
+
+        Returns:
+            False if no job was runnable
+        """
+        db = self.session_factory()
+        try:
+            jobs = self.repository_factory(db)
+            job = jobs.claim(self.worker_id, config.QUEUE_LEASE_SECONDS)
+            if job is None:
+                return False
+            claimed = [snapshot(job)]
+            if claimed[0].batch_id is not None and config.BATCH_CLAIM_SIZE > 1:
+                claimed += [
+                    snapshot(peer) for peer in jobs.claim_batch(
+                        self.worker_id, config.QUEUE_LEASE_SECONDS, claimed[0].batch_id, config.BATCH_CLAIM_SIZE - 1
+                    )
+                ]
+        finally:
+            db.close()
+
+        if len(claimed) == 1:
+            self._run(claimed[0])
+        else:
+            self._run_group(claimed)
+        return True
+
+    def _run_group(self, claimed: List[SimpleNamespace]):
+        """
+        Jobs of one bulk submission: ML scoring and retrieval batched across
+        all of them first (orchestrator.prefetch_batch), then each job's own
+        run (resuming at the LLM stage), BATCH_LLM_CONCURRENCY at a time.
+        All leases are heartbeated from the claim on.
+        """
+        from server.schemas.decision import DecisionCreate
+
+        beats = {job.id: self._start_heartbeat(job.id) for job in claimed}
+        logger.info(f"Worker {self.worker_id}: {len(claimed)} jobs of batch {claimed[0].batch_id}")
+        db = self.session_factory()
+        try:
+            self.orchestrator.prefetch_batch(db, [
+                (job.decision_id, DecisionCreate.parse_obj(job.payload))
+                for job in claimed if job.attempts <= job.max_attempts
+            ])
+        except Exception as e:
+            logger.warning(f"Batched stages failed, jobs run on their own: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+        with ThreadPoolExecutor(max_workers=max(1, config.BATCH_LLM_CONCURRENCY)) as pool:
+            list(pool.map(lambda job: self._run(job, beats[job.id]), claimed))
+
+    def _run(self, job: SimpleNamespace, beat: Optional[Tuple[threading.Event, threading.Thread]] = None):
+        """Run a claimed job and complete / retry / fail it (heartbeating its lease meanwhile)."""
+        from server.schemas.decision import DecisionCreate
+        from server.services.analysis_errors import AnalysisRetry
+
+        db = self.session_factory()
+        beat = beat or self._start_heartbeat(job.id)
+        try:
+            jobs = self.repository_factory(db)
+            job_id, decision_id, attempts, max_attempts = job.id, job.decision_id, job.attempts, job.max_attempts
+            logger.info(
+                f"Worker {self.worker_id}: {job.priority} job {job_id} (decision {decision_id}, cost {job.cost}), "
+                f"attempt {attempts}/{max_attempts}"
+            )
+            if job.queue_wait_seconds is not None:
+                queue_wait.observe(job.queue_wait_seconds, priority=job.priority)
+
+            if attempts > max_attempts:
+                # Lease expired on the final attempt (worker died mid-run)
+                self.orchestrator.abandon_analysis(db, decision_id)
+                jobs.fail(job_id, self.worker_id, "Lease expired on final attempt")
+                job_outcomes.inc(outcome="abandoned")
+                return
+
+            decision_data = DecisionCreate.parse_obj(job.payload)
+            try:
+                self.orchestrator.run_background_analysis(
+                    db, decision_id, decision_data, final_attempt=attempts >= max_attempts
+                )
+                outcome = "completed" if jobs.complete(job_id, self.worker_id) else "lost"
+            except AnalysisRetry as e:
+                delay = retry_delay(attempts)
+                logger.warning(f"Job {job_id} attempt {attempts} failed, retrying in {delay:.0f}s: {e}")
+                outcome = "retried" if jobs.retry(job_id, self.worker_id, str(e), delay) else "lost"
+            except Exception as e:
+                logger.error(f"Job {job_id} failed: {e}")
+                db.rollback()
+                outcome = "failed" if jobs.fail(job_id, self.worker_id, str(e)) else "lost"
+            job_outcomes.inc(outcome=outcome)
+        finally:
+            stop, heartbeat = beat
+            stop.set()
+            heartbeat.join()
+            db.close()
+
+    def _start_heartbeat(self, job_id) -> Tuple[threading.Event, threading.Thread]:
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stop), daemon=True)
+        heartbeat.start()
+        return stop, heartbeat
+
+    def _heartbeat(self, job_id, stop: threading.Event):
+        """Extend the lease until stop is set (own session, runs beside the job)."""
+        while not stop.wait(config.QUEUE_HEARTBEAT_SECONDS):
+            db = self.session_factory()
+            try:
+                if not self.repository_factory(db).heartbeat(job_id, self.worker_id, config.QUEUE_LEASE_SECONDS):
+                    logger.warning(f"Worker {self.worker_id} lost the lease on job {job_id}")
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+            finally:
+                db.close()
+
+    def run_forever(self, stop: threading.Event):
+        """Work until stop is set; the current job is always finished first."""
+        while not stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Worker {self.worker_id} error: {e}")
+            stop.wait(config.QUEUE_POLL_SECONDS)
+
+
+def start_workers(concurrency: int, stop: threading.Event, **worker_kwargs) -> list:
+    """Start worker threads (e.g. inside the API process)."""
+    threads = []
+    for i in range(concurrency):
+        worker = JobWorker(**worker_kwargs)
+        thread = threading.Thread(
+            target=worker.run_forever, args=(stop,), name=f"analysis-worker-{i}", daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=1, help="Worker threads (jobs run in parallel)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    stop = threading.Event()
+
+    def shutdown(signum, frame):
+        logger.info("Shutting down after current jobs...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    threads = start_workers(args.concurrency, stop)
+    logger.info(f"✅ {args.concurrency} analysis worker(s) started")
+    while any(t.is_alive() for t in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+
+
+if __name__ == "__main__":
+    main()
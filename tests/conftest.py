@@ -42,3 +42,87 @@ def sample_decision():
             }
         ]
     }
+
+
+class FakeOpenAIServer:
+    """
+    Local OpenAI-compatible chat completions endpoint.
+
+    Each request pops the next step from `script` (default: immediate 200);
+    a step may set `delay` (seconds), `status` (HTTP error code) and `content`.
+    """
+
+    def __init__(self):
+        import json
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.script = []
+        self.requests = 0
+        self.content = json.dumps({"ok": True})
+        lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, content_type="application/json"):
+                body = payload.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with lock:
+                    fake.requests += 1
+                    step = fake.script.pop(0) if fake.script else {}
+                time.sleep(step.get("delay", 0))
+                if step.get("status", 200) != 200:
+                    error = {"error": {"message": "injected", "type": "server_error"}}
+                    self._send(step["status"], json.dumps(error))
+                    return
+                content = step.get("content", fake.content)
+                if request.get("stream"):
+                    chunks = [
+                        {"id": "fake", "object": "chat.completion.chunk", "created": 0, "model": "fake",
+                         "choices": [{"index": 0, "delta": {"content": content[i:i + 8]}, "finish_reason": None}]}
+                        for i in range(0, len(content), 8)
+                    ]
+                    events = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+                    self._send(200, events, "text/event-stream")
+                    return
+                self._send(200, json.dumps({
+                    "id": "fake", "object": "chat.completion", "created": 0, "model": "fake",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+                }))
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def fake_openai():
+    """Fake OpenAI-compatible server with scriptable latency and errors."""
+    server = FakeOpenAIServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def fake_openai_backup():
+    """Second fake OpenAI-compatible server (e.g. for failover tests)."""
+    server = FakeOpenAIServer()
+    yield server
+    server.close()
@@ -0,0 +1,182 @@
+"""
+Unit tests for admission control and stage concurrency slots.
+"""
+
+import threading
+import time
+import pytest
+from server.core.config import config
+from server.services import admission
+from server.services.admission import (
+    AdmissionRejected, check_admission, estimated_capacity, seconds_per_cost, shared_job_timing, stage_medians, stage_slot
+)
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(config, "ADMISSION_ENABLED", True)
+    monkeypatch.setattr(config, "ADMISSION_MAX_ACTIVE_JOBS", 100)
+    monkeypatch.setattr(config, "ADMISSION_MAX_ACTIVE_JOBS_PER_USER", 5)
+    monkeypatch.setattr(config, "ADMISSION_MAX_WAIT_SECONDS", 60)
+
+
+class TestCheckAdmission:
+    """Test admission decisions and Retry-After."""
+
+    def test_admitted(self, limits):
+        """Test that a short queue admits the analysis."""
+        check_admission((10, 20.0), (1, 2.0), capacity=2.0)
+
+    def test_user_limit(self, limits):
+        """Test that a user over their active job limit gets 429."""
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((10, 20.0), (5, 10.0), capacity=2.0)
+        assert exc.value.status_code == 429
+        assert exc.value.retry_after == 2  # One of their jobs (cost 2.0) has to finish
+
+    def test_queue_full(self, limits):
+        """Test that a full queue gets 503."""
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((100, 200.0), (0, 0.0), capacity=2.0)
+        assert exc.value.status_code == 503
+        assert exc.value.retry_after == 1
+
+    def test_wait_too_long(self, limits):
+        """Test that a backlog whose estimated wait exceeds the limit gets 503."""
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((50, 300.0), (0, 0.0), capacity=2.0)
+        assert exc.value.status_code == 503
+        assert exc.value.retry_after == 90  # 150s estimated wait - 60s allowed
+
+    def test_batch_counts_incoming_jobs(self, limits):
+        """Test that a batch is judged by the jobs and cost it adds, not only the current backlog."""
+        check_admission((10, 20.0), (0, 0.0), capacity=2.0, incoming=(5, 10.0))
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((10, 20.0), (2, 4.0), capacity=2.0, incoming=(4, 8.0))
+        assert exc.value.status_code == 429
+        check_admission((10, 20.0), (2, 4.0), capacity=2.0, incoming=(4, 8.0), max_user_jobs=10)
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((98, 20.0), (0, 0.0), capacity=2.0, incoming=(3, 6.0), max_user_jobs=10)
+        assert exc.value.status_code == 503
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((10, 20.0), (0, 0.0), capacity=2.0, incoming=(5, 110.0), max_user_jobs=10)
+        assert exc.value.status_code == 503
+        assert exc.value.retry_after == 5  # (20 + 110) / 2 = 65s estimated wait - 60s allowed
+
+    def test_wait_in_observed_seconds(self, limits):
+        """Test that cost units are converted with the observed seconds per unit."""
+        check_admission((10, 20.0), (0, 0.0), capacity=2.0)  # 10 units / 2 workers: 10s if a unit were a second
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((10, 20.0), (0, 0.0), capacity=2.0, unit_seconds=8.0)
+        assert exc.value.status_code == 503
+        assert exc.value.retry_after == 20  # 160s / 2 workers = 80s estimated wait - 60s allowed
+        with pytest.raises(AdmissionRejected) as exc:
+            check_admission((10, 20.0), (5, 10.0), capacity=2.0, unit_seconds=8.0)
+        assert exc.value.retry_after == 16  # One of their jobs (2 units of 8s) has to finish
+
+    def test_disabled(self, limits, monkeypatch):
+        """Test that nothing is rejected when admission control is off."""
+        monkeypatch.setattr(config, "ADMISSION_ENABLED", False)
+        check_admission((1000, 1e6), (1000, 1e6), capacity=1.0)
+
+
+class TestCapacity:
+    """Test the capacity estimate."""
+
+    def test_defaults_to_worker_slots(self, monkeypatch):
+        """Test that without stage timings the capacity is the number of worker slots."""
+        monkeypatch.setattr(config, "ADMISSION_WORKER_SLOTS", 3)
+        monkeypatch.setattr(admission.stage_seconds, "percentiles", lambda *p, **labels: {})
+        assert estimated_capacity() == 3.0
+
+    def test_limited_by_stage_slots(self, monkeypatch):
+        """Test that a stage taking most of the job time caps capacity at its slots / share."""
+        monkeypatch.setattr(config, "ADMISSION_WORKER_SLOTS", 16)
+        monkeypatch.setattr(config, "STAGE_LLM_CONCURRENCY", 2)
+        medians = {"llm": 8.0, "rag": 1.0, "ml_scoring": 1.0}
+        monkeypatch.setattr(
+            admission.stage_seconds, "percentiles",
+            lambda *p, stage: {"p50": medians[stage]} if stage in medians else {}
+        )
+        assert estimated_capacity() == pytest.approx(2.5)
+
+    def test_from_stored_timelines(self, monkeypatch):
+        """Test that stage durations stored by other processes give the same estimate as local ones."""
+        monkeypatch.setattr(config, "ADMISSION_WORKER_SLOTS", 16)
+        monkeypatch.setattr(config, "STAGE_LLM_CONCURRENCY", 2)
+        monkeypatch.setattr(admission.stage_seconds, "percentiles", lambda *p, **labels: {})  # Nothing ran here
+
+        def timeline(llm_ms, status="ok"):
+            return [
+                {"stage": "ml_scoring", "status": "ok", "start_ms": 0, "duration_ms": 1000},
+                {"stage": "rag", "status": "ok", "start_ms": 0, "duration_ms": 1000},
+                {"stage": "llm", "status": status, "start_ms": 1000, "duration_ms": llm_ms}
+            ]
+
+        medians = stage_medians([timeline(7000), timeline(8000), timeline(9000), timeline(60000, "failed"), None])
+        assert medians == {"ml_scoring": 1.0, "rag": 1.0, "llm": 8.0}
+        assert estimated_capacity(medians) == pytest.approx(2.5)
+        assert estimated_capacity({}) == 16.0
+
+    def test_seconds_per_cost(self):
+        """Test that seconds per cost unit come from job wall-clock time (parallel stages overlap) and cost."""
+        def timeline(llm_ms):
+            return [
+                {"stage": "ml_scoring", "status": "ok", "start_ms": 0, "duration_ms": 1000},
+                {"stage": "rag", "status": "ok", "start_ms": 0, "duration_ms": 2000},
+                {"stage": "llm", "status": "ok", "start_ms": 2000, "duration_ms": llm_ms}
+            ]
+
+        timings = [(timeline(18000), 2.0), (timeline(22000), 2.5), (timeline(28000), 3.0)]
+        assert seconds_per_cost(timings) == pytest.approx(24.0 / 2.5)
+        assert seconds_per_cost([]) is None
+        assert seconds_per_cost([(None, 2.0), ([], 1.0)]) is None
+
+    def test_shared_timing_cached(self, monkeypatch):
+        """Test that stored timelines are only re-read once the TTL has passed."""
+        monkeypatch.setattr(config, "ADMISSION_TIMELINE_TTL_SECONDS", 30.0)
+        monkeypatch.setattr(admission, "_shared_timing", (0.0, ({}, None)))
+        now = [1000.0]
+        monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+        loads = []
+
+        def load():
+            loads.append(now[0])
+            return [([{"stage": "llm", "status": "ok", "start_ms": 0, "duration_ms": 2000 * len(loads)}], 2.0)]
+
+        assert shared_job_timing(load) == ({"llm": 2.0}, 1.0)
+        now[0] += 10
+        assert shared_job_timing(load) == ({"llm": 2.0}, 1.0)
+        now[0] += 30
+        assert shared_job_timing(load) == ({"llm": 4.0}, 2.0)
+        assert loads == [1000.0, 1040.0]
+
+
+class TestStageSlot:
+    """Test per-stage concurrency slots."""
+
+    def test_caps_concurrency(self, monkeypatch):
+        """Test that no more than the configured number of threads hold a slot."""
+        monkeypatch.setattr(config, "STAGE_LLM_CONCURRENCY", 2)
+        monkeypatch.setattr(admission, "_slots", {})
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def work():
+            with stage_slot("llm"):
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert peak[0] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,128 @@
+"""
+Unit tests for the analysis event bus (in-process streams and events shared across processes).
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+import pytest
+from server.core.config import config
+from server.services.analysis_events import AnalysisEventBus
+
+
+class FakeStore:
+    """In-memory stand-in for DatabaseEventStore (one table shared by all processes)."""
+
+    def __init__(self, fail=False):
+        self.rows = []
+        self.purges = 0
+        self.fail = fail
+
+    def append(self, decision_id, event, data):
+        if self.fail:
+            raise RuntimeError("database down")
+        self.rows.append((len(self.rows) + 1, decision_id, event, data))
+
+    def since(self, decision_id, after_id):
+        return [(i, event, data) for i, d, event, data in self.rows if d == decision_id and i > after_id]
+
+    def delete(self, decision_id):
+        self.rows = [row for row in self.rows if row[1] != decision_id]
+
+    def purge(self, before):
+        self.purges += 1
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    monkeypatch.setattr(config, "QUEUE_SHARED_EVENTS", True)
+
+
+class TestInProcess:
+    """Test streams followed in the publishing process."""
+
+    def test_replay_until_terminal(self):
+        """Test that a late subscriber gets past events and stops at the terminal one."""
+        bus, decision_id = AnalysisEventBus(), uuid.uuid4()
+        bus.publish(decision_id, "status", {"status": "analyzing"})
+        bus.publish(decision_id, "completed", {"llm_analysis": {}})
+        bus.publish(decision_id, "status", {"status": "late"})
+
+        async def collect():
+            return [event async for event, _ in bus.subscribe(decision_id, poll_interval=0.01, timeout=1)]
+
+        assert asyncio.run(collect()) == ["status", "completed"]
+        assert bus.has_stream(decision_id)
+        assert bus.fetch_shared(decision_id) == []  # No store
+
+
+class TestSharedEvents:
+    """Test events published by a worker process and read by an API process."""
+
+    def test_other_process_reads_events(self, shared):
+        """Test that events stored by the worker's bus are read in order by another bus."""
+        store, decision_id = FakeStore(), uuid.uuid4()
+        worker, api = AnalysisEventBus(store), AnalysisEventBus(store)
+        worker.publish(decision_id, "status", {"status": "analyzing"})
+        worker.publish(decision_id, "partial", {"path": ["final_note"], "value": "ok"})
+        worker.flush()
+
+        assert not api.has_stream(decision_id)
+        events = api.fetch_shared(decision_id)
+        assert [event for _, event, _ in events] == ["status", "partial"]
+
+        worker.publish(decision_id, "completed", {"llm_analysis": {}})
+        worker.flush()
+        assert [event for _, event, _ in api.fetch_shared(decision_id, events[-1][0])] == ["completed"]
+        assert store.purges == 1  # Old events are purged when an analysis finishes
+        assert api.fetch_shared(uuid.uuid4()) == []
+
+    def test_publish_does_not_wait_for_store(self, shared):
+        """Test that publishing (e.g. from the LLM event loop) returns before the store write finishes."""
+        release = threading.Event()
+
+        class SlowStore(FakeStore):
+            def append(self, decision_id, event, data):
+                release.wait(5)
+                super().append(decision_id, event, data)
+
+        store, decision_id = SlowStore(), uuid.uuid4()
+        bus = AnalysisEventBus(store)
+        started = time.perf_counter()
+        for i in range(5):
+            bus.publish(decision_id, "partial", {"path": ["final_note"], "value": i})
+        assert time.perf_counter() - started < 1
+        release.set()
+        bus.flush()
+        assert [data["value"] for _, _, data in bus.fetch_shared(decision_id)] == [0, 1, 2, 3, 4]
+
+    def test_reset_drops_stored_events(self, shared):
+        """Test that a retried analysis does not replay the events of the failed one."""
+        store, decision_id = FakeStore(), uuid.uuid4()
+        bus = AnalysisEventBus(store)
+        bus.publish(decision_id, "failed", {"error": "ANALYSIS_FAILED"})
+        bus.reset(decision_id)
+        assert bus.fetch_shared(decision_id) == []
+        assert not bus.has_stream(decision_id)
+
+    def test_store_failure_not_raised(self, shared):
+        """Test that a failing store only loses the shared copy of the event."""
+        bus, decision_id = AnalysisEventBus(FakeStore(fail=True)), uuid.uuid4()
+        bus.publish(decision_id, "status", {"status": "analyzing"})
+        bus.flush()
+        assert bus.has_stream(decision_id)
+
+    def test_disabled(self, monkeypatch):
+        """Test that nothing is stored when shared events are off."""
+        monkeypatch.setattr(config, "QUEUE_SHARED_EVENTS", False)
+        store, decision_id = FakeStore(), uuid.uuid4()
+        bus = AnalysisEventBus(store)
+        bus.publish(decision_id, "status", {"status": "analyzing"})
+        bus.flush()
+        assert store.rows == []
+        assert bus.fetch_shared(decision_id) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
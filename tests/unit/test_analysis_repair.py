@@ -0,0 +1,165 @@
+"""
+Unit tests for local JSON repair, section salvage and targeted re-ask.
+"""
+
+import asyncio
+import json
+import pytest
+from server.core.config import config
+from server.schemas.decision import DecisionCreate
+from server.services.analysis_repair import (
+    build_reask_instruction, merge_salvaged, repair_json, salvage_analysis
+)
+
+
+VARIANT = {
+    "strengths": ["s"], "weaknesses": ["w"], "logical_fallacies": [],
+    "missing_considerations": [], "data_quality": "SUFFICIENT"
+}
+FULL = {
+    "argument_quality_comparison": {"A": VARIANT, "B": VARIANT},
+    "alignment_with_model_scores": "agrees",
+    "detected_reasoning_patterns": "none",
+    "key_weak_points_to_reconsider": ["k"],
+    "final_note": "ok"
+}
+
+
+class TestRepairJson:
+    """Test local repair of malformed JSON."""
+
+    def test_valid_json_unchanged(self):
+        """Test that valid JSON parses as-is."""
+        assert repair_json(json.dumps(FULL)) == FULL
+
+    def test_strips_fences_and_prose(self):
+        """Test that code fences and surrounding text are ignored."""
+        text = "Here you go:\n```json\n" + json.dumps(FULL) + "\n```"
+        assert repair_json(text) == FULL
+
+    def test_trailing_commas(self):
+        """Test that trailing commas before closers are dropped."""
+        assert repair_json('{"a": [1, 2,], "b": {"c": 1,},}') == {"a": [1, 2], "b": {"c": 1}}
+
+    def test_truncated_string(self):
+        """Test that an unterminated string and containers are closed."""
+        assert repair_json('{"a": "done", "b": ["x", "trunc') == {"a": "done", "b": ["x", "trunc"]}
+
+    def test_truncated_member_dropped(self):
+        """Test that an incomplete trailing member is cut off."""
+        assert repair_json('{"a": 1, "b": {"c": 2}, "d": tr') == {"a": 1, "b": {"c": 2}}
+        assert repair_json('{"a": 1, "b":') == {"a": 1}
+
+    def test_truncated_full_analysis(self):
+        """Test that a response cut mid-way keeps its complete sections."""
+        text = json.dumps(FULL)
+        data = repair_json(text[:text.index('"final_note"') + 10])
+
+        assert data["argument_quality_comparison"] == FULL["argument_quality_comparison"]
+        assert data["key_weak_points_to_reconsider"] == ["k"]
+
+    def test_unrecoverable(self):
+        """Test that text without an object returns None."""
+        assert repair_json("I cannot help with that.") is None
+        assert repair_json("") is None
+
+
+class TestSalvage:
+    """Test per-section validation."""
+
+    def test_complete_analysis(self):
+        """Test that nothing is missing from a valid analysis."""
+        _, missing_variants, missing_fields = salvage_analysis(FULL, ["A", "B"])
+        assert missing_variants == [] and missing_fields == []
+
+    def test_missing_and_invalid_sections(self):
+        """Test that missing variants and invalid required fields are reported."""
+        data = dict(FULL, argument_quality_comparison={"A": VARIANT, "B": {"strengths": []}}, final_note="")
+        del data["detected_reasoning_patterns"]
+
+        salvaged, missing_variants, missing_fields = salvage_analysis(data, ["A", "B"])
+
+        assert missing_variants == ["B"]
+        assert set(missing_fields) == {"final_note", "detected_reasoning_patterns"}
+        assert "A" in salvaged["argument_quality_comparison"]
+
+    def test_invalid_optional_sections_dropped(self):
+        """Test that invalid optional sections do not count as missing."""
+        data = dict(
+            FULL,
+            score_details={"logic_stability": 5},
+            systemic_inconsistencies=[{"past_statement": "only"}, {
+                "past_statement": "p", "current_statement": "c", "conflict_description": "d"
+            }]
+        )
+        salvaged, missing_variants, missing_fields = salvage_analysis(data, ["A", "B"])
+
+        assert missing_variants == [] and missing_fields == []
+        assert salvaged["score_details"] is None
+        assert len(salvaged["systemic_inconsistencies"]) == 1
+
+    def test_merge_fills_gaps(self):
+        """Test that re-asked sections fill gaps without overwriting."""
+        base = {"argument_quality_comparison": {"A": VARIANT}, "final_note": "kept"}
+        extra = {"argument_quality_comparison": {"A": {}, "B": VARIANT}, "final_note": "new", "detected_reasoning_patterns": "p"}
+
+        merged = merge_salvaged(base, extra)
+
+        assert merged["argument_quality_comparison"] == {"A": VARIANT, "B": VARIANT}
+        assert merged["final_note"] == "kept"
+        assert merged["detected_reasoning_patterns"] == "p"
+
+    def test_reask_instruction_uses_active_schema(self):
+        """Test that the follow-up names only missing keys, short keys in compact mode."""
+        compact = build_reask_instruction(["B"], ["final_note"], compact=True)
+        full = build_reask_instruction(["B"], ["final_note"], compact=False)
+
+        assert '"v"' in compact and '"n"' in compact and '"B"' in compact
+        assert '"argument_quality_comparison"' in full and '"final_note"' in full
+
+
+class TestReask:
+    """Test targeted re-ask against a fake OpenAI server."""
+
+    @pytest.fixture
+    def service(self, fake_openai, monkeypatch):
+        from server.services.llm_backends import BackendRegistry, LLMBackend
+        from server.services.llm_service import LLMService
+        monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+        monkeypatch.setattr(config, "LLM_COMPACT_OUTPUT", False)
+        service = LLMService()
+        service.backends = BackendRegistry([LLMBackend("fake", "fake", fake_openai.base_url, "test")])
+        return service
+
+    @pytest.fixture
+    def decision(self):
+        return DecisionCreate(
+            context="Should I move to another city for a better paid job next year",
+            variants=["A", "B"],
+            arguments=[
+                {"variant_name": "A", "type": "pro", "text": "The new job pays much better than my current one"},
+                {"variant_name": "B", "type": "pro", "text": "Staying keeps me close to my family and friends"}
+            ]
+        )
+
+    def test_reasks_only_missing_sections(self, service, decision, fake_openai):
+        """Test that a truncated response is completed by one follow-up call."""
+        text = json.dumps(FULL)
+        truncated = text[:text.index('"B"')]
+        fake_openai.content = json.dumps(dict(FULL, argument_quality_comparison={"B": VARIANT}))
+
+        analysis = asyncio.run(service._finalize(truncated, decision, [{"role": "user", "content": "x"}]))
+
+        assert set(analysis.argument_quality_comparison) == {"A", "B"}
+        assert fake_openai.requests == 1
+
+    def test_fails_when_reask_incomplete(self, service, decision, fake_openai):
+        """Test that a still-incomplete analysis raises."""
+        fake_openai.content = json.dumps({})
+
+        with pytest.raises(ValueError):
+            asyncio.run(service._finalize('{"final_note": "x"', decision, []))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,65 @@
+"""
+Unit tests for near-duplicate analysis reuse.
+"""
+
+import pytest
+from server.services.analysis_reuse import (
+    normalize_text, match_variants, arguments_match, patch_analysis
+)
+
+
+PRIOR = [
+    {"variant_name": "Move", "type": "pro", "text": "Higher salary because the market there pays more."},
+    {"variant_name": "Stay", "type": "pro", "text": "Close to family, which matters a lot to me."},
+]
+
+
+class TestAnalysisReuse:
+    """Test argument-set matching and analysis patching."""
+    
+    def test_normalize_text(self):
+        """Test that case, punctuation and spacing are ignored."""
+        assert normalize_text("  Hello,   WORLD! ") == "hello world"
+    
+    def test_match_variants_ignores_case_and_order(self):
+        """Test variant mapping by normalized name."""
+        assert match_variants(["stay", "Move "], ["Move", "Stay"]) == {"stay": "Stay", "Move ": "Move"}
+        assert match_variants(["Move", "Travel"], ["Move", "Stay"]) is None
+        assert match_variants(["Move"], ["Move", "Stay"]) is None
+    
+    def test_reordered_arguments_with_typo_match(self):
+        """Test that reordering and a small typo still count as the same set."""
+        current = [
+            {"variant_name": "Stay", "type": "pro", "text": "Close to familly, which matters a lot to me"},
+            {"variant_name": "Move", "type": "pro", "text": "higher salary because the market there pays more"},
+        ]
+        
+        assert arguments_match(current, PRIOR, {"Move": "Move", "Stay": "Stay"})
+    
+    def test_changed_argument_does_not_match(self):
+        """Test that a substantively different argument blocks reuse."""
+        current = [
+            PRIOR[0],
+            {"variant_name": "Stay", "type": "pro", "text": "I can buy a house here within two years."},
+        ]
+        
+        assert not arguments_match(current, PRIOR, {"Move": "Move", "Stay": "Stay"})
+    
+    def test_argument_type_must_match(self):
+        """Test that a pro can't match a con with the same text."""
+        current = [PRIOR[0], dict(PRIOR[1], type="con")]
+        
+        assert not arguments_match(current, PRIOR, {"Move": "Move", "Stay": "Stay"})
+    
+    def test_patch_analysis_renames_variants(self):
+        """Test that analysis is re-keyed to current variant names."""
+        prior_analysis = {"argument_quality_comparison": {"Move": {"x": 1}, "Stay": {"x": 2}}, "final_note": "n"}
+        
+        patched = patch_analysis(prior_analysis, {"move": "Move", "stay": "Stay"})
+        
+        assert patched["argument_quality_comparison"] == {"move": {"x": 1}, "stay": {"x": 2}}
+        assert prior_analysis["argument_quality_comparison"] == {"Move": {"x": 1}, "Stay": {"x": 2}}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
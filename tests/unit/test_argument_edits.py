@@ -0,0 +1,77 @@
+"""
+Unit tests for argument edits (applying changes, diffing, reusable checkpoints).
+"""
+
+import uuid
+import pytest
+from server.schemas.decision import ArgumentChanges
+from server.services.argument_edits import apply_changes, carry_over_checkpoints, diff_arguments
+
+ROWS = [
+    {"id": uuid.uuid4(), "variant_name": "Move", "type": "pro", "text": "Higher salary because the market there pays more"},
+    {"id": uuid.uuid4(), "variant_name": "Stay", "type": "con", "text": "Career growth is slow because the company is small"},
+    {"id": uuid.uuid4(), "variant_name": "Stay", "type": "pro", "text": "Friends are here because I grew up in this city"},
+]
+
+
+def ml_input(*items):
+    return [{"id": arg_id, "variant_name": variant, "type": "pro", "text": arg_id} for arg_id, variant in items]
+
+
+class TestApplyChanges:
+    """Test applying add / edit / remove operations to stored rows."""
+
+    def test_add_edit_remove(self):
+        """Test that edits keep row IDs, removed rows disappear and added arguments come last."""
+        changes = ArgumentChanges(
+            add=[{"variant_name": "Move", "type": "con", "text": "Far from family because flights take a whole day"}],
+            edit=[{"id": ROWS[0]["id"], "text": "Higher salary because the market there pays much more"}],
+            remove=[ROWS[2]["id"]]
+        )
+        arguments = apply_changes(ROWS, changes)
+        assert [arg["id"] for arg in arguments] == [ROWS[0]["id"], ROWS[1]["id"], None]
+        assert arguments[0]["text"] == "Higher salary because the market there pays much more"
+        assert arguments[0]["type"] == "pro"  # Fields not given are unchanged
+        assert arguments[2]["variant_name"] == "Move"
+        assert ROWS[0]["text"] == "Higher salary because the market there pays more"  # Rows are not mutated
+
+    def test_unknown_id(self):
+        """Test that IDs of other decisions' arguments are rejected."""
+        with pytest.raises(ValueError):
+            apply_changes(ROWS, ArgumentChanges(remove=[uuid.uuid4()]))
+
+
+class TestDiffArguments:
+    """Test the diff between analyzed and edited arguments."""
+
+    def test_edit_is_remove_and_add(self):
+        """Test that a changed argument shows up as removed and added, in its variant only."""
+        diff = diff_arguments(ml_input(("a", "Move"), ("b", "Stay")), ml_input(("a", "Move"), ("c", "Stay")))
+        assert [arg["id"] for arg in diff["added"]] == ["c"]
+        assert [arg["id"] for arg in diff["removed"]] == ["b"]
+        assert diff["variants"] == ["Stay"]
+
+    def test_no_changes(self):
+        """Test that identical arguments give an empty diff."""
+        arguments = ml_input(("a", "Move"), ("b", "Stay"))
+        assert diff_arguments(arguments, list(reversed(arguments)))["variants"] == []
+
+
+class TestCarryOverCheckpoints:
+    """Test which checkpoints survive an edit."""
+
+    def test_reusable_parts_kept(self):
+        """Test that pairs of remaining arguments and context of unchanged variants are kept."""
+        checkpoints = {
+            "ml_scoring": {"a": 50.0, "b": 50.0},
+            "ml_pairs": {"a|b": 1.5, "a|c": -0.5},
+            "rag": {"Move": ["past move"], "Stay": ["past stay"]},
+            "index": ["a", "b"],
+        }
+        edit = {"analysis": {}, "arguments": []}
+        kept = carry_over_checkpoints(checkpoints, ml_input(("a", "Move"), ("b", "Stay"), ("d", "Stay")), ["Stay"], edit)
+        assert kept == {"ml_pairs": {"a|b": 1.5}, "rag": {"Move": ["past move"]}, "edit": edit}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,59 @@
+"""
+Unit tests for local disk caches.
+"""
+
+import pytest
+from server.services.cache import DiskCache, make_key
+
+
+class TestDiskCache:
+    """Test SQLite-backed cache behaviour."""
+    
+    @pytest.fixture
+    def cache_path(self, tmp_path):
+        return str(tmp_path / "cache.sqlite")
+    
+    def test_set_and_get(self, cache_path):
+        """Test round-trip of JSON values."""
+        cache = DiskCache(cache_path)
+        cache.set("a", [0.1, 0.2])
+        cache.set_many([("b", {"x": 1}), ("c", 3.5)])
+        
+        assert cache.get("a") == [0.1, 0.2]
+        assert cache.get_many(["b", "c", "missing"]) == {"b": {"x": 1}, "c": 3.5}
+        assert cache.get("missing") is None
+    
+    def test_size_cap_evicts_oldest(self, cache_path):
+        """Test that the oldest entries are evicted past max_entries."""
+        cache = DiskCache(cache_path, max_entries=10)
+        for i in range(25):
+            cache.set(f"k{i}", i)
+        
+        assert len(cache) <= 10
+        assert cache.get("k24") == 24
+        assert cache.get("k0") is None
+    
+    def test_ttl_expires_entries(self, cache_path):
+        """Test that expired entries are not returned."""
+        cache = DiskCache(cache_path, ttl_seconds=-1)
+        cache.set("a", 1)
+        
+        assert cache.get("a") is None
+    
+    def test_backup_is_readable(self, cache_path, tmp_path):
+        """Test that a backup can be opened as a cache."""
+        cache = DiskCache(cache_path)
+        cache.set("a", "value")
+        backup_path = str(tmp_path / "backup.sqlite")
+        cache.backup(backup_path)
+        
+        assert DiskCache(backup_path).get("a") == "value"
+    
+    def test_make_key_separates_parts(self):
+        """Test that key parts can't be shifted into each other."""
+        assert make_key("ab", "c") != make_key("a", "bc")
+        assert make_key("a", "b") == make_key("a", "b")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""
+Unit tests for the compact LLM output schema and its expansion.
+"""
+
+import pytest
+from server.schemas.decision import ReasoningAnalysis
+from server.services.compact_schema import expand_analysis, expand_partial, expand_variant
+
+
+COMPACT = {
+    "v": {
+        "Stocks": {
+            "s": ["liquid"],
+            "w": ["volatile"],
+            "f": [["Hasty Generalization", "sell anytime", "Markets can freeze"]],
+            "m": ["fees"],
+            "q": "S"
+        },
+        "Real Estate": {"s": [], "w": ["illiquid"], "f": [], "m": [], "q": "I"}
+    },
+    "a": "Agrees with scores",
+    "p": "Prefers liquidity",
+    "k": ["'sell anytime' — not always"],
+    "n": "Reasonable comparison",
+    "sc": [0.7, 0.4, 1.2],
+    "c": "m",
+    "si": [["abc", "I hate risk", "Stocks are fine", "Conflict"], ["past", "now", "why"]]
+}
+
+
+class TestExpandAnalysis:
+    """Test compact -> full schema expansion."""
+
+    def test_expands_to_reasoning_analysis(self):
+        """Test that the expanded dict validates as ReasoningAnalysis."""
+        analysis = ReasoningAnalysis.parse_obj(expand_analysis(COMPACT))
+
+        stocks = analysis.argument_quality_comparison["Stocks"]
+        assert stocks.strengths == ["liquid"]
+        assert stocks.logical_fallacies[0].type == "Hasty Generalization"
+        assert stocks.logical_fallacies[0].explanation == "Markets can freeze"
+        assert stocks.data_quality == "SUFFICIENT"
+        assert analysis.argument_quality_comparison["Real Estate"].data_quality == "INSUFFICIENT_REASONING"
+        assert analysis.final_note == "Reasonable comparison"
+        assert analysis.confidence_level == "medium"
+
+    def test_scores_are_positional_and_clamped(self):
+        """Test score array order and clamping to [0, 1]."""
+        scores = expand_analysis(COMPACT)["score_details"]
+
+        assert scores == {"logic_stability": 0.7, "data_grounding": 0.4, "historical_consistency": 1.0}
+
+    def test_inconsistency_without_decision_id(self):
+        """Test that a 3-element inconsistency gets past_decision_id None."""
+        items = expand_analysis(COMPACT)["systemic_inconsistencies"]
+
+        assert items[0]["past_decision_id"] == "abc"
+        assert items[1] == {
+            "past_decision_id": None,
+            "past_statement": "past",
+            "current_statement": "now",
+            "conflict_description": "why"
+        }
+
+    def test_full_schema_passes_through(self):
+        """Test that a response in the full schema is left intact."""
+        full = {
+            "argument_quality_comparison": {
+                "A": {
+                    "strengths": ["x"], "weaknesses": [], "missing_considerations": [],
+                    "logical_fallacies": [{"type": "t", "quote": "q", "explanation": "e"}],
+                    "data_quality": "SUFFICIENT"
+                }
+            },
+            "alignment_with_model_scores": "a",
+            "detected_reasoning_patterns": "p",
+            "key_weak_points_to_reconsider": [],
+            "final_note": "n",
+            "score_details": {"logic_stability": 0.5, "data_grounding": 0.5, "historical_consistency": 0.5},
+            "confidence_level": "high"
+        }
+
+        assert expand_analysis(full) == full
+
+    def test_missing_variant_lists_default_empty(self):
+        """Test that omitted variant lists become empty lists."""
+        details = expand_variant({"q": "I"})
+
+        assert details["strengths"] == [] and details["logical_fallacies"] == []
+
+
+class TestExpandPartial:
+    """Test translation of streamed partial results."""
+
+    def test_variant_partial(self):
+        """Test that a finished variant maps to argument_quality_comparison."""
+        path, value = expand_partial(("v", "Stocks"), COMPACT["v"]["Stocks"])
+
+        assert path == ("argument_quality_comparison", "Stocks")
+        assert value["data_quality"] == "SUFFICIENT"
+
+    def test_top_level_partial(self):
+        """Test that short top-level keys are renamed and expanded."""
+        assert expand_partial(("n",), "note") == (("final_note",), "note")
+        assert expand_partial(("c",), "h") == (("confidence_level",), "high")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,133 @@
+"""
+Unit tests for the analysis deadline (stage budgets, skipping, cancellation).
+"""
+
+import asyncio
+import time
+import pytest
+from server.core.config import config
+from server.services.deadline import Deadline, DeadlineExceeded, bound, check_deadline, remaining_seconds, stage_budgets
+from server.services.stage_graph import Stage, StageFailed, StageGraph
+
+
+def sleeper(seconds, value=None):
+    def run(results):
+        time.sleep(seconds)
+        return value
+    return run
+
+
+def cooperative(seconds, value=None):
+    """Sleeps in small steps, stopping at its deadline like the cross-encoder loop."""
+    def run(results):
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            check_deadline("test stage")
+            time.sleep(0.01)
+        return value
+    return run
+
+
+class TestDeadline:
+    """Test deadline basics."""
+
+    def test_bound_to_context(self):
+        """Test that the current deadline is visible only inside bound()."""
+        assert remaining_seconds() is None
+        with bound(Deadline.after(5)):
+            assert 4 < remaining_seconds() <= 5
+        assert remaining_seconds() is None
+
+    def test_check_raises_when_expired(self):
+        """Test that check_deadline raises once the deadline passed."""
+        with bound(Deadline.after(-1)):
+            with pytest.raises(DeadlineExceeded):
+                check_deadline()
+
+    def test_stage_budgets(self, monkeypatch):
+        """Test that configured shares become seconds."""
+        monkeypatch.setattr(config, "ANALYSIS_STAGE_BUDGETS", '{"ml_scoring": 0.25, "llm": 0.5}')
+        assert stage_budgets(60) == {"ml_scoring": 15.0, "llm": 30.0}
+
+
+class TestStageBudgets:
+    """Test deadline enforcement in the stage graph."""
+
+    def test_optional_stage_cut_short(self):
+        """Test that a slow optional stage is cut at its budget and the run continues."""
+        graph = StageGraph([
+            Stage("rag", cooperative(2, {"A": []}), required=False, fallback={}, budget=0.1),
+            Stage("llm", lambda r: r["rag"], depends_on=("rag",)),
+        ])
+        started = time.perf_counter()
+        results, timeline = graph.run(deadline=Deadline.after(5))
+        assert time.perf_counter() - started < 1
+        assert results["llm"] == {}
+        assert timeline[0]["status"] == "degraded"
+        assert "DeadlineExceeded" in timeline[0]["error"]
+
+    def test_optional_stage_skipped_without_time(self):
+        """Test that an optional stage is not started when required stages need the time left."""
+        graph = StageGraph([
+            Stage("rag", sleeper(0, "context"), required=False, fallback={}),
+            Stage("llm", lambda r: r["rag"], depends_on=("rag",), budget=10),
+        ])
+        results, timeline = graph.run(deadline=Deadline.after(2))
+        assert results["llm"] == {}
+        assert timeline[0]["duration_ms"] == 0
+
+    def test_required_stage_fails_at_deadline(self):
+        """Test that a required stage overrunning the deadline fails the run."""
+        graph = StageGraph([Stage("llm", cooperative(2))])
+        with pytest.raises(StageFailed) as exc_info:
+            graph.run(deadline=Deadline.after(0.1))
+        assert isinstance(exc_info.value.error, DeadlineExceeded)
+
+    def test_stuck_stage_abandoned(self):
+        """Test that a stage that ignores its deadline is abandoned shortly after it."""
+        graph = StageGraph([Stage("llm", sleeper(3))])
+        started = time.perf_counter()
+        with pytest.raises(StageFailed) as exc_info:
+            graph.run(deadline=Deadline.after(0.1))
+        assert time.perf_counter() - started < 2
+        assert isinstance(exc_info.value.error, DeadlineExceeded)
+
+    def test_required_stage_keeps_later_budget(self):
+        """Test that an earlier required stage leaves the later stage's budget untouched."""
+        graph = StageGraph([
+            Stage("ml", cooperative(2), budget=0.1),
+            Stage("llm", sleeper(0), depends_on=("ml",), budget=1.0),
+        ])
+        with pytest.raises(StageFailed) as exc_info:
+            graph.run(deadline=Deadline.after(1.2))
+        assert exc_info.value.stage == "ml"
+        assert exc_info.value.timeline[0]["duration_ms"] < 500
+
+
+class TestLLMCancellation:
+    """Test that LLM calls are cancelled at the deadline."""
+
+    def test_run_sync_cancels_in_flight_call(self):
+        """Test that run_sync stops waiting and cancels the coroutine when the deadline passes."""
+        from server.services.llm_service import LLMService
+        service = LLMService()
+        cancelled = []
+
+        async def slow_call():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        started = time.perf_counter()
+        with bound(Deadline.after(0.1)):
+            with pytest.raises(DeadlineExceeded):
+                service.run_sync(slow_call())
+        assert time.perf_counter() - started < 1
+        time.sleep(0.1)
+        assert cancelled == [True]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,52 @@
+"""
+Unit tests for submission deduplication (canonical content hash).
+"""
+
+import uuid
+import pytest
+from server.schemas.decision import DecisionCreate
+from server.services.idempotency import content_hash, submission_lock_id
+
+ARGUMENTS = [
+    {"variant_name": "Move", "type": "pro", "text": "Higher salary because the market there pays more"},
+    {"variant_name": "Stay", "type": "con", "text": "Career growth is slow because the company is small"},
+]
+
+
+def make_decision(context="Should I move abroad for a new job offer or stay in my current role here?", arguments=ARGUMENTS):
+    return DecisionCreate(context=context, variants=["Move", "Stay"], arguments=arguments)
+
+
+class TestContentHash:
+    """Test what makes two submissions the same decision."""
+
+    def test_identical_submissions_match(self):
+        """Test that a resubmitted payload hashes the same."""
+        assert content_hash(make_decision()) == content_hash(make_decision())
+
+    def test_whitespace_and_argument_order_ignored(self):
+        """Test that formatting differences do not make a new decision."""
+        reformatted = make_decision(
+            context="  Should I move abroad for a new job offer or stay in   my current role here?\n",
+            arguments=[ARGUMENTS[1], dict(ARGUMENTS[0], text=ARGUMENTS[0]["text"] + "  ")]
+        )
+        assert content_hash(reformatted) == content_hash(make_decision())
+
+    def test_content_changes_detected(self):
+        """Test that edited text or argument types change the hash."""
+        edited_text = [dict(ARGUMENTS[0], text="Higher salary because the market there pays much more"), ARGUMENTS[1]]
+        edited_type = [dict(ARGUMENTS[0], type="con"), ARGUMENTS[1]]
+        original = content_hash(make_decision())
+        assert content_hash(make_decision(arguments=edited_text)) != original
+        assert content_hash(make_decision(arguments=edited_type)) != original
+
+    def test_lock_id_is_signed_64_bit(self):
+        """Test that advisory lock IDs fit a Postgres bigint and are stable per user."""
+        user_id = uuid.uuid4()
+        lock_id = submission_lock_id(user_id)
+        assert -2 ** 63 <= lock_id < 2 ** 63
+        assert submission_lock_id(user_id) == lock_id
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,92 @@
+"""
+Unit tests for weighted fair queuing of analysis jobs.
+"""
+
+import pytest
+from server.core.config import config
+from server.schemas.decision import DecisionCreate
+from server.services.job_scheduler import class_weight, estimate_cost, virtual_tags
+
+
+def make_decision(arguments_per_variant, text="This option is better because it saves time and money every week"):
+    return DecisionCreate(
+        context="Which option should I pick for the next year of my career",
+        variants=["A", "B"],
+        arguments=[
+            {"variant_name": variant, "type": "pro", "text": text}
+            for variant in ("A", "B") for _ in range(arguments_per_variant)
+        ]
+    )
+
+
+class FairQueue:
+    """Minimal in-memory queue using the scheduler's tags (claim = smallest finish tag)."""
+
+    def __init__(self):
+        self.active = []
+
+    def enqueue(self, user, cost, priority="interactive"):
+        starts = [job["start"] for job in self.active]
+        virtual_time = min(starts) if starts else 0.0
+        tails = [j["finish"] for j in self.active if j["user"] == user and j["priority"] == priority]
+        start, finish = virtual_tags(virtual_time, max(tails) if tails else None, cost, class_weight(priority))
+        self.active.append({"user": user, "priority": priority, "start": start, "finish": finish})
+
+    def claim(self):
+        job = min(self.active, key=lambda j: j["finish"])
+        self.active.remove(job)
+        return job
+
+
+class TestEstimateCost:
+    """Test the job cost model."""
+
+    def test_grows_with_arguments(self):
+        """Test that more arguments (and argument pairs) cost more."""
+        assert estimate_cost(make_decision(10)) > estimate_cost(make_decision(2)) > estimate_cost(make_decision(1))
+
+    def test_grows_with_prompt_size(self):
+        """Test that longer texts cost more."""
+        long_text = "This option is better because " + "it saves a lot of time and money " * 50
+        assert estimate_cost(make_decision(1, text=long_text)) > estimate_cost(make_decision(1))
+
+
+class TestFairQueuing:
+    """Test virtual tags and claim order."""
+
+    def test_unknown_class_rejected(self):
+        """Test that only known priority classes are accepted."""
+        with pytest.raises(ValueError):
+            class_weight("urgent")
+        with pytest.raises(ValueError):
+            class_weight("reanalysis")  # Re-analysis goes through the Batch API, not the queue
+
+    def test_tags_follow_user_tail(self):
+        """Test that a user's next job starts where their previous one finishes."""
+        assert virtual_tags(5.0, None, 4.0, 2.0) == (5.0, 7.0)
+        assert virtual_tags(5.0, 9.0, 4.0, 2.0) == (9.0, 11.0)
+
+    def test_light_user_overtakes_heavy_backlog(self):
+        """Test that one job of another user is claimed ahead of a heavy user's backlog."""
+        queue = FairQueue()
+        for _ in range(20):
+            queue.enqueue("heavy", cost=5.0)
+        queue.enqueue("light", cost=5.0)
+        claimed = [queue.claim()["user"] for _ in range(3)]
+        assert "light" in claimed
+
+    def test_class_weights_share_workers(self, monkeypatch):
+        """Test that interactive jobs get proportionally more turns than batch jobs."""
+        monkeypatch.setattr(config, "QUEUE_WEIGHT_INTERACTIVE", 4.0)
+        monkeypatch.setattr(config, "QUEUE_WEIGHT_BATCH", 1.0)
+        queue = FairQueue()
+        for _ in range(20):
+            queue.enqueue("script", cost=1.0, priority="batch")
+            queue.enqueue("user", cost=1.0, priority="interactive")
+        first = [queue.claim()["priority"] for _ in range(10)]
+        assert first.count("interactive") >= 7
+        assert "batch" in first
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,226 @@
+"""
+Unit tests for the analysis job worker (claim, heartbeat, retry, fail).
+"""
+
+import time
+import uuid
+from types import SimpleNamespace
+import pytest
+from server.core.config import config
+from server.services.analysis_errors import AnalysisRetry
+from server.worker import JobWorker, queue_wait_summary, retry_delay
+
+
+PAYLOAD = {
+    "context": "Should I move to another city for a better paid job next year",
+    "variants": ["A", "B"],
+    "arguments": [
+        {"variant_name": "A", "type": "pro", "text": "The new job pays much better than my current one"},
+        {"variant_name": "B", "type": "pro", "text": "Staying keeps me close to my family and friends"}
+    ]
+}
+
+
+class FakeJobs:
+    """In-memory stand-in for JobRepository (one queue shared by all sessions)."""
+
+    def __init__(self):
+        self.jobs = []
+        self.heartbeats = 0
+
+    def __call__(self, db):
+        return self
+
+    def add(self, attempts=0, max_attempts=3, batch_id=None):
+        job = SimpleNamespace(
+            id=uuid.uuid4(), decision_id=uuid.uuid4(), payload=PAYLOAD, status="queued",
+            priority="batch" if batch_id else "interactive", cost=1.0, queue_wait_seconds=0.5, batch_id=batch_id,
+            attempts=attempts, max_attempts=max_attempts, leased_by=None, last_error=None, delay=None
+        )
+        self.jobs.append(job)
+        return job
+
+    def claim(self, worker_id, lease_seconds):
+        for job in self.jobs:
+            if job.status == "queued":
+                job.status, job.leased_by = "running", worker_id
+                job.attempts += 1
+                return job
+        return None
+
+    def claim_batch(self, worker_id, lease_seconds, batch_id, limit):
+        claimed = []
+        for job in self.jobs:
+            if len(claimed) < limit and job.status == "queued" and job.batch_id == batch_id:
+                job.status, job.leased_by = "running", worker_id
+                job.attempts += 1
+                claimed.append(job)
+        return claimed
+
+    def _leased(self, job_id, worker_id):
+        return next((j for j in self.jobs if j.id == job_id and j.leased_by == worker_id and j.status == "running"), None)
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        self.heartbeats += 1
+        return self._leased(job_id, worker_id) is not None
+
+    def complete(self, job_id, worker_id):
+        job = self._leased(job_id, worker_id)
+        if job:
+            job.status, job.leased_by = "completed", None
+        return job is not None
+
+    def retry(self, job_id, worker_id, error, delay_seconds):
+        job = self._leased(job_id, worker_id)
+        if job:
+            job.status, job.leased_by, job.last_error, job.delay = "queued", None, error, delay_seconds
+        return job is not None
+
+    def fail(self, job_id, worker_id, error):
+        job = self._leased(job_id, worker_id)
+        if job:
+            job.status, job.leased_by, job.last_error = "failed", None, error
+        return job is not None
+
+
+class FakeSession:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeOrchestrator:
+    def __init__(self, error=None, duration=0.0):
+        self.error = error
+        self.duration = duration
+        self.calls = []
+        self.abandoned = []
+        self.prefetched = []
+
+    def run_background_analysis(self, db, decision_id, decision_data, final_attempt=True):
+        self.calls.append((decision_id, final_attempt))
+        time.sleep(self.duration)
+        if self.error:
+            raise self.error
+
+    def abandon_analysis(self, db, decision_id):
+        self.abandoned.append(decision_id)
+
+    def prefetch_batch(self, db, items):
+        self.prefetched.append([decision_id for decision_id, _ in items])
+
+
+def make_worker(jobs, orchestrator):
+    return JobWorker(orchestrator, session_factory=FakeSession, repository_factory=jobs, worker_id="w1")
+
+
+class TestJobWorker:
+    """Test job state transitions."""
+
+    def test_no_job(self):
+        """Test that an empty queue returns False."""
+        assert make_worker(FakeJobs(), FakeOrchestrator()).run_once() is False
+
+    def test_completes_job(self):
+        """Test that a successful run completes the job (not the final attempt yet)."""
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator()
+        job = jobs.add()
+        assert make_worker(jobs, orchestrator).run_once() is True
+        assert job.status == "completed"
+        assert orchestrator.calls == [(job.decision_id, False)]
+
+    def test_retry_with_backoff(self):
+        """Test that a failed non-final attempt is re-queued with a delay."""
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator(error=AnalysisRetry("llm down"))
+        job = jobs.add()
+        make_worker(jobs, orchestrator).run_once()
+        assert job.status == "queued"
+        assert job.last_error == "llm down"
+        assert 0 < job.delay <= config.QUEUE_RETRY_BACKOFF_SECONDS
+
+    def test_last_attempt_is_final(self):
+        """Test that the orchestrator is told when no retries are left."""
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator()
+        jobs.add(attempts=2, max_attempts=3)
+        make_worker(jobs, orchestrator).run_once()
+        assert orchestrator.calls[0][1] is True
+
+    def test_unexpected_error_fails_job(self):
+        """Test that errors other than AnalysisRetry fail the job."""
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator(error=RuntimeError("bad payload"))
+        job = jobs.add()
+        make_worker(jobs, orchestrator).run_once()
+        assert job.status == "failed"
+
+    def test_expired_final_attempt_abandoned(self):
+        """Test that a job reclaimed after its final attempt is abandoned, not run again."""
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator()
+        job = jobs.add(attempts=3, max_attempts=3)
+        make_worker(jobs, orchestrator).run_once()
+        assert job.status == "failed"
+        assert orchestrator.calls == []
+        assert orchestrator.abandoned == [job.decision_id]
+
+    def test_heartbeats_while_running(self, monkeypatch):
+        """Test that the lease is extended while a long job runs."""
+        monkeypatch.setattr(config, "QUEUE_HEARTBEAT_SECONDS", 0.02)
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator(duration=0.15)
+        job = jobs.add()
+        make_worker(jobs, orchestrator).run_once()
+        assert jobs.heartbeats >= 3
+        assert job.status == "completed"
+
+    def test_batch_jobs_claimed_together(self, monkeypatch):
+        """Test that jobs of one bulk submission are prefetched as a group, then each is run."""
+        monkeypatch.setattr(config, "BATCH_CLAIM_SIZE", 3)
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator()
+        batch_id = uuid.uuid4()
+        group = [jobs.add(batch_id=batch_id) for _ in range(4)]
+        other = jobs.add()
+        assert make_worker(jobs, orchestrator).run_once() is True
+        assert orchestrator.prefetched == [[job.decision_id for job in group[:3]]]
+        assert sorted(call[0] for call in orchestrator.calls) == sorted(job.decision_id for job in group[:3])
+        assert [job.status for job in group] == ["completed"] * 3 + ["queued"]
+        assert other.status == "queued"
+
+    def test_expired_batch_job_not_prefetched(self, monkeypatch):
+        """Test that a group member past its final attempt is abandoned, not prefetched."""
+        monkeypatch.setattr(config, "BATCH_CLAIM_SIZE", 2)
+        jobs, orchestrator = FakeJobs(), FakeOrchestrator()
+        batch_id = uuid.uuid4()
+        fresh = jobs.add(batch_id=batch_id)
+        expired = jobs.add(attempts=3, max_attempts=3, batch_id=batch_id)
+        make_worker(jobs, orchestrator).run_once()
+        assert orchestrator.prefetched == [[fresh.decision_id]]
+        assert orchestrator.abandoned == [expired.decision_id]
+        assert (fresh.status, expired.status) == ("completed", "failed")
+
+
+class TestRetryDelay:
+    """Test retry backoff."""
+
+    def test_exponential_with_cap(self, monkeypatch):
+        """Test that delays double per attempt, jittered, and are capped."""
+        monkeypatch.setattr(config, "QUEUE_RETRY_BACKOFF_SECONDS", 10.0)
+        monkeypatch.setattr(config, "QUEUE_RETRY_BACKOFF_MAX_SECONDS", 30.0)
+        assert 5 <= retry_delay(1) <= 10
+        assert 10 <= retry_delay(2) <= 20
+        assert 15 <= retry_delay(5) <= 30
+
+
+class TestQueueWaitSummary:
+    """Test the queue wait /metrics entry read from the job table."""
+
+    def test_per_priority(self):
+        """Test percentiles of claimed jobs and the oldest still-queued wait, per priority class."""
+        summary = queue_wait_summary({"interactive": [0.5, 1.0, 2.0, 30.0]}, {"interactive": 4.0, "batch": 120.0})
+        assert summary["values"]["priority=interactive"] == {
+            "count": 4, "p50": 2.0, "p95": 30.0, "p99": 30.0, "oldest_queued_seconds": 4.0
+        }
+        assert summary["values"]["priority=batch"] == {"count": 0, "oldest_queued_seconds": 120.0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
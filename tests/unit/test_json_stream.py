@@ -0,0 +1,73 @@
+"""
+Unit tests for the incremental JSON parser.
+"""
+
+import json
+import pytest
+from server.services.json_stream import IncrementalJSONParser
+
+
+SAMPLE = {
+    "argument_quality_comparison": {
+        "Stocks": {"strengths": ["liquid, \"fast\""], "weaknesses": [], "data_quality": "SUFFICIENT"},
+        "Real Estate": {"strengths": [], "weaknesses": ["illiquid {x}"], "data_quality": "INSUFFICIENT_REASONING"}
+    },
+    "final_note": "Both paths need more data.",
+    "score_details": {"logic_stability": 0.5, "data_grounding": 0.25, "historical_consistency": 1},
+    "confidence_level": None,
+    "key_weak_points_to_reconsider": ["a", "b"]
+}
+
+
+def feed_in_chunks(parser, text, size):
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return events
+
+
+class TestIncrementalJSONParser:
+    """Test streaming field extraction."""
+    
+    @pytest.mark.parametrize("chunk_size", [1, 3, 17, 10000])
+    def test_emits_all_fields_for_any_chunking(self, chunk_size):
+        """Test that chunk boundaries don't change the result."""
+        parser = IncrementalJSONParser(expand_keys={"argument_quality_comparison"})
+        events = feed_in_chunks(parser, json.dumps(SAMPLE, indent=2), chunk_size)
+        
+        assert dict(events) == {
+            ("argument_quality_comparison", "Stocks"): SAMPLE["argument_quality_comparison"]["Stocks"],
+            ("argument_quality_comparison", "Real Estate"): SAMPLE["argument_quality_comparison"]["Real Estate"],
+            ("final_note",): SAMPLE["final_note"],
+            ("score_details",): SAMPLE["score_details"],
+            ("confidence_level",): None,
+            ("key_weak_points_to_reconsider",): ["a", "b"],
+        }
+        assert parser.done
+    
+    def test_entries_emitted_before_object_closes(self):
+        """Test that a variant is emitted as soon as its value is complete."""
+        parser = IncrementalJSONParser(expand_keys={"argument_quality_comparison"})
+        text = json.dumps(SAMPLE)
+        cut = text.index('"Real Estate"')
+        
+        events = parser.feed(text[:cut])
+        
+        assert [path for path, _ in events] == [("argument_quality_comparison", "Stocks")]
+    
+    def test_incomplete_primitive_not_emitted(self):
+        """Test that a number is only emitted once its terminator arrives."""
+        parser = IncrementalJSONParser()
+        
+        assert parser.feed('{"a": 12') == []
+        assert parser.feed('3, "b": true}') == [(("a",), 123), (("b",), True)]
+    
+    def test_ignores_preamble(self):
+        """Test that text before the root object is skipped."""
+        parser = IncrementalJSONParser()
+        
+        assert parser.feed('```json\n{"final_note": "ok"}') == [(("final_note",), "ok")]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
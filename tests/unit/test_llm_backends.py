@@ -0,0 +1,152 @@
+"""
+Unit tests for LLM backend routing and failover against fake OpenAI servers.
+"""
+
+import asyncio
+import pytest
+from server.services.llm_backends import BackendRegistry, LLMBackend, backend_requests
+
+
+def make_registry(*servers, **kwargs):
+    backends = [
+        LLMBackend(name=f"backend-{i}-{id(server)}", model="fake", base_url=server.base_url, api_key="test")
+        for i, server in enumerate(servers)
+    ]
+    return BackendRegistry(backends, **kwargs)
+
+
+def complete(registry):
+    """Send one chat completion through the registry, return content."""
+    async def send(backend):
+        response = await backend.client.chat.completions.create(
+            model=backend.model, messages=[{"role": "user", "content": "hi"}]
+        )
+        backend.record_usage(response.usage)
+        return response.choices[0].message.content
+
+    return asyncio.run(registry.call(send))
+
+
+class TestRanking:
+    """Test backend ordering by EWMA latency and health."""
+
+    def make(self, *names):
+        return BackendRegistry([LLMBackend(name=n, model="fake", api_key="test") for n in names])
+
+    def test_untried_backends_first(self):
+        """Test that backends without samples are tried before measured ones."""
+        registry = self.make("a", "b")
+        registry.record_success(registry.backends[0], 0.5)
+
+        assert [b.name for b in registry.ranked()] == ["b", "a"]
+
+    def test_fastest_first(self):
+        """Test that lower EWMA latency ranks first."""
+        registry = self.make("slow", "fast")
+        registry.record_success(registry.backends[0], 2.0)
+        registry.record_success(registry.backends[1], 0.2)
+
+        assert registry.ranked()[0].name == "fast"
+
+    def test_ewma_smoothing(self):
+        """Test that one outlier moves the average by alpha only."""
+        registry = BackendRegistry([LLMBackend(name="a", model="fake", api_key="test")], alpha=0.5)
+        backend = registry.backends[0]
+        registry.record_success(backend, 1.0)
+        registry.record_success(backend, 3.0)
+
+        assert backend.latency_ewma == pytest.approx(2.0)
+
+    def test_errors_penalize_score(self):
+        """Test that a fast but failing backend ranks behind a reliable one."""
+        registry = self.make("flaky", "steady")
+        flaky, steady = registry.backends
+        registry.record_success(flaky, 0.5)
+        registry.record_success(steady, 0.8)
+        registry.record_failure(flaky, RuntimeError("boom"))
+        registry.record_failure(flaky, RuntimeError("boom"))
+
+        assert registry.ranked()[0].name == "steady"
+
+    def test_failed_untried_backend_ranks_last(self):
+        """Test that a backend that only ever failed is not treated as untried."""
+        registry = self.make("broken", "good")
+        broken, good = registry.backends
+        registry.record_failure(broken, RuntimeError("boom"))
+        registry.record_failure(broken, RuntimeError("boom"))
+        registry.record_success(good, 1.5)
+
+        assert [b.name for b in registry.ranked()] == ["good", "broken"]
+
+    def test_cooldown_after_repeated_failures(self):
+        """Test that a backend is moved last after failure_threshold errors."""
+        registry = BackendRegistry(
+            [LLMBackend(name=n, model="fake", api_key="test") for n in ("a", "b")],
+            failure_threshold=2, cooldown_seconds=60
+        )
+        a = registry.backends[0]
+        registry.record_failure(a, RuntimeError("boom"))
+        assert a.healthy()
+        registry.record_failure(a, RuntimeError("boom"))
+
+        assert not a.healthy()
+        assert [b.name for b in registry.ranked()] == ["b", "a"]
+
+    def test_requires_backends(self):
+        """Test that an empty registry is rejected."""
+        with pytest.raises(ValueError):
+            BackendRegistry([])
+
+
+class TestFailover:
+    """Test routing against fake servers."""
+
+    def test_fails_over_to_next_backend(self, fake_openai, fake_openai_backup):
+        """Test that an error on the best backend moves the request on."""
+        fake_openai.script = [{"status": 500}]
+        fake_openai_backup.content = '{"from": "backup"}'
+        registry = make_registry(fake_openai, fake_openai_backup)
+        primary, backup = registry.backends
+
+        assert complete(registry) == '{"from": "backup"}'
+        assert primary.consecutive_failures == 1
+        assert backend_requests.value(backend=primary.name, outcome="error") == 1
+        assert backend_requests.value(backend=backup.name, outcome="ok") == 1
+
+    def test_raises_when_all_fail(self, fake_openai, fake_openai_backup):
+        """Test that the last error is raised if no backend succeeds."""
+        fake_openai.script = [{"status": 500}]
+        fake_openai_backup.script = [{"status": 503}]
+        registry = make_registry(fake_openai, fake_openai_backup)
+
+        with pytest.raises(Exception):
+            complete(registry)
+        assert fake_openai.requests == 1
+        assert fake_openai_backup.requests == 1
+
+    def test_non_retryable_error_not_failed_over(self, fake_openai, fake_openai_backup):
+        """Test that a 400 is raised without trying the next backend or penalizing this one."""
+        fake_openai.script = [{"status": 400}]
+        registry = make_registry(fake_openai, fake_openai_backup)
+        primary = registry.backends[0]
+
+        with pytest.raises(Exception):
+            complete(registry)
+        assert fake_openai_backup.requests == 0
+        assert primary.consecutive_failures == 0
+        assert primary.error_ewma == 0.0
+
+    def test_routes_to_faster_backend(self, fake_openai, fake_openai_backup):
+        """Test that measured latency steers traffic to the faster server."""
+        fake_openai.script = [{"delay": 0.3}] * 10
+        registry = make_registry(fake_openai, fake_openai_backup)
+
+        for _ in range(5):
+            complete(registry)
+
+        assert fake_openai.requests == 1  # Only the exploration request
+        assert fake_openai_backup.requests == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
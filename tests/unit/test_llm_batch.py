@@ -0,0 +1,168 @@
+"""
+Unit tests for batch re-analysis with the local Batch API stand-in.
+"""
+
+import json
+import uuid
+from types import SimpleNamespace
+import pytest
+from server.core.config import config
+from server.services.llm_batch import (
+    BatchClient, BatchReanalysis, LocalBatchClient, iter_results, wait_for_batch, write_batch_file
+)
+
+VARIANT = {
+    "strengths": ["s"], "weaknesses": [], "logical_fallacies": [],
+    "missing_considerations": [], "data_quality": "SUFFICIENT"
+}
+
+
+def analysis_for(body):
+    """Valid full-schema analysis for the variants named in the prompt."""
+    prompt = body["messages"][-1]["content"]
+    variants = [line.strip("= \n") for line in prompt.splitlines() if line.startswith("=== ")]
+    return json.dumps({
+        "argument_quality_comparison": {v: VARIANT for v in variants},
+        "alignment_with_model_scores": "a",
+        "detected_reasoning_patterns": "p",
+        "key_weak_points_to_reconsider": [],
+        "final_note": "re-analyzed"
+    })
+
+
+class FakeRepository:
+    """In-memory stand-in for DecisionRepository."""
+    BULK_UPDATE_CHUNK_SIZE = 2
+
+    def __init__(self, decisions):
+        self.decisions = {d.id: d for d in decisions}
+        self.updates = []
+
+    def iter_for_reanalysis(self, user_id=None, before=None, limit=None):
+        return list(self.decisions.values())[:limit]
+
+    def get_by_id(self, decision_id):
+        return self.decisions.get(decision_id)
+
+    def update_analyses_bulk(self, analyses):
+        self.updates.append(list(analyses))
+        return len(analyses)
+
+
+def make_decision(context):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        context=context,
+        variants=[SimpleNamespace(name="Stay"), SimpleNamespace(name="Move")],
+        arguments=[
+            SimpleNamespace(variant_name="Stay", type="pro", text="My family and friends all live in this city"),
+            SimpleNamespace(variant_name="Move", type="pro", text="The salary in the new city is much higher"),
+        ],
+        ml_scores={"Stay": 61.0, "Move": 74.0},
+        retrieved_context=["Last year I said career growth matters most to me"]
+    )
+
+
+class TestLocalBatchClient:
+    """Test the file-based Batch API stand-in."""
+
+    def test_interface_is_abstract(self):
+        """Test that a client missing part of the interface cannot be created."""
+        class Incomplete(BatchClient):
+            def upload(self, path):
+                return "file"
+
+        with pytest.raises(TypeError):
+            BatchClient()
+        with pytest.raises(TypeError):
+            Incomplete()
+
+    def test_round_trip(self, tmp_path):
+        """Test that requests are answered and results streamed back by custom_id."""
+        client = LocalBatchClient(str(tmp_path / "api"), respond=lambda body: body["messages"][0]["content"].upper())
+        path = str(tmp_path / "requests.jsonl")
+        count = write_batch_file([("a", [{"role": "user", "content": "x"}]), ("b", [{"role": "user", "content": "y"}])], path)
+
+        batch = client.create(client.upload(path))
+        batch = wait_for_batch(client, batch["id"], poll_seconds=0)
+
+        assert count == 2
+        assert batch["status"] == "completed"
+        assert batch["request_counts"] == {"total": 2, "completed": 2, "failed": 0}
+        assert list(iter_results(client, batch)) == [("a", "X", None), ("b", "Y", None)]
+
+    def test_request_format(self, tmp_path):
+        """Test that request lines follow the Batch API chat completion format."""
+        path = str(tmp_path / "requests.jsonl")
+        write_batch_file([("id-1", [{"role": "user", "content": "x"}])], path)
+
+        request = json.loads(open(path).read())
+        assert request["custom_id"] == "id-1"
+        assert request["url"] == "/v1/chat/completions"
+        assert request["body"]["model"] == config.LLM_MODEL
+        assert request["body"]["response_format"] == {"type": "json_object"}
+
+    def test_failed_requests_reported(self, tmp_path):
+        """Test that per-request errors come back with their custom_id."""
+        def respond(body):
+            raise RuntimeError("boom")
+        client = LocalBatchClient(str(tmp_path / "api"), respond=respond)
+        path = str(tmp_path / "requests.jsonl")
+        write_batch_file([("a", [])], path)
+
+        batch = client.retrieve(client.create(client.upload(path))["id"])
+        results = list(iter_results(client, batch))
+
+        assert batch["request_counts"]["failed"] == 1
+        assert results[0][0] == "a" and results[0][1] is None and "boom" in results[0][2]
+
+
+class TestBatchReanalysis:
+    """Test submit / collect against the local stand-in."""
+
+    @pytest.fixture
+    def llm_service(self, monkeypatch):
+        from server.services.llm_service import LLMService
+        monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+        return LLMService()
+
+    def test_submit_and_collect(self, tmp_path, llm_service):
+        """Test that every selected decision gets its new analysis in bulk."""
+        decisions = [make_decision(f"Should I move to another city for work, option set number {i}") for i in range(3)]
+        repo = FakeRepository(decisions)
+        client = LocalBatchClient(str(tmp_path / "api"), respond=analysis_for)
+        pipeline = BatchReanalysis(repo, llm_service, client, work_dir=str(tmp_path / "work"))
+
+        batch = pipeline.submit()
+        stats = pipeline.collect(wait_for_batch(client, batch["id"], poll_seconds=0))
+
+        assert stats == {"updated": 3, "failed": 0}
+        assert [len(chunk) for chunk in repo.updates] == [2, 1]
+        decision_id, analysis = repo.updates[0][0]
+        assert decision_id in repo.decisions
+        assert analysis["final_note"] == "re-analyzed"
+        assert set(analysis["argument_quality_comparison"]) == {"Stay", "Move"}
+
+    def test_prompt_uses_stored_scores_and_context(self, tmp_path, llm_service):
+        """Test that prompts are rebuilt from stored scores and archive context."""
+        repo = FakeRepository([make_decision("Should I move to another city for work or stay where I live now")])
+        bodies = []
+        client = LocalBatchClient(str(tmp_path / "api"), respond=lambda body: bodies.append(body) or analysis_for(body))
+        pipeline = BatchReanalysis(repo, llm_service, client, work_dir=str(tmp_path / "work"))
+
+        pipeline.collect(wait_for_batch(client, pipeline.submit()["id"], poll_seconds=0))
+
+        prompt = bodies[0]["messages"][-1]["content"]
+        assert "74.0/100" in prompt and "61.0/100" in prompt
+        assert "career growth matters most" in prompt
+
+    def test_nothing_selected(self, tmp_path, llm_service):
+        """Test that an empty selection creates no batch."""
+        client = LocalBatchClient(str(tmp_path / "api"), respond=analysis_for)
+        pipeline = BatchReanalysis(FakeRepository([]), llm_service, client, work_dir=str(tmp_path / "work"))
+
+        assert pipeline.submit() == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,122 @@
+"""
+Unit tests for LLM timeouts, retries and hedging against a fake OpenAI server.
+"""
+
+import asyncio
+import time
+import pytest
+import openai
+from openai import AsyncOpenAI
+from server.services.llm_resilience import ResiliencePolicy, llm_hedges
+
+
+def complete(fake_openai, policy, hedge=True):
+    """Run one chat completion through the policy, return (content, seconds)."""
+    async def run():
+        client = AsyncOpenAI(api_key="test", base_url=fake_openai.base_url, max_retries=0)
+
+        async def request():
+            response = await client.chat.completions.create(
+                model="fake", messages=[{"role": "user", "content": "hi"}]
+            )
+            return response.choices[0].message.content
+
+        try:
+            return await policy.call(request, hedge=hedge)
+        finally:
+            await client.close()
+
+    start = time.perf_counter()
+    content = asyncio.run(run())
+    return content, time.perf_counter() - start
+
+
+class TestRetries:
+    """Test retry policy on injected errors and latency."""
+
+    def test_retries_server_errors(self, fake_openai):
+        """Test that 5xx and 429 responses are retried until success."""
+        fake_openai.script = [{"status": 500}, {"status": 429}]
+        policy = ResiliencePolicy(max_attempts=3, backoff_base=0.01, name="test-retry")
+
+        content, _ = complete(fake_openai, policy)
+
+        assert content == fake_openai.content
+        assert fake_openai.requests == 3
+
+    def test_does_not_retry_client_errors(self, fake_openai):
+        """Test that 4xx errors other than 429 fail immediately."""
+        fake_openai.script = [{"status": 400}]
+        policy = ResiliencePolicy(max_attempts=3, backoff_base=0.01, name="test-fatal")
+
+        with pytest.raises(openai.BadRequestError):
+            complete(fake_openai, policy)
+        assert fake_openai.requests == 1
+
+    def test_attempt_timeout(self, fake_openai):
+        """Test that a hung attempt is abandoned and retried."""
+        fake_openai.script = [{"delay": 2.0}]
+        policy = ResiliencePolicy(attempt_timeout=0.3, max_attempts=2, backoff_base=0.01, name="test-timeout")
+
+        content, elapsed = complete(fake_openai, policy)
+
+        assert content == fake_openai.content
+        assert elapsed < 1.5
+
+    def test_gives_up_after_max_attempts(self, fake_openai):
+        """Test that the last error is raised once attempts run out."""
+        fake_openai.script = [{"status": 503}] * 3
+        policy = ResiliencePolicy(max_attempts=3, backoff_base=0.01, name="test-exhausted")
+
+        with pytest.raises(openai.InternalServerError):
+            complete(fake_openai, policy)
+        assert fake_openai.requests == 3
+
+    def test_backoff_is_bounded(self):
+        """Test full-jitter backoff stays within [0, min(max, base * 2^n)]."""
+        policy = ResiliencePolicy(backoff_base=1.0, backoff_max=5.0)
+        delays = [policy.backoff(n) for n in range(10) for _ in range(20)]
+
+        assert all(0 <= d <= 5.0 for d in delays)
+        assert max(policy.backoff(0) for _ in range(50)) <= 1.0
+
+
+class TestHedging:
+    """Test hedged second requests."""
+
+    def test_no_hedge_without_samples(self):
+        """Test that hedging waits for enough latency samples."""
+        policy = ResiliencePolicy(hedging=True, hedge_min_samples=5, name="test-cold")
+        assert policy.hedge_delay() is None
+
+    def test_slow_primary_is_hedged(self, fake_openai):
+        """Test that a slow first request is overtaken by the hedge."""
+        policy = ResiliencePolicy(
+            hedging=True, hedge_min_delay=0.2, hedge_min_samples=3, name="test-hedge"
+        )
+        for _ in range(3):
+            complete(fake_openai, policy)
+        fake_openai.script = [{"delay": 2.0, "content": '{"slow": true}'}]
+
+        content, elapsed = complete(fake_openai, policy)
+
+        assert content == fake_openai.content
+        assert elapsed < 1.5
+        assert llm_hedges.value(winner="hedge", policy="test-hedge") == 1
+
+    def test_hedge_disabled_per_call(self, fake_openai):
+        """Test that hedge=False waits for the single request."""
+        policy = ResiliencePolicy(
+            hedging=True, hedge_min_delay=0.1, hedge_min_samples=1, name="test-nohedge"
+        )
+        complete(fake_openai, policy)
+        fake_openai.script = [{"delay": 0.5, "content": '{"slow": true}'}]
+
+        content, _ = complete(fake_openai, policy, hedge=False)
+
+        assert content == '{"slow": true}'
+        assert fake_openai.requests == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,160 @@
+"""
+Unit tests for LLM service helpers.
+"""
+
+import asyncio
+import json
+import pytest
+from server.core.config import config
+from server.schemas.decision import DecisionCreate
+from server.services.llm_backends import BackendRegistry, LLMBackend
+from server.services.llm_service import LLMService, build_ml_input
+
+
+def make_decision(arguments):
+    return DecisionCreate(
+        context="Should I move abroad for a new job offer or stay in my current role here?",
+        variants=["Move", "Stay"],
+        arguments=arguments
+    )
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """LLM service without the response cache (no network until a call is made)."""
+    monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+    return LLMService()
+
+
+class TestBuildMLInput:
+    """Test content-derived argument IDs."""
+    
+    ARGUMENTS = [
+        {"variant_name": "Move", "type": "pro", "text": "Higher salary because the market there pays more"},
+        {"variant_name": "Stay", "type": "con", "text": "Career growth is slow because the company is small"},
+    ]
+    
+    def test_ids_are_deterministic(self):
+        """Test that the same decision always gets the same IDs."""
+        first = build_ml_input(make_decision(self.ARGUMENTS))
+        second = build_ml_input(make_decision(self.ARGUMENTS))
+        
+        assert [a["id"] for a in first] == [a["id"] for a in second]
+    
+    def test_ids_change_with_content(self):
+        """Test that editing an argument changes only its ID."""
+        edited = [dict(self.ARGUMENTS[0], text="Higher salary because the market there pays much more"), self.ARGUMENTS[1]]
+        
+        original_ids = [a["id"] for a in build_ml_input(make_decision(self.ARGUMENTS))]
+        edited_ids = [a["id"] for a in build_ml_input(make_decision(edited))]
+        
+        assert original_ids[0] != edited_ids[0]
+        assert original_ids[1] == edited_ids[1]
+    
+    def test_duplicate_arguments_get_distinct_ids(self):
+        """Test that identical arguments in one variant don't collide."""
+        ml_input = build_ml_input(make_decision([self.ARGUMENTS[0], self.ARGUMENTS[0]]))
+        
+        assert ml_input[0]["id"] != ml_input[1]["id"]
+        assert ml_input[0]["text"] == ml_input[1]["text"]
+
+
+
+class TestResponseCacheKey:
+    """Test that cached responses are scoped to the models that can answer."""
+    
+    def test_key_depends_on_backend_models(self, service):
+        """Test that another model never hits a response cached for a different one."""
+        service.backends = BackendRegistry([LLMBackend(name="a", model="model-a", api_key="test")])
+        key = service._cache_key("input")
+        
+        service.backends = BackendRegistry([LLMBackend(name="b", model="model-b", api_key="test")])
+        assert service._cache_key("input") != key
+        
+        # Same model behind another endpoint shares the cache
+        service.backends = BackendRegistry([LLMBackend(name="c", model="model-a", api_key="test")])
+        assert service._cache_key("input") == key
+
+
+SECTION = {
+    "strengths": ["Concrete salary figures"],
+    "weaknesses": [],
+    "logical_fallacies": [],
+    "missing_considerations": ["Cost of living"],
+    "data_quality": "SUFFICIENT"
+}
+CROSS = {
+    "alignment_with_model_scores": "Scores agree with the stated reasons",
+    "detected_reasoning_patterns": "Mostly financial reasoning",
+    "key_weak_points_to_reconsider": ["Family impact"],
+    "final_note": "Both options are viable"
+}
+
+
+class TestFanout:
+    """Test fan-out analysis: one call per variant plus one cross-variant call, merged."""
+    
+    ARGUMENTS = TestBuildMLInput.ARGUMENTS
+    
+    def run_fanout(self, service, replies, partials=None):
+        """Run analyze_decision_fanout with _chat_json answering by the part's instruction."""
+        decision = make_decision(self.ARGUMENTS)
+        ml_input = build_ml_input(decision)
+        calls = []
+        
+        async def chat_json(messages):
+            instruction = messages[-1]["content"]
+            part = next((v for v in decision.variants if f'"{v}"' in instruction), "cross")
+            calls.append(part)
+            reply = replies[part]
+            if isinstance(reply, Exception):
+                raise reply
+            return json.loads(json.dumps(reply))
+        
+        service._chat_json = chat_json
+        analysis = asyncio.run(service.analyze_decision_fanout(
+            decision, {arg["id"]: 50.0 for arg in ml_input}, {}, ml_input,
+            on_partial=(lambda path, value: partials.append(path)) if partials is not None else None
+        ))
+        return analysis, calls
+    
+    def test_parts_merged(self, service, monkeypatch):
+        """Test that wrapped variant answers are unwrapped and merged with the cross-variant part."""
+        monkeypatch.setattr(config, "LLM_COMPACT_OUTPUT", False)
+        partials = []
+        analysis, calls = self.run_fanout(service, {
+            "Move": {"v": {"Move": SECTION}},  # Wrapped in the compact key and the variant name
+            "Stay": {"argument_quality_comparison": dict(SECTION, strengths=["Known team"])},
+            "cross": dict(CROSS, argument_quality_comparison={"Move": {}})  # Must not override the variant parts
+        }, partials)
+        
+        assert sorted(calls) == ["Move", "Stay", "cross"]
+        assert analysis.argument_quality_comparison["Move"].strengths == ["Concrete salary figures"]
+        assert analysis.argument_quality_comparison["Stay"].strengths == ["Known team"]
+        assert analysis.final_note == "Both options are viable"
+        assert ("argument_quality_comparison", "Move") in partials
+        assert ("final_note",) in partials
+    
+    def test_failed_part_reasked(self, service, monkeypatch):
+        """Test that a failed variant call is left empty and re-asked through _finalize."""
+        monkeypatch.setattr(config, "LLM_COMPACT_OUTPUT", False)
+        reasks = []
+        
+        async def complete(messages):
+            reasks.append(messages[-1]["content"])
+            return json.dumps({"argument_quality_comparison": {"Stay": SECTION}})
+        
+        service._complete = complete
+        analysis, _ = self.run_fanout(service, {
+            "Move": SECTION,
+            "Stay": RuntimeError("connection reset"),
+            "cross": CROSS
+        })
+        
+        assert len(reasks) == 1
+        assert "Stay" in reasks[0] and "Move" not in reasks[0]
+        assert analysis.argument_quality_comparison["Stay"].missing_considerations == ["Cost of living"]
+        assert analysis.argument_quality_comparison["Move"].data_quality == "SUFFICIENT"
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
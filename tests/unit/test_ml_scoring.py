@@ -3,6 +3,7 @@ Unit tests for ML scoring service.
 """
 
 import pytest
+from server.services.cache import DiskCache
 from server.services.ml_scoring import MLScoring
 
 
@@ -99,6 +100,65 @@ class TestMLScoring:
         
         # Should be forced to 0-10 range
         assert scores["arg_1"] <= 10
+    
+    def test_known_pairs_not_rescored(self, ml_scoring, monkeypatch):
+        """Test that pair scores from an earlier run are reused and only new pairs are compared."""
+        arguments = [
+            {"id": "arg_1", "text": "Buy because it builds equity and provides tax benefits over time"},
+            {"id": "arg_2", "text": "Rent because it offers flexibility and lower upfront costs"},
+        ]
+        pair_scores = {}
+        ml_scoring.score_arguments(arguments, "Should I buy or rent a house?", pair_scores)
+        assert list(pair_scores) == ["arg_1|arg_2"]
+        
+        compared = []
+        original = ml_scoring.compare_arguments
+        monkeypatch.setattr(
+            ml_scoring, "compare_arguments",
+            lambda a, b, context: compared.append((a, b)) or original(a, b, context)
+        )
+        arguments.append({"id": "arg_3", "text": "Buy because the neighbourhood is improving quickly"})
+        ml_scoring.score_arguments(arguments, "Should I buy or rent a house?", pair_scores)
+        assert len(compared) == 2  # arg_1 / arg_3 and arg_2 / arg_3
+        assert len(pair_scores) == 3
+
+    def test_many_known_pairs_keep_every_argument_covered(self):
+        """Test that after repeated edits (more known pairs than the sample size) every argument is still compared."""
+        ml_scoring = MLScoring.__new__(MLScoring)  # Pair selection only, no model
+        # Edit that only removed an argument: every pair of 21 and 22 is known already,
+        # but the first 20 of the 63 known pairs in pair order never reach them
+        arguments = [{"id": f"arg_{i}", "text": f"Argument {i}"} for i in range(23)]
+        known = {(0, j) for j in range(1, 23)} | {(i, j) for i in range(23) for j in (21, 22) if i < j}
+        pair_scores = {f"arg_{i}|arg_{j}": 0.1 for i, j in known}
+        assert len(pair_scores) > ml_scoring.MAX_PAIRS_SAMPLE
+
+        pairs = ml_scoring._select_pairs(arguments, pair_scores)
+        assert {i for pair in pairs for i in pair} == set(range(23))
+        assert len(set(pairs)) == len(pairs)
+        assert len([p for p in pairs if f"arg_{p[0]}|arg_{p[1]}" not in pair_scores]) <= ml_scoring.MAX_PAIRS_SAMPLE
+
+    def test_score_many_single_model_call(self, ml_scoring, monkeypatch, tmp_path):
+        """Test that batched scoring of several decisions matches per-decision scoring with one predict call."""
+        first = [
+            {"id": "arg_1", "text": "Buy because it builds equity and provides tax benefits over time"},
+            {"id": "arg_2", "text": "Rent because it offers flexibility and lower upfront costs"},
+        ]
+        second = [
+            {"id": "arg_3", "text": "Move because the new job pays much better than the current one"},
+            {"id": "arg_4", "text": "Stay because family and friends live close by"},
+            {"id": "arg_5", "text": "Move because the city offers more career opportunities"},
+        ]
+        items = [(first, "Should I buy or rent a house?"), (second, "Should I move for a new job?")]
+        expected = [ml_scoring.score_arguments(arguments, context) for arguments, context in items]
+        
+        monkeypatch.setattr(ml_scoring, "pair_cache", DiskCache(str(tmp_path / "pair_scores.sqlite")))
+        calls = []
+        original = ml_scoring.model.predict
+        monkeypatch.setattr(ml_scoring.model, "predict", lambda pairs: calls.append(len(pairs)) or original(pairs))
+        pair_scores = [{}, {}]
+        assert ml_scoring.score_many(items, pair_scores) == pytest.approx(expected)
+        assert calls == [4]  # 1 + 3 pairs
+        assert [len(scores) for scores in pair_scores] == [1, 3]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,186 @@
+"""
+Unit tests for the offline JSONL runner (records, sharding, resume, stage stubs).
+"""
+
+import json
+import pytest
+from server.services.analysis_errors import InsufficientArgumentsError
+from server.services.offline_runner import (
+    OfflineRunner, finished_ids, open_output, parse_shard, read_records, select_records, shard_of, stub_analysis
+)
+
+
+DECISION = {
+    "context": "Should I move to another city for a better paid job next year",
+    "variants": ["A", "B"],
+    "arguments": [
+        {"variant_name": "A", "type": "pro", "text": "The new job pays much better than my current one"},
+        {"variant_name": "B", "type": "pro", "text": "Staying keeps me close to my family and friends"}
+    ]
+}
+
+
+class FakeOrchestrator:
+    """Stage methods of OrchestratorService the runner uses."""
+
+    def __init__(self, validate_error=None, score_error=None, retrieve_error=None):
+        self.validate_error = validate_error
+        self.score_error = score_error
+        self.retrieve_error = retrieve_error
+        self.retrieved = []
+
+    def _validate(self, ml_input):
+        if self.validate_error:
+            raise self.validate_error
+        return {"is_valid": True}
+
+    def _score(self, decision_data, ml_input):
+        if self.score_error:
+            raise self.score_error
+        return {arg["id"]: float(10 * i) for i, arg in enumerate(ml_input)}
+
+    def _retrieve(self, decision_id, decision_data, user_id):
+        self.retrieved.append((decision_id, user_id))
+        if self.retrieve_error:
+            raise self.retrieve_error
+        return {v: [f"past decision about {v}"] for v in decision_data.variants}
+
+    def _call_llm(self, decision_id, decision_data, ml_scores, variant_context, ml_input):
+        return stub_analysis(decision_data)
+
+    @staticmethod
+    def _variant_scores(ml_scores, ml_input):
+        return {arg["variant_name"]: ml_scores[arg["id"]] for arg in ml_input}
+
+    @staticmethod
+    def _flatten_context(variant_context):
+        return [text for texts in variant_context.values() for text in texts]
+
+
+def record(**fields):
+    return next(read_records([json.dumps(dict(DECISION, **fields))]))
+
+
+class TestReadRecords:
+    """Test parsing of input lines."""
+
+    def test_ids(self):
+        """Test that explicit IDs are kept and missing ones derive from the content."""
+        assert record(id=42, user_id="u1").id == "42"
+        assert record(id=42, user_id="u1").user_id == "u1"
+        assert record().id == record().id
+        assert record().id != record(context=DECISION["context"] + " or not").id
+
+    def test_unreadable_lines(self):
+        """Test that bad lines become error records keyed by line number, blank lines are skipped."""
+        records = list(read_records(["not json\n", "\n", json.dumps({"context": "too short"}), "[1, 2]"]))
+        assert [r.id for r in records] == ["line-1", "line-3", "line-4"]
+        assert all(r.error and r.decision is None for r in records)
+
+
+class TestShardingAndResume:
+    """Test splitting runs across machines and resuming them."""
+
+    def test_parse_shard(self):
+        """Test shard spec parsing."""
+        assert parse_shard("2/4") == (2, 4)
+        for bad in ("4/4", "-1/2", "1", "a/b", "0/0"):
+            with pytest.raises(ValueError):
+                parse_shard(bad)
+
+    def test_shards_partition_records(self):
+        """Test that every record falls into exactly one shard."""
+        ids = [f"decision-{i}" for i in range(200)]
+        shards = [
+            [r.id for r in select_records((record(id=i) for i in ids), shard=(index, 3))]
+            for index in range(3)
+        ]
+        assert sorted(sum(shards, [])) == sorted(ids)
+        assert all(len(shard) > 30 for shard in shards)
+        assert all(shard_of(i, 3) == index for index, shard in enumerate(shards) for i in shard)
+
+    def test_resume_skips_finished(self, tmp_path):
+        """Test that finished results are skipped, failed ones and a cut-off last line are retried."""
+        path = tmp_path / "results.jsonl"
+        path.write_text(
+            json.dumps({"id": "a", "status": "completed"}) + "\n"
+            + json.dumps({"id": "b", "status": "failed"}) + "\n"
+            + json.dumps({"id": "c", "status": "rejected"}) + "\n"
+            + '{"id": "d", "stat'
+        )
+        done = finished_ids(str(path))
+        assert done == {"a", "c"}
+        stats = {}
+        left = [r.id for r in select_records((record(id=i) for i in "abcd"), skip=done, stats=stats)]
+        assert left == ["b", "d"]
+        assert stats == {"resumed": 2}
+
+        with open_output(str(path), append=True) as out:
+            out.write(json.dumps({"id": "d", "status": "completed"}) + "\n")
+        assert finished_ids(str(path)) == {"a", "c", "d"}
+
+
+class TestOfflineRunner:
+    """Test the stage graph without HTTP or database."""
+
+    def test_completed(self):
+        """Test a full run: per-variant and per-argument scores, context, analysis, timeline."""
+        orchestrator = FakeOrchestrator()
+        result = OfflineRunner(orchestrator).run_one(record(id="x", user_id="u1"))
+        assert result["status"] == "completed"
+        assert result["ml_scores"] == {"A": 0.0, "B": 10.0}
+        assert len(result["argument_scores"]) == 2
+        assert result["retrieved_context"] == ["past decision about A", "past decision about B"]
+        assert set(result["analysis"]["argument_quality_comparison"]) == {"A", "B"}
+        assert [entry["stage"] for entry in result["timeline"]][-1] == "llm"
+        assert orchestrator.retrieved == [("x", "u1")]
+
+    def test_rejected_and_failed(self):
+        """Test that validation rejections and required stage failures are reported, not raised."""
+        details = {"error": "INSUFFICIENT_DATA", "message": "Some arguments lack sufficient reasoning"}
+        rejected = OfflineRunner(FakeOrchestrator(validate_error=InsufficientArgumentsError(details))).run_one(record())
+        assert rejected["status"] == "rejected"
+        assert rejected["error"]["error"] == "INSUFFICIENT_DATA"
+
+        failed = OfflineRunner(FakeOrchestrator(score_error=RuntimeError("model missing"))).run_one(record())
+        assert failed["status"] == "failed"
+        assert failed["failed_stage"] == "ml_scoring"
+
+    def test_retrieval_failure_degrades(self):
+        """Test that a RAG failure still completes the analysis without context."""
+        result = OfflineRunner(FakeOrchestrator(retrieve_error=RuntimeError("qdrant down"))).run_one(record(user_id="u1"))
+        assert result["status"] == "completed"
+        assert result["retrieved_context"] == []
+
+    def test_no_cross_user_retrieval_by_default(self):
+        """Test that records without a user_id are not given other users' decisions unless enabled."""
+        orchestrator = FakeOrchestrator()
+        result = OfflineRunner(orchestrator).run_one(record(id="x"))
+        assert result["status"] == "completed"
+        assert result["retrieved_context"] == []
+        assert orchestrator.retrieved == []
+
+        result = OfflineRunner(orchestrator, cross_user_retrieval=True).run_one(record(id="x"))
+        assert result["retrieved_context"] == ["past decision about A", "past decision about B"]
+        assert orchestrator.retrieved == [("x", None)]
+
+    def test_stubbed_stages_not_called(self):
+        """Test that stubbed stages bypass the orchestrator."""
+        orchestrator = FakeOrchestrator(score_error=RuntimeError("not stubbed"), retrieve_error=RuntimeError("not stubbed"))
+        result = OfflineRunner(orchestrator, stubs=["ml_scoring", "rag"]).run_one(record())
+        assert result["status"] == "completed"
+        assert set(result["argument_scores"].values()) == {50.0}
+        assert orchestrator.retrieved == []
+        with pytest.raises(ValueError):
+            OfflineRunner(orchestrator, stubs=["index"])
+
+    def test_run_streams_all_records(self):
+        """Test that every record, including unreadable ones, yields one result."""
+        lines = [json.dumps(dict(DECISION, id=i)) for i in range(10)] + ["not json"]
+        results = list(OfflineRunner(FakeOrchestrator()).run(read_records(lines), workers=3))
+        assert sorted(r["id"] for r in results) == sorted([str(i) for i in range(10)] + ["line-11"])
+        assert [r["status"] for r in results].count("completed") == 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,64 @@
+"""
+Unit tests for token-budgeted prompt assembly.
+"""
+
+import pytest
+from server.services import prompt_builder
+from server.services.prompt_builder import PromptBuilder, PromptSection, count_tokens
+
+
+@pytest.fixture(autouse=True)
+def length_based_tokens(monkeypatch):
+    """Use the length-based estimate (4 chars/token) so results don't depend on tiktoken."""
+    monkeypatch.setattr(prompt_builder, "_get_encoding", lambda model: None)
+
+
+def build(max_tokens, archive, **archive_kwargs):
+    builder = PromptBuilder("gpt-4o-mini", max_tokens)
+    builder.add(PromptSection("arguments", "Arguments:", ["a" * 200], priority=0, trimmable=False))
+    builder.add(PromptSection("scores", "Scores:", ["s1 50/100", "s2 40/100"], priority=1))
+    builder.add(PromptSection("archive", "Archive:", list(archive), priority=2, empty_text="None", **archive_kwargs))
+    return builder.build()
+
+
+class TestPromptBuilder:
+    """Test section budgets and the global ceiling."""
+    
+    def test_fits_without_trimming(self):
+        """Test that a small prompt is rendered unchanged."""
+        text, usage = build(1000, ["past 1", "past 2"])
+        
+        assert "past 1" in text and "past 2" in text
+        assert usage["total"] == count_tokens(text, "gpt-4o-mini")
+    
+    def test_lowest_priority_trimmed_first(self):
+        """Test that archive entries go before ML scores."""
+        text, usage = build(75, ["x" * 100, "y" * 100])
+        
+        assert "s1 50/100" in text and "s2 40/100" in text
+        assert "y" * 100 not in text
+        assert usage["total"] <= 75
+    
+    def test_long_entries_shortened_before_dropping(self):
+        """Test that per-item caps are applied before whole entries are dropped."""
+        text, _ = build(120, ["x" * 400, "y" * 400], item_max_tokens=20)
+        
+        assert "x" * 60 in text and "y" * 60 in text
+        assert "x" * 100 not in text
+    
+    def test_section_budget(self):
+        """Test that a section budget applies even under the ceiling."""
+        text, usage = build(10000, ["x" * 100] * 10, budget=60)
+        
+        assert usage["archive"] <= 60
+    
+    def test_untrimmable_sections_kept(self):
+        """Test that required sections survive an impossible ceiling."""
+        text, _ = build(10, ["past"])
+        
+        assert "a" * 200 in text
+        assert "None" in text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,123 @@
+"""
+Unit tests for the analysis stage DAG (concurrency, policies, timeline, resume).
+"""
+
+import time
+import pytest
+from server.services.stage_graph import Stage, StageFailed, StageGraph
+
+
+def sleeper(seconds, value=None):
+    def run(results):
+        time.sleep(seconds)
+        return value
+    return run
+
+
+def failing(results):
+    raise RuntimeError("boom")
+
+
+class TestStageGraph:
+    """Test dependency ordering and concurrency."""
+
+    def test_independent_stages_run_concurrently(self):
+        """Test that the critical path is max(ml, rag) + llm, not the sum."""
+        graph = StageGraph([
+            Stage("ml", sleeper(0.2, "scores")),
+            Stage("rag", sleeper(0.2, "context")),
+            Stage("llm", lambda r: (r["ml"], r["rag"]), depends_on=("ml", "rag")),
+        ])
+        started = time.perf_counter()
+        results, _ = graph.run()
+        assert time.perf_counter() - started < 0.35
+        assert results["llm"] == ("scores", "context")
+
+    def test_dependents_wait_for_dependencies(self):
+        """Test that a stage starts only after all its dependencies finished."""
+        graph = StageGraph([
+            Stage("ml", sleeper(0.05)),
+            Stage("rag", sleeper(0.15)),
+            Stage("llm", sleeper(0), depends_on=("ml", "rag")),
+        ])
+        _, timeline = graph.run()
+        by_stage = {t["stage"]: t for t in timeline}
+        rag = by_stage["rag"]
+        assert by_stage["llm"]["start_ms"] >= rag["start_ms"] + rag["duration_ms"]
+
+    def test_initial_results_visible(self):
+        """Test that initial values are passed to every stage."""
+        results, _ = StageGraph([Stage("a", lambda r: r["x"] + 1)]).run({"x": 1})
+        assert results["a"] == 2
+
+    def test_invalid_graphs_rejected(self):
+        """Test that unknown dependencies and cycles are rejected up front."""
+        with pytest.raises(ValueError):
+            StageGraph([Stage("a", failing, depends_on=("missing",))])
+        with pytest.raises(ValueError):
+            StageGraph([Stage("a", failing, depends_on=("b",)), Stage("b", failing, depends_on=("a",))])
+
+
+class TestStagePolicies:
+    """Test degrade-or-fail policies and the timeline."""
+
+    def test_optional_stage_degrades(self):
+        """Test that a failed optional stage yields its fallback and dependents still run."""
+        graph = StageGraph([
+            Stage("rag", failing, required=False, fallback={}),
+            Stage("llm", lambda r: r["rag"], depends_on=("rag",)),
+        ])
+        results, timeline = graph.run()
+        assert results["llm"] == {}
+        assert timeline[0]["status"] == "degraded"
+        assert "boom" in timeline[0]["error"]
+        assert timeline[1]["status"] == "ok"
+
+    def test_required_stage_fails_run(self):
+        """Test that a failed required stage raises and skips the stages after it."""
+        graph = StageGraph([
+            Stage("ml", failing),
+            Stage("rag", sleeper(0.05, {})),
+            Stage("llm", sleeper(0), depends_on=("ml", "rag")),
+        ])
+        with pytest.raises(StageFailed) as exc_info:
+            graph.run()
+        error = exc_info.value
+        assert error.stage == "ml"
+        assert isinstance(error.error, RuntimeError)
+        statuses = {t["stage"]: t["status"] for t in error.timeline}
+        assert statuses == {"ml": "failed", "rag": "ok", "llm": "skipped"}
+
+
+class TestCheckpoints:
+    """Test resuming from stage results of an earlier run."""
+
+    def test_restored_stages_not_rerun(self):
+        """Test that a failed LLM stage resumes without repeating ML scoring or RAG."""
+        def fail_if_run(results):
+            raise AssertionError("restored stage was run again")
+
+        graph = StageGraph([
+            Stage("ml", fail_if_run),
+            Stage("rag", fail_if_run),
+            Stage("llm", lambda r: (r["ml"], r["rag"]), depends_on=("ml", "rag")),
+        ])
+        results, timeline = graph.run({"ml": "scores", "rag": "context"})
+        assert results["llm"] == ("scores", "context")
+        assert {t["stage"]: t["status"] for t in timeline} == {"ml": "restored", "rag": "restored", "llm": "ok"}
+
+    def test_results_reported_before_dependents(self):
+        """Test that on_result sees each successful stage before its dependents start."""
+        reported = []
+        graph = StageGraph([
+            Stage("ml", sleeper(0, "scores")),
+            Stage("rag", failing, required=False, fallback={}),
+            Stage("llm", lambda r: list(reported), depends_on=("ml", "rag")),
+        ])
+        results, _ = graph.run(on_result=lambda stage, value: reported.append(stage))
+        assert results["llm"] == ["ml"]  # Degraded stages are not reported
+        assert reported == ["ml", "llm"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
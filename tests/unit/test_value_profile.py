@@ -0,0 +1,136 @@
+"""
+Unit tests for the per-user value profile digest.
+"""
+
+import json
+import pytest
+from server.core.config import config
+from server.schemas.decision import DecisionCreate
+from server.services.llm_service import build_ml_input
+from server.services.value_profile import is_verbatim, merge_entries, render_entries
+
+
+def entry(quote, kind="value", decision_id="d1", timestamp="2026-01-01T10:00:00"):
+    return {"kind": kind, "quote": quote, "decision_id": decision_id, "timestamp": timestamp}
+
+
+class TestVerbatim:
+    """Test the verbatim quote check."""
+
+    def test_exact_substring(self):
+        """Test that a copied phrase is accepted."""
+        assert is_verbatim("close to my family", "Staying keeps me close to my family and friends")
+
+    def test_ignores_case_and_punctuation(self):
+        """Test that case, punctuation and spacing differences are tolerated."""
+        assert is_verbatim("Close to  my family!", "Staying keeps me close to my family, and friends")
+
+    def test_paraphrase_rejected(self):
+        """Test that a paraphrase is not accepted."""
+        assert not is_verbatim("family matters most to me", "Staying keeps me close to my family")
+        assert not is_verbatim("", "anything")
+
+
+class TestMergeEntries:
+    """Test folding new statements into the profile."""
+
+    def test_new_entries_appended(self):
+        """Test that distinct statements are all kept."""
+        new = [entry("I want to travel", kind="goal", timestamp="2026-02-01T10:00:00")]
+        merged = merge_entries([entry("I value stability")], new, 10)
+        assert [e["quote"] for e in merged] == ["I want to travel", "I value stability"]
+        assert all(e["mentions"] == 1 for e in merged)
+
+    def test_repeated_statement_folded(self):
+        """Test that a near-identical quote increments mentions and keeps the newest source."""
+        existing = [dict(entry("I value financial stability"), mentions=2)]
+        new = [entry("I value financial stability.", decision_id="d2", timestamp="2026-02-01T10:00:00")]
+        merged = merge_entries(existing, new, 10)
+        assert len(merged) == 1
+        assert merged[0]["mentions"] == 3
+        assert merged[0]["decision_id"] == "d2"
+
+    def test_same_quote_different_kind_not_folded(self):
+        """Test that only statements of the same kind are folded."""
+        merged = merge_entries([entry("moving abroad", kind="goal")], [entry("moving abroad", kind="fear")], 10)
+        assert len(merged) == 2
+
+    def test_capped_by_mentions_then_recency(self):
+        """Test that the least mentioned, oldest entries are dropped first."""
+        existing = [
+            dict(entry("old", timestamp="2025-01-01T00:00:00"), mentions=1),
+            dict(entry("frequent", timestamp="2024-01-01T00:00:00"), mentions=5),
+        ]
+        merged = merge_entries(existing, [entry("recent", timestamp="2026-03-01T00:00:00")], 2)
+        assert [e["quote"] for e in merged] == ["frequent", "recent"]
+
+    def test_inputs_not_mutated(self):
+        """Test that existing entries are copied, not modified in place."""
+        existing = [entry("I value stability")]
+        merge_entries(existing, [entry("I value stability")], 10)
+        assert "mentions" not in existing[0]
+
+
+class TestRender:
+    """Test prompt rendering of profile entries."""
+
+    def test_render_lines(self):
+        """Test that entries cite kind, quote, source decision, date and repeats."""
+        lines = render_entries([dict(entry("I value stability"), mentions=3), entry("I want to travel", kind="goal")])
+        assert lines[0] == '  - [value] "I value stability" (decision d1, 2026-01-01, stated 3x)'
+        assert lines[1] == '  - [goal] "I want to travel" (decision d1, 2026-01-01)'
+
+
+class TestProfileInPrompt:
+    """Test that the profile replaces the raw archive in the prompt."""
+
+    @pytest.fixture
+    def service(self, fake_openai, monkeypatch):
+        from server.services.llm_backends import BackendRegistry, LLMBackend
+        from server.services.llm_service import LLMService
+        monkeypatch.setattr(config, "LLM_CACHE_ENABLED", False)
+        service = LLMService()
+        service.backends = BackendRegistry([LLMBackend("fake", "fake", fake_openai.base_url, "test")])
+        return service
+
+    @pytest.fixture
+    def decision(self):
+        return DecisionCreate(
+            context="Should I move to another city for a better paid job next year",
+            variants=["A", "B"],
+            arguments=[
+                {"variant_name": "A", "type": "pro", "text": "The new job pays much better than my current one"},
+                {"variant_name": "B", "type": "pro", "text": "Staying keeps me close to my family and friends"}
+            ]
+        )
+
+    def test_profile_replaces_archive(self, service, decision):
+        """Test that archive entries are not sent when a profile exists."""
+        ml_input = build_ml_input(decision)
+        context = {"A": ["an old archived argument"], "B": []}
+        profile = [entry("I value stability")]
+
+        with_profile = service._prepare_input_with_ids(decision, {}, context, ml_input, profile)
+        without_profile = service._prepare_input_with_ids(decision, {}, context, ml_input)
+
+        assert "I value stability" in with_profile
+        assert "an old archived argument" not in with_profile
+        assert "an old archived argument" in without_profile
+
+    def test_extract_keeps_only_verbatim_quotes(self, service, decision, fake_openai):
+        """Test that invented quotes and unknown kinds are dropped."""
+        fake_openai.content = json.dumps({"items": [
+            ["value", "close to my family"],
+            ["goal", "become a famous painter"],
+            ["mood", "pays much better"],
+            ["goal", "a better paid job"]
+        ]})
+        statements = service.extract_value_statements(decision)
+        assert statements == [
+            {"kind": "value", "quote": "close to my family"},
+            {"kind": "goal", "quote": "a better paid job"}
+        ]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])